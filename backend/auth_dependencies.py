@@ -1,16 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
-from auth_service import AuthService
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from auth_service import AsyncAuthService
 from auth_models import TokenData
 
 # Security scheme
 security = HTTPBearer()
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current authenticated user from JWT token"""
     credentials_exception = HTTPException(
@@ -21,13 +21,13 @@ def get_current_user(
     
     try:
         # Verify token
-        auth_service = AuthService(db)
+        auth_service = AsyncAuthService(db)
         email = auth_service.verify_token(credentials.credentials)
         if email is None:
             raise credentials_exception
         
         # Get user from database
-        user = auth_service.get_user_by_email(email)
+        user = await auth_service.get_user_by_email(email)
         if user is None:
             raise credentials_exception
         
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
-from auth_service import AuthService
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from auth_service import AsyncAuthService
+from services.password_hasher import PasswordHasherBusy
 from auth_dependencies import get_current_active_user
 from auth_models import (
     UserCreate, UserLogin, UserResponse, Token, 
@@ -11,12 +12,20 @@ from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def password_hasher_busy() -> HTTPException:
+    """503 for a login/signup burst beyond PASSWORD_HASH_MAX_PENDING"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/signup", response_model=Token)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
-        auth_service = AuthService(db)
-        user = auth_service.create_user(user_data)
+        auth_service = AsyncAuthService(db)
+        user = await auth_service.create_user(user_data)
         
         # Create access token
         access_token = auth_service.create_access_token(
@@ -33,12 +42,17 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return access token"""
-    auth_service = AuthService(db)
-    user = auth_service.authenticate_user(user_credentials.email, user_credentials.password)
+    auth_service = AsyncAuthService(db)
+    try:
+        user = await auth_service.authenticate_user(user_credentials.email, user_credentials.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
     
     if not user:
         raise HTTPException(
@@ -78,11 +92,11 @@ async def get_current_user_info(current_user = Depends(get_current_active_user))
 async def update_profile(
     user_data: UserUpdate,
     current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user profile"""
-    auth_service = AuthService(db)
-    updated_user = auth_service.update_user(current_user.id, user_data)
+    auth_service = AsyncAuthService(db)
+    updated_user = await auth_service.update_user(current_user.id, user_data)
     
     if not updated_user:
         raise HTTPException(
@@ -93,10 +107,10 @@ async def update_profile(
     return UserResponse.from_orm(updated_user)
 
 @router.post("/forgot-password", response_model=ForgotPasswordResponse)
-async def forgot_password(reset_data: PasswordReset, db: Session = Depends(get_db)):
+async def forgot_password(reset_data: PasswordReset, db: AsyncSession = Depends(get_async_db)):
     """Request password reset (placeholder - would send email in production)"""
-    auth_service = AuthService(db)
-    user = auth_service.get_user_by_email(reset_data.email)
+    auth_service = AsyncAuthService(db)
+    user = await auth_service.get_user_by_email(reset_data.email)
     
     if user:
         # In production, this would:
@@ -109,7 +123,7 @@ async def forgot_password(reset_data: PasswordReset, db: Session = Depends(get_d
     return {"message": "If an account with this email exists, a password reset link has been sent"}
 
 @router.post("/reset-password")
-async def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def reset_password(reset_data: PasswordResetConfirm, db: AsyncSession = Depends(get_async_db)):
     """Reset password with token (placeholder implementation)"""
     # In production, this would:
     # 1. Verify the reset token
@@ -119,9 +133,9 @@ async def reset_password(reset_data: PasswordResetConfirm, db: Session = Depends
     return {"message": "Password has been reset successfully"}
 
 @router.post("/refresh")
-async def refresh_token(current_user = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def refresh_token(current_user = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
     """Refresh access token"""
-    auth_service = AuthService(db)
+    auth_service = AsyncAuthService(db)
     
     # Create new access token
     access_token = auth_service.create_access_token(
@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from auth_models import User, UserCreate, UserUpdate
+from services.password_hasher import PasswordHasher, password_hasher
 import os
 from dotenv import load_dotenv
 
@@ -14,8 +16,8 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (bcrypt at BCRYPT_ROUNDS; see services/password_hasher.py)
+pwd_context = password_hasher.context
 
 class AuthService:
     def __init__(self, db: Session):
@@ -87,8 +89,13 @@ class AuthService:
         user = self.get_user_by_email(email)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Hashed at an earlier BCRYPT_ROUNDS - store it at the current cost
+            user.hashed_password = new_hash
+            self.db.commit()
         return user
     
     def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
@@ -120,3 +127,82 @@ class AuthService:
         user.hashed_password = self.get_password_hash(new_password)
         self.db.commit()
         return True
+
+
+class AsyncAuthService(AuthService):
+    """
+    AuthService for request handlers: queries await the async driver, and
+    bcrypt (deliberately slow) runs on the password hasher's own pool, so
+    neither blocks the event loop. Token helpers are inherited unchanged.
+    Password methods raise PasswordHasherBusy when that pool is saturated.
+    """
+    def __init__(self, db: AsyncSession, hasher: PasswordHasher = password_hasher):
+        self.db = db
+        self.hasher = hasher
+    
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.hasher.verify(plain_password, hashed_password)
+    
+    async def get_password_hash(self, password: str) -> str:
+        return await self.hasher.hash(password)
+    
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return (await self.db.scalars(select(User).where(User.email == email).limit(1))).first()
+    
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        return await self.db.get(User, user_id)
+    
+    async def create_user(self, user_data: UserCreate) -> User:
+        if await self.get_user_by_email(user_data.email):
+            raise ValueError("User with this email already exists")
+        
+        db_user = User(
+            email=user_data.email,
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            company=user_data.company,
+            hashed_password=await self.get_password_hash(user_data.password)
+        )
+        
+        self.db.add(db_user)
+        await self.db.commit()
+        # Server defaults (created_at) are only known after a refresh
+        await self.db.refresh(db_user)
+        return db_user
+    
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        user = await self.get_user_by_email(email)
+        if not user:
+            return None
+        valid, new_hash = await self.hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            # Hashed at an earlier BCRYPT_ROUNDS - store it at the current cost
+            user.hashed_password = new_hash
+            await self.db.commit()
+        return user
+    
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+        user = await self.get_user_by_id(user_id)
+        if not user:
+            return None
+        
+        for field, value in user_data.dict(exclude_unset=True).items():
+            setattr(user, field, value)
+        
+        await self.db.commit()
+        await self.db.refresh(user)
+        return user
+    
+    async def change_password(self, user_id: int, current_password: str, new_password: str) -> bool:
+        user = await self.get_user_by_id(user_id)
+        if not user:
+            return False
+        
+        if not await self.verify_password(current_password, user.hashed_password):
+            return False
+        
+        user.hashed_password = await self.get_password_hash(new_password)
+        await self.db.commit()
+        return True
@@ -0,0 +1,154 @@
+"""
+Benchmark: pooled Gemini client vs. one-shot requests.post
+
+Starts a local stand-in for the Gemini generateContent endpoint and times
+N analysis calls both ways. The stand-in counts accepted TCP connections,
+so the output shows how many handshakes each approach paid for.
+
+Usage (from backend/):
+    python benchmarks/gemini_pool_benchmark.py --calls 200
+    python benchmarks/gemini_pool_benchmark.py --calls 200 --certfile cert.pem --keyfile key.pem
+
+With --certfile/--keyfile the stand-in speaks TLS, which is closer to the
+real googleapis.com cost (the handshake dominates for short prompts).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import ssl
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+GEMINI_STAND_IN_RESPONSE = json.dumps({
+    "candidates": [{
+        "content": {
+            "parts": [{
+                "text": json.dumps({
+                    "profile_type": "technical",
+                    "summary": "Stand-in summary",
+                    "tier": "A",
+                    "match_justification": "Stand-in justification",
+                    "confidence_score": 0.9
+                })
+            }]
+        }
+    }]
+}).encode("utf-8")
+
+
+class GeminiStandInHandler(BaseHTTPRequestHandler):
+    """Minimal generateContent stand-in with HTTP/1.1 keep-alive"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY a reused
+    # connection stalls ~40ms per call on delayed ACKs (a stand-in artifact)
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(GEMINI_STAND_IN_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(GEMINI_STAND_IN_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+def start_stand_in(certfile=None, keyfile=None):
+    server = CountingServer(("127.0.0.1", 0), GeminiStandInHandler)
+    scheme = "http"
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/v1beta"
+
+
+def run_one_shot(base_url, calls, verify):
+    url = f"{base_url}/models/gemini-1.5-pro:generateContent?key=bench"
+    payload = {"contents": [{"parts": [{"text": "benchmark prompt"}]}]}
+    start = time.perf_counter()
+    for _ in range(calls):
+        response = requests.post(url, json=payload, verify=verify)
+        response.json()
+    return time.perf_counter() - start
+
+
+def run_pooled(calls, verify):
+    from services.ai_analyzer import AIAnalyzer
+
+    analyzer = AIAnalyzer()
+    if not verify:
+        # Session-level verify=False loses to REQUESTS_CA_BUNDLE unless env is ignored
+        analyzer.client.trust_env = False
+        analyzer.client.verify = False
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(calls):
+            analyzer._call_gemini_api("benchmark prompt")
+    elapsed = time.perf_counter() - start
+    analyzer.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+
+    server, base_url = start_stand_in(args.certfile, args.keyfile)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ["GOOGLE_GEMINI_API_KEY"] = "bench"
+    verify = False if args.certfile else True
+    if not verify:
+        import urllib3
+        urllib3.disable_warnings()
+
+    print(f"🧪 Gemini stand-in at {base_url} - {args.calls} calls each\n")
+
+    server.connections = 0
+    one_shot = run_one_shot(base_url, args.calls, verify)
+    one_shot_connections = server.connections
+
+    server.connections = 0
+    pooled = run_pooled(args.calls, verify)
+    pooled_connections = server.connections
+
+    print(f"{'client':<22}{'total s':>10}{'ms/call':>10}{'connections':>14}")
+    print(f"{'requests.post':<22}{one_shot:>10.3f}{one_shot / args.calls * 1000:>10.2f}{one_shot_connections:>14}")
+    print(f"{'AIAnalyzer pooled':<22}{pooled:>10.3f}{pooled / args.calls * 1000:>10.2f}{pooled_connections:>14}")
+    print(f"\n⚡ Speedup: {one_shot / pooled:.2f}x, handshakes saved: {one_shot_connections - pooled_connections}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
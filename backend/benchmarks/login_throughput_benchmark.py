@@ -0,0 +1,198 @@
+"""
+Benchmark: login throughput and event-loop health during a login burst
+
+Simulates one uvicorn worker: login clients authenticate against seeded
+users (user lookup on an AsyncSession, then bcrypt), while other clients
+issue requests that hand a little blocking work to the shared threadpool
+(what file responses and export lookups do) and a probe task measures how
+late its asyncio.sleep() wakes up.
+
+- inline     : bcrypt called directly in the coroutine (blocks the loop)
+- threadpool : bcrypt in Starlette's shared threadpool (run_in_threadpool) -
+               the loop stays free, but bcrypt fills the pool's threads and
+               the other requests queue behind it
+- hasher     : AsyncAuthService on the dedicated password hasher pool
+               (services/password_hasher.py)
+
+A last run stores the users' hashes at --rounds - 2 and logs each one in
+once, showing the cost of the transparent rehash to BCRYPT_ROUNDS.
+
+Usage (from backend/):
+    python benchmarks/login_throughput_benchmark.py
+    python benchmarks/login_throughput_benchmark.py --rounds 10 --login-clients 32 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+import migrations
+from auth_models import User
+from auth_service import AsyncAuthService
+from database import get_async_database_url
+from services.password_hasher import (BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PasswordHasher, PasswordHasherBusy,
+                                      create_password_context)
+
+PASSWORD = "correct horse battery staple"
+# Blocking work per "other" request (a small file read, an export lookup)
+OTHER_BLOCKING_SECONDS = 0.002
+PROBE_INTERVAL = 0.005
+
+
+def seed(Session, users: int, rounds: int):
+    context = create_password_context(rounds)
+    hashed = context.hash(PASSWORD)  # one hash for all: seeding is not what is measured
+    db = Session()
+    db.query(User).delete()
+    db.add_all([User(email=f"login{i}@example.com", first_name="Bench", last_name="User",
+                     company="Bench", hashed_password=hashed) for i in range(users)])
+    db.commit()
+    db.close()
+
+
+async def login(mode, sessions, hasher, email, latencies, counts):
+    start = time.perf_counter()
+    async with sessions() as db:
+        auth_service = AsyncAuthService(db, hasher)
+        try:
+            if mode == "hasher":
+                user = await auth_service.authenticate_user(email, PASSWORD)
+            else:
+                user = await auth_service.get_user_by_email(email)
+                if mode == "inline":
+                    valid = hasher.context.verify(PASSWORD, user.hashed_password)
+                else:
+                    valid = await run_in_threadpool(hasher.context.verify, PASSWORD, user.hashed_password)
+                user = user if valid else None
+        except PasswordHasherBusy:
+            counts["rejected"] += 1
+            return
+    if user is None:
+        counts["errors"] += 1
+        return
+    latencies.append(time.perf_counter() - start)
+
+
+async def login_client(mode, sessions, hasher, index, users, stop, latencies, counts):
+    attempt = 0
+    while not stop.is_set():
+        await login(mode, sessions, hasher, f"login{(index + attempt) % users}@example.com", latencies, counts)
+        attempt += 1
+        await asyncio.sleep(0)
+
+
+async def other_client(stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(time.sleep, OTHER_BLOCKING_SECONDS)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def probe(stop, lags):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)] * 1000 if values else float("nan")
+
+
+async def run_mode(mode, url, hasher, seconds, login_clients, other_clients, users):
+    engine = create_async_engine(get_async_database_url(url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    stop = asyncio.Event()
+    counts = {"errors": 0, "rejected": 0}
+    login_latencies, other_latencies, lags = [], [], []
+    tasks = [asyncio.create_task(probe(stop, lags))]
+    tasks += [asyncio.create_task(login_client(mode, sessions, hasher, i, users, stop, login_latencies, counts))
+              for i in range(login_clients)]
+    tasks += [asyncio.create_task(other_client(stop, other_latencies)) for _ in range(other_clients)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    await engine.dispose()
+
+    return {
+        "logins_per_s": len(login_latencies) / seconds,
+        "login_p50_ms": percentile(login_latencies, 0.5),
+        "other_p99_ms": percentile(other_latencies, 0.99),
+        "lag_p99_ms": percentile(lags, 0.99),
+        "lag_max_ms": max(lags) * 1000 if lags else float("nan"),
+        "rejected": counts["rejected"],
+        "errors": counts["errors"]
+    }
+
+
+async def rehash_run(url, hasher, users):
+    engine = create_async_engine(get_async_database_url(url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    counts = {"errors": 0, "rejected": 0}
+    # Every user logs in twice: the first login rehashes, the second only verifies
+    elapsed = []
+    for _ in range(2):
+        start = time.perf_counter()
+        await asyncio.gather(*[login("hasher", sessions, hasher, f"login{i}@example.com", [], counts)
+                               for i in range(users)])
+        elapsed.append(time.perf_counter() - start)
+    async with sessions() as db:
+        hashes = (await db.scalars(select(User.hashed_password))).all()
+    await engine.dispose()
+    return elapsed, hashes, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    parser.add_argument("--login-clients", type=int, default=16)
+    parser.add_argument("--other-clients", type=int, default=8)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    # Never rejects: the burst is measured, not shed
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, max_pending=args.login_clients + args.users)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url)
+        migrations.upgrade(engine)
+        Session = sessionmaker(bind=engine)
+        seed(Session, args.users, args.rounds)
+
+        print(f"\n🧪 bcrypt cost {args.rounds}, {args.workers} hasher threads, {args.login_clients} login clients, "
+              f"{args.other_clients} other clients, {args.seconds:g}s per mode")
+        print(f"{'mode':>11}{'logins/s':>10}{'login p50 ms':>14}{'other p99 ms':>14}"
+              f"{'lag p99 ms':>12}{'lag max ms':>12}{'rejected':>10}{'errors':>8}")
+        for mode in ("inline", "threadpool", "hasher"):
+            result = asyncio.run(run_mode(mode, url, hasher, args.seconds, args.login_clients, args.other_clients, args.users))
+            print(f"{mode:>11}{result['logins_per_s']:>10.1f}{result['login_p50_ms']:>14.1f}{result['other_p99_ms']:>14.1f}"
+                  f"{result['lag_p99_ms']:>12.1f}{result['lag_max_ms']:>12.1f}{result['rejected']:>10}{result['errors']:>8}")
+
+        old_rounds = max(4, args.rounds - 2)
+        seed(Session, args.users, old_rounds)
+        (first, second), hashes, counts = asyncio.run(rehash_run(url, hasher, args.users))
+        current = sum(1 for hashed in hashes if not hasher.context.needs_update(hashed))
+        print(f"\n🔁 Rehash from cost {old_rounds}: first logins {first:.2f}s, second logins {second:.2f}s "
+              f"({args.users} users), {current}/{len(hashes)} hashes now at cost {args.rounds}, "
+              f"{counts['errors']} errors")
+        engine.dispose()
+    hasher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark: concurrent search + save throughput on SQLite, plain vs tuned
+
+Runs reader threads (history page, statistics and a candidate full-text
+search - what the UI loads while searches run) next to saver threads
+(completed searches being written to history) for a fixed time, against
+a fresh SQLite file in each mode:
+
+- plain : the previous setup - rollback journal, check_same_thread=False
+          only, every request saving in its own thread
+- tuned : database.apply_sqlite_profile() (WAL, synchronous=NORMAL,
+          busy_timeout, cache_size, mmap_size) and saves routed through
+          the write-behind queue's single writer
+
+Failed operations (e.g. "database is locked") are counted, not retried.
+Both modes share one Python process, so readers and savers also compete
+for the GIL: more saves per second in tuned mode cost some reads per
+second, and ops/s is the combined figure to compare.
+
+Usage (from backend/):
+    python benchmarks/sqlite_concurrency_benchmark.py
+    python benchmarks/sqlite_concurrency_benchmark.py --readers 8 --savers 8 --seconds 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import migrations
+from auth_models import User
+from database import SQLITE_BUSY_TIMEOUT_MS, apply_sqlite_profile
+from search_history_service import SearchHistoryService
+from services.history_writer import HistoryWriteBehindQueue
+from save_search_benchmark import make_response
+
+CANDIDATES_PER_SEARCH = 25
+SEEDED_SEARCHES = 50
+
+
+def build_engine(url, tuned):
+    if not tuned:
+        return create_engine(url, connect_args={"check_same_thread": False})
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000})
+    return apply_sqlite_profile(engine)
+
+
+def seed(Session):
+    db = Session()
+    user = User(email="bench@example.com", first_name="Bench", last_name="User", company="Bench", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    service = SearchHistoryService(db)
+    for _ in range(SEEDED_SEARCHES):
+        service.save_search_result(user_id, {"industry": "fintech"}, make_response(CANDIDATES_PER_SEARCH))
+    db.close()
+    return user_id
+
+
+def read_once(Session, user_id):
+    db = Session()
+    try:
+        service = SearchHistoryService(db)
+        service.get_user_search_history_page(user_id, limit=20)
+        service.get_search_statistics(user_id)
+        service.search_candidates(user_id, "fintech founder", limit=20)
+    finally:
+        db.close()
+
+
+def save_once(Session, writer, user_id, response):
+    if writer is not None:
+        writer.submit(user_id, {"industry": "fintech"}, response).result()
+        return
+    db = Session()
+    try:
+        SearchHistoryService(db).save_search_result(user_id, {"industry": "fintech"}, response)
+    finally:
+        db.close()
+
+
+def worker(operation, stop, latencies, errors, lock):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            operation()
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__ + ": " + str(e).splitlines()[0][:60]] += 1
+            continue
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+
+def run(tuned, readers, savers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", tuned)
+        migrations.upgrade(engine)
+        Session = sessionmaker(bind=engine)
+        user_id = seed(Session)
+
+        writer = None
+        if tuned:
+            writer = HistoryWriteBehindQueue(session_factory=Session)
+            writer.use_single_writer()
+
+        response = make_response(CANDIDATES_PER_SEARCH)
+        stop = threading.Event()
+        lock = threading.Lock()
+        read_latencies, save_latencies = [], []
+        errors = Counter()
+        threads = [
+            threading.Thread(target=worker, args=(lambda: read_once(Session, user_id), stop, read_latencies, errors, lock))
+            for _ in range(readers)
+        ] + [
+            threading.Thread(target=worker, args=(lambda: save_once(Session, writer, user_id, response), stop, save_latencies, errors, lock))
+            for _ in range(savers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if writer is not None:
+            writer.close()
+        engine.dispose()
+
+    def p95(values):
+        return statistics.quantiles(values, n=20)[-1] * 1000 if len(values) >= 2 else float("nan")
+
+    return {
+        "reads_per_s": len(read_latencies) / seconds,
+        "saves_per_s": len(save_latencies) / seconds,
+        "read_p95_ms": p95(read_latencies),
+        "save_p95_ms": p95(save_latencies),
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--savers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"🧪 SQLite - {args.readers} reader and {args.savers} saver threads for {args.seconds:g}s, "
+          f"{CANDIDATES_PER_SEARCH} candidates per saved search")
+    print(f"{'mode':>6}{'reads/s':>10}{'saves/s':>10}{'ops/s':>10}{'read p95 ms':>14}{'save p95 ms':>14}{'errors':>8}")
+    results = {}
+    for mode in ("plain", "tuned"):
+        results[mode] = result = run(mode == "tuned", args.readers, args.savers, args.seconds)
+        ops = result["reads_per_s"] + result["saves_per_s"]
+        print(f"{mode:>6}{result['reads_per_s']:>10.1f}{result['saves_per_s']:>10.1f}{ops:>10.1f}"
+              f"{result['read_p95_ms']:>14.1f}{result['save_p95_ms']:>14.1f}{sum(result['errors'].values()):>8}")
+
+    for mode, result in results.items():
+        for error, count in result["errors"].most_common(3):
+            print(f"   {mode}: {count} x {error}")
+
+
+if __name__ == "__main__":
+    main()
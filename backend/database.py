@@ -1,9 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
 from dotenv import load_dotenv
 
+from services.compression import column_codec, register_sqlite_functions
+from services.read_replica import ReplicaLagMonitor
+
 # Load environment variables
 load_dotenv()
 
@@ -32,16 +37,84 @@ def get_database_url():
         # Development: SQLite
         return os.getenv("DATABASE_URL", "sqlite:///./founder_sourcing.db")
 
+# SQLite profile for single-node deployments (SQLITE_TUNED=false restores the plain defaults)
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+
+def sqlite_pragmas():
+    """PRAGMAs run on every new SQLite connection by the tuned profile"""
+    return [
+        # Readers no longer block the writer (or each other); only writers serialize
+        "PRAGMA journal_mode=WAL",
+        # With WAL, NORMAL only fsyncs at checkpoints - still safe against corruption
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        # Wait for the write lock instead of failing with "database is locked"
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        # Negative cache_size is in KiB; the page cache is per connection
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+    ]
+
+def apply_sqlite_profile(sqlite_engine):
+    """Run sqlite_pragmas() on each connection the engine opens"""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return sqlite_engine
+
+# Every SQLite connection - app, scripts, benchmarks - needs zstd_text() (the
+# full-text triggers call it to index the compressed candidate columns) and
+# foreign keys switched on (SQLite leaves them off, and deleting a search
+# relies on ON DELETE CASCADE to remove its candidate links)
+@event.listens_for(Engine, "connect")
+def prepare_sqlite_connection(dbapi_connection, connection_record):
+    if hasattr(dbapi_connection, "create_function"):
+        register_sqlite_functions(dbapi_connection)
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def get_async_database_url(url: str) -> str:
+    """The same database through its asyncio driver (aiosqlite / asyncpg)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+
 # Get database URL
 SQLALCHEMY_DATABASE_URL = get_database_url()
 
 # Create engine with appropriate configuration
+# (engine serves scripts, migrations, the history writer and export streams;
+# async_engine serves the request handlers without blocking the event loop)
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    # SQLite configuration for development
+    # SQLite configuration for development and single-node deployments
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    )
+    async_engine = create_async_engine(
+        get_async_database_url(SQLALCHEMY_DATABASE_URL),
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
     )
+    if SQLITE_TUNED:
+        apply_sqlite_profile(engine)
+        apply_sqlite_profile(async_engine.sync_engine)
 else:
     # PostgreSQL configuration for production
     engine = create_engine(
@@ -51,9 +124,80 @@ else:
         pool_pre_ping=True,
         pool_recycle=300
     )
+    async_engine = create_async_engine(
+        get_async_database_url(SQLALCHEMY_DATABASE_URL),
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=300
+    )
+
+# Optional read replica for the history endpoints (another PostgreSQL or SQLite
+# database kept in sync with the primary); unset means everything reads the primary
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+replica_async_engine = None
+if DATABASE_REPLICA_URL:
+    if DATABASE_REPLICA_URL.startswith("sqlite"):
+        replica_async_engine = create_async_engine(
+            get_async_database_url(DATABASE_REPLICA_URL),
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        )
+        if SQLITE_TUNED:
+            apply_sqlite_profile(replica_async_engine.sync_engine)
+    else:
+        replica_async_engine = create_async_engine(
+            get_async_database_url(DATABASE_REPLICA_URL),
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_recycle=300
+        )
+
+replica_monitor = ReplicaLagMonitor(async_engine, replica_async_engine)
+
+# Compressed columns load their dictionaries through the primary
+column_codec.bind(engine)
+
+class RoutingSession(Session):
+    """
+    Picks the replica or the primary once per session, on its first read, so a
+    request sees one consistent database. Flushes and INSERT/UPDATE/DELETE
+    always go to the primary, and so does every later read in that session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["route"] = "primary"
+        if "route" not in self.info:
+            to_replica = replica_monitor.use_replica()
+            replica_monitor.record_route(to_replica)
+            self.info["route"] = "replica" if to_replica else "primary"
+        if self.info["route"] == "replica":
+            return replica_async_engine.sync_engine
+        return async_engine.sync_engine
+
+def use_primary(db) -> bool:
+    """
+    Send the rest of a ReadSessionLocal session to the primary. True if it was
+    reading the replica - the caller can retry a lookup that missed there
+    (a user or search created within the replica lag).
+    """
+    info = getattr(db, "sync_session", db).info
+    if info.get("route") != "replica":
+        return False
+    info["route"] = "primary"
+    return True
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Loaded attributes stay readable after commit - an async session cannot lazy-load them
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+# Read-mostly endpoints (/search-history*, /search-statistics): the replica while it keeps up
+if replica_async_engine is not None:
+    ReadSessionLocal = async_sessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False)
+else:
+    ReadSessionLocal = AsyncSessionLocal
 
 # Create Base class
 Base = declarative_base()
@@ -66,6 +210,12 @@ def get_db():
     finally:
         db.close()
 
-# Create tables
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Create / upgrade tables through the versioned migrations
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    import migrations
+    migrations.upgrade(engine)
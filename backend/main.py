@@ -5,25 +5,40 @@ Updated with proper CORS configuration for frontend connection
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
+import uuid
+from datetime import datetime
 import uvicorn
 import os
 from dotenv import load_dotenv
 
 # Import our services
 from services.harvest_client import HarvestClient
-from services.ai_analyzer import AIAnalyzer  
-from services.export_service import ExportService
-from models import SearchCriteria, Candidate
+from services.ai_analyzer import AIAnalyzer, gemini_limiter, gemini_breaker
+from services.export_service import ExportService, CANDIDATE_ARROW_SCHEMA
+from services.export_store import ContentAddressedExportStore
+from services.object_storage import create_storage_backend
+from services.http_ranges import RangeNotSatisfiable, etag_matches, parse_byte_range
+from services.deadline import Deadline
+from services.cancellation import CancellationToken, SearchCancelled, search_registry
+from services.history_writer import history_writer
+from services.compression import column_codec
+from services.history_retention import ensure_history_partitions
+from services.password_hasher import password_hasher
+from search_history_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from models import SearchCriteria, Candidate, SearchHistoryDeleteRequest
 
 # Import authentication modules (lazy import to avoid database connection during startup)
 from auth_router import router as auth_router
 from database import create_tables
 from auth_models import Base
-from database import engine
+from database import engine, async_engine, replica_async_engine, replica_monitor, SQLITE_TUNED
+import migrations
 
 # Load environment variables
 load_dotenv()
@@ -76,17 +91,103 @@ if os.path.exists("frontend"):
 # Initialize services
 harvest_client = HarvestClient()
 ai_analyzer = AIAnalyzer()
-export_service = ExportService()
+export_store = ContentAddressedExportStore(create_storage_backend())
+export_service = ExportService(store=export_store)
 
-# Create database tables (only in development)
-if os.getenv("ENVIRONMENT", "development") == "development":
-    Base.metadata.create_all(bind=engine)
-    # Import search models to ensure they're created
-    from search_models import SearchResult, SearchCandidate
+# Import search models so the schema check sees every table
+from search_models import SearchResult, SearchCandidate, CandidateProfile
+
+# Apply schema migrations when the app starts (development default); production
+# deploys run `python -m migrations upgrade` before the app starts
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", str(os.getenv("ENVIRONMENT", "development") == "development")).lower() == "true"
+
+# SQLite has one write lock per database: route history saves through the
+# write-behind queue's single writer while searches keep reading concurrently
+if engine.dialect.name == "sqlite" and SQLITE_TUNED:
+    history_writer.use_single_writer()
+
+def prepare_database():
+    """Migrations, schema check, compression dictionaries and history partitions - at startup, never on import"""
+    if AUTO_MIGRATE:
+        migrations.upgrade(engine)
+    migrations.check_schema(engine, Base.metadata)
+    # Compression dictionaries for the compressed history columns, before any request needs them
+    column_codec.load()
+    # Monthly history partitions for the coming months (PostgreSQL); purge_search_history.py tops them up daily
+    try:
+        ensure_history_partitions(engine)
+    except Exception as e:
+        print(f"⚠️  History partitions not checked: {str(e).splitlines()[0]}")
+
+@app.on_event("startup")
+async def start_database():
+    await run_in_threadpool(prepare_database)
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # Started per worker: threads do not survive gunicorn's preload fork
+    export_store.start_gc()
+    replica_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    export_store.stop_gc()
+    # Queued history saves must reach the database before the worker exits
+    await run_in_threadpool(history_writer.close)
+    password_hasher.close()
+    await replica_monitor.stop()
+    await async_engine.dispose()
+    if replica_async_engine is not None:
+        await replica_async_engine.dispose()
 
 # Include authentication router (lazy loading)
 app.include_router(auth_router)
 
+# Overall time budget for one search - keep it below gunicorn's worker timeout
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "90"))
+# Slice of the budget held back from Harvest/Gemini for export and history persistence
+SEARCH_PERSIST_RESERVE_SECONDS = float(os.getenv("SEARCH_PERSIST_RESERVE_SECONDS", "3"))
+# The CSV export is skipped when less than this is left of the budget (saved searches stay downloadable)
+SEARCH_EXPORT_MIN_SECONDS = float(os.getenv("SEARCH_EXPORT_MIN_SECONDS", "1"))
+
+def get_search_deadline(criteria: SearchCriteria, request: Request) -> Deadline:
+    """Per-request deadline from X-Request-Timeout (seconds) or criteria, capped at the server budget"""
+    budget = SEARCH_DEADLINE_SECONDS
+    requested = [criteria.time_budget_seconds]
+    
+    header_value = request.headers.get("X-Request-Timeout")
+    if header_value:
+        try:
+            requested.append(float(header_value))
+        except ValueError:
+            print(f"⚠️  Ignoring invalid X-Request-Timeout header: {header_value}")
+    
+    for value in requested:
+        if value and value > 0:
+            budget = min(budget, value)
+    
+    return Deadline(budget)
+
+# How often an in-flight search checks whether its client went away
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.5"))
+
+def _bearer_email(request: Request) -> Optional[str]:
+    """Email in a valid Bearer token, or None - checks the JWT only, no database lookup"""
+    from auth_service import AuthService
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return AuthService(None).verify_token(auth_header.split(" ")[1])
+
+async def cancel_on_disconnect(request: Request, token: CancellationToken):
+    """Trip the search's cancellation token as soon as the client disconnects"""
+    while not token.cancelled:
+        if await request.is_disconnected():
+            print("🔌 Client disconnected - cancelling search")
+            token.cancel("client_disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
 @app.get("/")
 async def root():
     """Welcome message"""
@@ -97,6 +198,7 @@ async def root():
         "endpoints": {
             "search": "/search",
             "health": "/health", 
+            "metrics": "/metrics",
             "docs": "/docs",
             "auth": "/auth"
         },
@@ -124,11 +226,25 @@ async def search_founders(criteria: SearchCriteria, request: Request):
     Main search endpoint - this is where the magic happens!
     
     Takes search criteria and returns ranked candidates
+    
+    Signed-in clients may pass X-Search-Id to be able to cancel the search via
+    POST /search/{search_id}/cancel; a client disconnect cancels it too.
     """
     
+    search_id = request.headers.get("X-Search-Id") or uuid.uuid4().hex
+    cancel_token = search_registry.register(search_id, owner=_bearer_email(request))
+    if cancel_token is None:
+        return {"success": False, "error": "A search with this X-Search-Id is already running"}
+    disconnect_watcher = asyncio.create_task(cancel_on_disconnect(request, cancel_token))
+    
     try:
+        deadline = get_search_deadline(criteria, request)
+        # Upstream calls must finish early enough to leave time for export and persistence
+        analysis_deadline = deadline.reserve(SEARCH_PERSIST_RESERVE_SECONDS)
+        
         print(f"🔍 SEARCH REQUEST RECEIVED")
         print(f"📋 Criteria: {criteria}")
+        print(f"⏱️  Time budget: {deadline.budget:.1f}s")
         
         # Step 1: Search LinkedIn profiles using Harvest  
         # Build smarter query to avoid over-filtering
@@ -152,7 +268,11 @@ async def search_founders(criteria: SearchCriteria, request: Request):
         print(f"📊 Requested max_results: {criteria.max_results}")
         print(f"📋 Original criteria: Industry={criteria.industry}, Founder signals={len(criteria.founder_signals)}, Technical signals={len(criteria.technical_signals)}")
         
-        profiles = harvest_client.search_profiles(query, criteria.max_results, criteria=criteria.dict())
+        # Blocking pipeline stages run in the threadpool so the disconnect watcher keeps running
+        profiles = await run_in_threadpool(
+            harvest_client.search_profiles, query, criteria.max_results,
+            criteria=criteria.dict(), deadline=analysis_deadline, cancel_token=cancel_token
+        )
         print(f"📋 Harvest API returned {len(profiles)} profiles (requested: {criteria.max_results})")
         
         # Determine if we're hitting LinkedIn's Commercial Use Limit
@@ -172,6 +292,25 @@ async def search_founders(criteria: SearchCriteria, request: Request):
             print(f"   - Harvest API rate limits")
             print(f"   - Search criteria too specific")
         
+        if len(profiles) == 0 and analysis_deadline.expired():
+            print(f"⏱️  Time budget ran out before any profiles were fetched")
+            return {
+                "success": True,
+                "candidates": [],
+                "summary": {"total_candidates": 0, "tier_distribution": {"A": 0, "B": 0, "C": 0}},
+                "export_path": None,
+                "search_query": query,
+                "search_id": search_id,
+                "message": f"The {deadline.budget:g}s time budget ran out before any profiles were fetched. Try again with a larger budget.",
+                "partial": True,
+                "deadline": {
+                    "budget_seconds": deadline.budget,
+                    "elapsed_seconds": round(deadline.elapsed(), 3),
+                    "rule_based_fallbacks": 0,
+                    "harvest": "deadline_exceeded"
+                }
+            }
+        
         if len(profiles) == 0:
             print(f"❌ No profiles found! Check your criteria or API connectivity")
             return {
@@ -188,18 +327,23 @@ async def search_founders(criteria: SearchCriteria, request: Request):
         candidates = []
         real_profiles_count = len(profiles)
         
-        for i, profile in enumerate(profiles):
+        # Analyses run concurrently; the adaptive Gemini limiter sets the pace
+        print(f"🤖 Analyzing {len(profiles)} profiles (Gemini concurrency limit: {gemini_limiter.limit})")
+        analyses = await run_in_threadpool(
+            ai_analyzer.analyze_candidates, profiles, criteria.dict(),
+            deadline=analysis_deadline, cancel_token=cancel_token
+        )
+        deadline_fallbacks = sum(1 for analysis in analyses if analysis.get('fallback_reason') == 'deadline_exceeded')
+        if deadline_fallbacks:
+            print(f"⏱️  Time budget ran out: {deadline_fallbacks}/{len(analyses)} candidates scored by rules instead of Gemini")
+        
+        for i, (profile, analysis) in enumerate(zip(profiles, analyses)):
             # Preserve original data source from harvest client
             original_data_source = profile.get('data_source', 'unknown')
             is_real_data = original_data_source == 'linkedin_real'
             
             profile_label = "[REAL LINKEDIN DATA]" if is_real_data else "[MOCK DATA]" 
-            print(f"🤖 Analyzing {i+1}/{len(profiles)}: {profile.get('name', 'Unknown')} {profile_label}")
-            
-            analysis = ai_analyzer.analyze_candidate(
-                profile, 
-                criteria.dict()
-            )
+            print(f"🤖 Analyzed {i+1}/{len(profiles)}: {profile.get('name', 'Unknown')} {profile_label} - Tier {analysis.get('tier', '?')}")
             
             # Preserve and enhance data source information
             analysis['data_source'] = original_data_source
@@ -225,11 +369,18 @@ async def search_founders(criteria: SearchCriteria, request: Request):
         tier_order = {"A": 1, "B": 2, "C": 3}
         candidates.sort(key=lambda x: tier_order.get(x.get("tier", "C"), 3))
         
-        # Step 4: Export to CSV
-        print(f"📁 About to export {len(candidates)} candidates to CSV...")
-        csv_path = export_service.export_to_csv(candidates)
-        print(f"📁 CSV export completed. File saved at: {csv_path}")
-        print(f"📁 CSV file exists: {os.path.exists(csv_path)}")
+        # Nobody is waiting for this result any more - skip export and persistence
+        cancel_token.raise_if_cancelled()
+        
+        # Step 4: Export to CSV, unless the budget is spent - persistence comes first
+        if deadline.remaining() >= SEARCH_EXPORT_MIN_SECONDS:
+            print(f"📁 About to export {len(candidates)} candidates to CSV...")
+            csv_path = await run_in_threadpool(export_service.export_to_csv, candidates)
+            print(f"📁 CSV export completed. Stored as: {csv_path}")
+        else:
+            print(f"⏱️  {deadline.remaining():.2f}s left of the time budget - skipping CSV export")
+            search_registry.record_export_skipped()
+            csv_path = None
         
         summary = export_service.get_export_summary(candidates)
         
@@ -240,8 +391,18 @@ async def search_founders(criteria: SearchCriteria, request: Request):
             "candidates": candidates,
             "summary": summary,
             "export_path": csv_path,
+            "export_url": export_service.download_url(csv_path) if csv_path else None,
             "search_query": query,
-            "message": f"Successfully analyzed {len(candidates)} candidates",
+            "search_id": search_id,
+            "message": f"Successfully analyzed {len(candidates)} candidates" if not deadline_fallbacks else
+                       f"Analyzed {len(candidates)} candidates ({deadline_fallbacks} scored by rules after the {deadline.budget:g}s time budget ran out)",
+            "partial": deadline_fallbacks > 0 or csv_path is None,
+            "deadline": {
+                "budget_seconds": deadline.budget,
+                "elapsed_seconds": round(deadline.elapsed(), 3),
+                "rule_based_fallbacks": deadline_fallbacks,
+                "export_skipped": csv_path is None
+            },
             "data_sources": data_explanation,
             "harvest_api_status": "working_correctly",
             "linkedin_limitation_info": {
@@ -260,106 +421,277 @@ async def search_founders(criteria: SearchCriteria, request: Request):
         print(f"📤 Sending response with {len(candidates)} candidates")
         
         # Save search results to database if user is authenticated
+        cancel_token.raise_if_cancelled()
         try:
-            from auth_service import AuthService
-            from database import get_db
-            from search_history_service import SearchHistoryService
+            from auth_service import AsyncAuthService
+            from database import AsyncSessionLocal
+            from search_history_service import AsyncSearchHistoryService
             
             # Extract token from Authorization header
             auth_header = request.headers.get("Authorization")
             if auth_header and auth_header.startswith("Bearer "):
                 token = auth_header.split(" ")[1]
                 
-                db = next(get_db())
-                auth_service = AuthService(db)
-                
-                # Verify token and get user
-                email = auth_service.verify_token(token)
-                if email:
-                    user = auth_service.get_user_by_email(email)
-                    if user:
+                async with AsyncSessionLocal() as db:
+                    auth_service = AsyncAuthService(db)
+                    
+                    # Verify token and get user
+                    email = auth_service.verify_token(token)
+                    user = await auth_service.get_user_by_email(email) if email else None
+                    if user and not history_writer.enabled:
                         # Save search results
-                        search_history_service = SearchHistoryService(db)
-                        saved_result = search_history_service.save_search_result(
+                        saved_result_id = (await AsyncSearchHistoryService(db).save_search_result(
                             user_id=user.id,
                             search_criteria=criteria.dict(),
-                            search_response=response
-                        )
-                        print(f"💾 Search results saved to database with ID: {saved_result.id}")
-                        response["search_result_id"] = saved_result.id
+                            search_response=response,
+                            deadline=deadline
+                        )).id
+                
+                if user and history_writer.enabled:
+                    # Batched with other searches; the queue writes on its own connection
+                    future = await run_in_threadpool(history_writer.submit, user.id, criteria.dict(), response)
+                    saved_result_id = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(future)),
+                        timeout=deadline.timeout()
+                    )
+                if user:
+                    print(f"💾 Search results saved to database with ID: {saved_result_id}")
+                    response["search_result_id"] = saved_result_id
+                    response["download_url"] = f"/download/search/{saved_result_id}?format=csv"
                 
+        except asyncio.TimeoutError:
+            # Still queued - it will be written, but we cannot wait past the deadline for its id
+            print(f"⏱️  History save still queued at the deadline - responding without search_result_id")
         except Exception as save_error:
             print(f"⚠️  Could not save search results: {save_error}")
             # Continue without saving - this is not critical
         
         return response
         
+    except SearchCancelled as cancelled:
+        print(f"🛑 Search {search_id} cancelled ({cancelled.reason}) - skipped remaining work, export and persistence")
+        search_registry.record_cancelled(cancelled.reason, analyses_skipped=cancelled.analyses_skipped)
+        return {
+            "success": False,
+            "cancelled": True,
+            "search_id": search_id,
+            "error": f"Search cancelled: {cancelled.reason}"
+        }
+        
     except Exception as e:
         print(f"❌ Search error: {e}")
         print(f"❌ Error type: {type(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        disconnect_watcher.cancel()
+        search_registry.unregister(search_id)
 
-@app.get("/download/{filename:path}")
-async def download_export(filename: str):
-    """Download exported CSV files"""
+@app.post("/search/{search_id}/cancel")
+async def cancel_search(search_id: str, request: Request):
+    """
+    Cancel an in-flight search the current user started with the given X-Search-Id.
+    Searches are tracked per worker process, so "unknown_search" can also mean the
+    search runs in another worker - disconnecting is the reliable way to cancel.
+    """
+    email = _bearer_email(request)
+    if not email:
+        return {"success": False, "error": "Authentication required"}
+    if search_registry.cancel(search_id, owner=email):
+        return {"success": True, "status": "cancelling", "message": f"Search {search_id} is being cancelled"}
+    return {
+        "success": False,
+        "status": "unknown_search",
+        "error": "No in-flight search of yours with this id in this worker"
+    }
+
+# Streaming export formats for stored search results
+STREAM_EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+def _check_export_format(format: str):
+    if format not in STREAM_EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use one of: {', '.join(STREAM_EXPORT_FORMATS)}")
+    if format == "parquet" and CANDIDATE_ARROW_SCHEMA is None:
+        raise HTTPException(status_code=501, detail="Parquet export needs pyarrow installed on the server")
+
+def _stream_export_response(format: str, rows_for, filename: str) -> StreamingResponse:
+    """
+    Stream rows_for(service) in the requested format. The streaming session
+    lives exactly as long as the response body.
+    """
+    from database import SessionLocal
+    from search_history_service import SearchHistoryService
+    
+    media_type, extension = STREAM_EXPORT_FORMATS[format]
+    
+    def generate():
+        stream_db = SessionLocal()
+        try:
+            rows = rows_for(SearchHistoryService(stream_db))
+            if format == "ndjson":
+                yield from export_service.stream_ndjson(rows)
+            elif format == "parquet":
+                yield from export_service.stream_parquet(rows)
+            else:
+                yield from export_service.stream_csv(rows)
+        finally:
+            stream_db.close()
+    
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+@app.get("/download/search/{search_id}")
+async def download_search_export(search_id: int, request: Request, format: str = "csv"):
+    """
+    Stream a saved search's candidates as CSV, NDJSON or Parquet, generated on
+    the fly from the stored rows - no file is written and memory stays bounded
+    """
+    from auth_service import AsyncAuthService
+    from database import AsyncSessionLocal
+    from search_history_service import AsyncSearchHistoryService
+    
+    _check_export_format(format)
+    
+    # Extract token from Authorization header
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    token = auth_header.split(" ")[1]
+    
+    async with AsyncSessionLocal() as db:
+        auth_service = AsyncAuthService(db)
+        
+        # Verify token and get user
+        email = auth_service.verify_token(token)
+        user = await auth_service.get_user_by_email(email) if email else None
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        search_result = await AsyncSearchHistoryService(db).get_search_result_by_id(search_id, user.id)
+        if not search_result:
+            raise HTTPException(status_code=404, detail="Search result not found")
+    
+    print(f"📤 Streaming {format.upper()} export for search {search_id}")
+    return _stream_export_response(
+        format,
+        lambda service: service.iter_candidate_rows(search_id),
+        f"founder_candidates_search_{search_id}"
+    )
+
+@app.get("/download/history")
+async def download_history_export(request: Request, format: str = "parquet"):
+    """Stream every candidate from the user's whole search history (Parquet by default, for analytics)"""
+    from auth_service import AsyncAuthService
+    from database import AsyncSessionLocal
+    
+    _check_export_format(format)
+    
+    # Extract token from Authorization header
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    token = auth_header.split(" ")[1]
     
-    print(f"📥 Download requested for: '{filename}'")
+    async with AsyncSessionLocal() as db:
+        auth_service = AsyncAuthService(db)
+        
+        # Verify token and get user
+        email = auth_service.verify_token(token)
+        user = await auth_service.get_user_by_email(email) if email else None
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        user_id = user.id
+    
+    print(f"📤 Streaming {format.upper()} history export for user {user_id}")
+    return _stream_export_response(
+        format,
+        lambda service: service.iter_user_candidate_rows(user_id),
+        f"founder_candidates_history_{datetime.now().strftime('%Y%m%d')}"
+    )
+
+# Content-addressed exports never change under their name; local files are revalidated by ETag
+IMMUTABLE_EXPORT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+LOCAL_EXPORT_CACHE_CONTROL = "private, no-cache"
+
+@app.get("/download/{filename:path}")
+async def download_export(filename: str, request: Request, expires: str = "", signature: str = ""):
+    """Download exported CSV files (ETag revalidation and byte ranges supported)"""
     
     # Clean up the filename - remove any duplicate 'exports/' prefixes
     clean_filename = filename.replace('exports/', '')
-    if clean_filename.startswith('exports/'):
-        clean_filename = clean_filename[8:]  # Remove second 'exports/'
+    print(f"📥 Download requested for: '{clean_filename}'")
     
-    # Build the correct file path
-    file_path = os.path.join("exports", clean_filename)
+    entry = await run_in_threadpool(export_service.lookup, clean_filename)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"File not found: {clean_filename}")
     
-    print(f"📁 Cleaned filename: '{clean_filename}'")
-    print(f"📂 Looking for file at: '{file_path}'")
-    print(f"📂 Current working directory: {os.getcwd()}")
-    print(f"📂 File exists check: {os.path.exists(file_path)}")
+    # Content-addressed exports are only served with a valid signed token
+    if entry.stored and not export_store.verify_signature(entry.location, expires, signature):
+        raise HTTPException(status_code=403, detail="Download link is missing, invalid or expired")
     
-    # List all files in exports directory for debugging
-    exports_dir = "exports"
-    if os.path.exists(exports_dir):
-        try:
-            available_files = os.listdir(exports_dir)
-            print(f"📂 Available files in {exports_dir}/: {available_files}")
-        except Exception as e:
-            print(f"❌ Error listing exports directory: {e}")
-    else:
-        print(f"❌ Exports directory does not exist!")
-        # Try to create it
+    if entry.stored:
+        # GCS serves the object (and its byte ranges) itself
+        direct_url = await run_in_threadpool(export_store.direct_url, entry.location, clean_filename)
+        if direct_url:
+            return RedirectResponse(direct_url, status_code=307)
+    
+    headers = {
+        "ETag": entry.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": IMMUTABLE_EXPORT_CACHE_CONTROL if entry.stored else LOCAL_EXPORT_CACHE_CONTROL
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    
+    # If-Range: only honour the range if the client's copy is still current
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == entry.etag:
         try:
-            os.makedirs(exports_dir, exist_ok=True)
-            print(f"✅ Created exports directory")
-        except Exception as e:
-            print(f"❌ Could not create exports directory: {e}")
-    
-    # Check if file exists with absolute path
-    abs_file_path = os.path.abspath(file_path)
-    print(f"📂 Absolute file path: {abs_file_path}")
-    print(f"📂 Absolute path exists: {os.path.exists(abs_file_path)}")
-    
-    if not os.path.exists(file_path):
-        error_msg = f"File not found: {file_path}"
-        if os.path.exists(exports_dir):
-            available_files = os.listdir(exports_dir)
-            error_msg += f". Available files: {available_files}"
-        
-        print(f"❌ {error_msg}")
-        raise HTTPException(status_code=404, detail=error_msg)
-    
-    # Extract just the filename for download
-    actual_filename = os.path.basename(file_path)
-    print(f"📤 Serving file: {actual_filename}")
-    
-    return FileResponse(
-        file_path,
-        media_type="text/csv",
-        filename=actual_filename
-    )
+            byte_range = parse_byte_range(request.headers.get("range"), entry.size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{entry.size}"})
+    start, end = byte_range or (0, entry.size - 1)
+    
+    try:
+        body = await run_in_threadpool(export_service.open_export, entry, start, end)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"File not found: {clean_filename}")
+    
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = f'attachment; filename="{clean_filename}"'
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+    
+    print(f"📤 Serving {clean_filename} ({'bytes ' + str(start) + '-' + str(end) if byte_range else str(entry.size) + ' bytes'})")
+    return StreamingResponse(body, status_code=206 if byte_range else 200, media_type="text/csv", headers=headers)
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for outbound traffic control"""
+    return {
+        "gemini_limiter": gemini_limiter.snapshot(),
+        "gemini_circuit_breaker": gemini_breaker.snapshot(),
+        "gemini_hedging": ai_analyzer.hedging_snapshot(),
+        "search_cancellation": search_registry.snapshot(),
+        "export_store": export_store.snapshot(),
+        "export_index": export_service.index.snapshot(),
+        "history_write_behind": history_writer.snapshot(),
+        "read_replica": replica_monitor.snapshot(),
+        "column_compression": column_codec.snapshot(),
+        "password_hashing": password_hasher.snapshot()
+    }
 
 # Add a test endpoint for frontend debugging
 @app.get("/test-connection")
@@ -377,14 +709,14 @@ async def init_database():
     try:
         from database import engine, Base
         from auth_models import User
-        from search_models import SearchResult, SearchCandidate
+        from search_models import SearchResult, SearchCandidate, CandidateProfile
         
         # Import all models to ensure they're registered with Base
         print("🔧 Importing models...")
         
-        # Create all tables
-        print("🔧 Creating tables...")
-        Base.metadata.create_all(bind=engine)
+        # Apply pending schema migrations
+        print("🔧 Applying migrations...")
+        migrations.upgrade(engine)
         
         # Verify tables were created by checking if they exist
         print("🔧 Verifying tables...")
@@ -436,9 +768,9 @@ async def init_database():
 async def create_test_user_endpoint():
     """Create a default test user for easy access"""
     try:
-        from auth_service import AuthService
+        from auth_service import AsyncAuthService
         from auth_models import UserCreate
-        from database import get_db
+        from database import AsyncSessionLocal
         
         # Test user credentials
         test_user_data = UserCreate(
@@ -450,34 +782,34 @@ async def create_test_user_endpoint():
         )
         
         # Get database session
-        db = next(get_db())
-        auth_service = AuthService(db)
-        
-        # Check if test user already exists
-        existing_user = auth_service.get_user_by_email(test_user_data.email)
-        if existing_user:
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Check if test user already exists
+            existing_user = await auth_service.get_user_by_email(test_user_data.email)
+            if existing_user:
+                return {
+                    "success": True,
+                    "message": "Test user already exists!",
+                    "credentials": {
+                        "email": "test@founder-sourcing.com",
+                        "password": "TestPassword123!"
+                    }
+                }
+            
+            # Create test user
+            user = await auth_service.create_user(test_user_data)
+            
             return {
                 "success": True,
-                "message": "Test user already exists!",
+                "message": "Test user created successfully!",
                 "credentials": {
                     "email": "test@founder-sourcing.com",
                     "password": "TestPassword123!"
-                }
+                },
+                "user_id": user.id
             }
         
-        # Create test user
-        user = auth_service.create_user(test_user_data)
-        
-        return {
-            "success": True,
-            "message": "Test user created successfully!",
-            "credentials": {
-                "email": "test@founder-sourcing.com",
-                "password": "TestPassword123!"
-            },
-            "user_id": user.id
-        }
-        
     except Exception as e:
         return {
             "success": False,
@@ -486,12 +818,12 @@ async def create_test_user_endpoint():
         }
 
 @app.get("/search-history")
-async def get_search_history(request: Request):
-    """Get search history for the current user"""
+async def get_search_history(request: Request, after: Optional[str] = None, limit: int = 20):
+    """Get search history for the current user, newest first (?after=<next_cursor> for older pages)"""
     try:
-        from auth_service import AuthService
-        from database import get_db
-        from search_history_service import SearchHistoryService
+        from auth_service import AsyncAuthService
+        from database import ReadSessionLocal, use_primary
+        from search_history_service import AsyncSearchHistoryService
         
         # Extract token from Authorization header
         auth_header = request.headers.get("Authorization")
@@ -500,38 +832,52 @@ async def get_search_history(request: Request):
         
         token = auth_header.split(" ")[1]
         
-        db = next(get_db())
-        auth_service = AuthService(db)
-        
-        # Verify token and get user
-        email = auth_service.verify_token(token)
-        if not email:
-            return {"success": False, "error": "Invalid token"}
-        
-        user = auth_service.get_user_by_email(email)
-        if not user:
-            return {"success": False, "error": "User not found"}
-        
-        search_history_service = SearchHistoryService(db)
-        history = search_history_service.get_user_search_history(user.id)
-        
-        # Convert to JSON-serializable format
-        history_data = []
-        for result in history:
-            history_data.append({
-                "id": result.id,
-                "search_query": result.search_query,
-                "industry": result.industry,
-                "total_candidates": result.total_candidates,
-                "tier_distribution": result.tier_distribution,
-                "created_at": result.created_at.isoformat(),
-                "csv_filename": result.csv_filename
-            })
-        
-        return {
-            "success": True,
-            "history": history_data
-        }
+        async with ReadSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user and use_primary(db):
+                # Signed up after the replica's last sync
+                user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            if replica_monitor.deleted_recently(user.id):
+                # The replica may still have the searches this user just deleted
+                use_primary(db)
+            
+            search_history_service = AsyncSearchHistoryService(db)
+            try:
+                history, next_cursor = await search_history_service.get_user_search_history_page(user.id, limit=limit, after=after)
+            except ValueError as cursor_error:
+                return {"success": False, "error": str(cursor_error)}
+            
+            # Convert to JSON-serializable format
+            history_data = []
+            for result in history:
+                history_data.append({
+                    "id": result.id,
+                    "search_query": result.search_query,
+                    "industry": result.industry,
+                    "total_candidates": result.total_candidates,
+                    "tier_distribution": result.tier_distribution,
+                    "created_at": result.created_at.isoformat(),
+                    "csv_filename": result.csv_filename
+                })
+            
+            return {
+                "success": True,
+                "history": history_data,
+                "page": {
+                    "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }
         
     except Exception as e:
         return {
@@ -540,12 +886,17 @@ async def get_search_history(request: Request):
         }
 
 @app.get("/search-history/{search_id}")
-async def get_search_result(search_id: int, request: Request):
-    """Get a specific search result with candidates"""
+async def get_search_result(search_id: int, request: Request, after: Optional[str] = None,
+                            limit: int = DEFAULT_PAGE_SIZE, tier: Optional[str] = None):
+    """
+    Get a specific search result with one page of its candidates (best tier
+    and confidence first). Pass the returned next_cursor as ?after= for the
+    next page; ?tier=A or ?tier=A,B filters in the database.
+    """
     try:
-        from auth_service import AuthService
-        from database import get_db
-        from search_history_service import SearchHistoryService
+        from auth_service import AsyncAuthService
+        from database import ReadSessionLocal, use_primary
+        from search_history_service import AsyncSearchHistoryService
         
         # Extract token from Authorization header
         auth_header = request.headers.get("Authorization")
@@ -554,59 +905,62 @@ async def get_search_result(search_id: int, request: Request):
         
         token = auth_header.split(" ")[1]
         
-        db = next(get_db())
-        auth_service = AuthService(db)
-        
-        # Verify token and get user
-        email = auth_service.verify_token(token)
-        if not email:
-            return {"success": False, "error": "Invalid token"}
-        
-        user = auth_service.get_user_by_email(email)
-        if not user:
-            return {"success": False, "error": "User not found"}
-        
-        search_history_service = SearchHistoryService(db)
-        search_result = search_history_service.get_search_result_by_id(search_id, user.id)
-        
-        if not search_result:
-            return {"success": False, "error": "Search result not found"}
-        
-        # Convert candidates to JSON-serializable format
-        candidates_data = []
-        for candidate in search_result.candidates:
-            candidates_data.append({
-                "name": candidate.name,
-                "linkedin_url": candidate.linkedin_url,
-                "email": candidate.email,
-                "current_company": candidate.current_company,
-                "current_role": candidate.current_role,
-                "tier": candidate.tier,
-                "profile_type": candidate.profile_type,
-                "summary": candidate.summary,
-                "match_justification": candidate.match_justification,
-                "confidence_score": candidate.confidence_score,
-                "contacts": candidate.contacts,
-                "source_links": candidate.source_links,
-                "data_source": candidate.data_source,
-                "source_note": candidate.source_note
-            })
-        
-        return {
-            "success": True,
-            "search_result": {
-                "id": search_result.id,
-                "search_query": search_result.search_query,
-                "search_criteria": search_result.search_criteria,
-                "industry": search_result.industry,
-                "total_candidates": search_result.total_candidates,
-                "tier_distribution": search_result.tier_distribution,
-                "profile_distribution": search_result.profile_distribution,
-                "created_at": search_result.created_at.isoformat(),
-                "csv_filename": search_result.csv_filename,
-                "candidates": candidates_data
+        async with ReadSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user and use_primary(db):
+                # Signed up after the replica's last sync
+                user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            if replica_monitor.deleted_recently(user.id):
+                # The replica may still have the searches this user just deleted
+                use_primary(db)
+            
+            search_history_service = AsyncSearchHistoryService(db)
+            search_result = await search_history_service.get_search_result_by_id(search_id, user.id)
+            if not search_result and use_primary(db):
+                # Saved after the replica's last sync
+                search_result = await search_history_service.get_search_result_by_id(search_id, user.id)
+            
+            if not search_result:
+                return {"success": False, "error": "Search result not found"}
+            
+            tiers = [t.strip().upper() for t in tier.split(",") if t.strip()] if tier else None
+            try:
+                candidates_data, next_cursor = await search_history_service.get_candidate_page(
+                    search_result.id, limit=limit, after=after, tiers=tiers
+                )
+            except ValueError as cursor_error:
+                return {"success": False, "error": str(cursor_error)}
+            
+            return {
+                "success": True,
+                "search_result": {
+                    "id": search_result.id,
+                    "search_query": search_result.search_query,
+                    "search_criteria": search_result.search_criteria,
+                    "industry": search_result.industry,
+                    "total_candidates": search_result.total_candidates,
+                    "tier_distribution": search_result.tier_distribution,
+                    "profile_distribution": search_result.profile_distribution,
+                    "created_at": search_result.created_at.isoformat(),
+                    "csv_filename": search_result.csv_filename,
+                    "candidates": candidates_data
+                },
+                "page": {
+                    "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+                    "tier": tiers,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
             }
-        }
         
     except Exception as e:
         return {
@@ -618,9 +972,9 @@ async def get_search_result(search_id: int, request: Request):
 async def delete_search_result(search_id: int, request: Request):
     """Delete a search result"""
     try:
-        from auth_service import AuthService
-        from database import get_db
-        from search_history_service import SearchHistoryService
+        from auth_service import AsyncAuthService
+        from database import AsyncSessionLocal
+        from search_history_service import AsyncSearchHistoryService
         
         # Extract token from Authorization header
         auth_header = request.headers.get("Authorization")
@@ -629,25 +983,77 @@ async def delete_search_result(search_id: int, request: Request):
         
         token = auth_header.split(" ")[1]
         
-        db = next(get_db())
-        auth_service = AuthService(db)
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            
+            search_history_service = AsyncSearchHistoryService(db)
+            success = await search_history_service.delete_search_result(search_id, user.id)
+            
+            if success:
+                replica_monitor.record_delete(user.id)
+                return {"success": True, "message": "Search result deleted"}
+            else:
+                return {"success": False, "error": "Search result not found"}
         
-        # Verify token and get user
-        email = auth_service.verify_token(token)
-        if not email:
-            return {"success": False, "error": "Invalid token"}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+# Most searches one bulk-delete request may name (delete_all has no limit)
+BULK_DELETE_MAX_SEARCHES = int(os.getenv("BULK_DELETE_MAX_SEARCHES", "1000"))
+
+@app.post("/search-history/bulk-delete")
+async def delete_search_results(delete_request: SearchHistoryDeleteRequest, request: Request):
+    """Delete many search results at once, or the whole history with delete_all"""
+    try:
+        from auth_service import AsyncAuthService
+        from database import AsyncSessionLocal
+        from search_history_service import AsyncSearchHistoryService
         
-        user = auth_service.get_user_by_email(email)
-        if not user:
-            return {"success": False, "error": "User not found"}
+        # Extract token from Authorization header
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return {"success": False, "error": "Authentication required"}
         
-        search_history_service = SearchHistoryService(db)
-        success = search_history_service.delete_search_result(search_id, user.id)
+        token = auth_header.split(" ")[1]
         
-        if success:
-            return {"success": True, "message": "Search result deleted"}
-        else:
-            return {"success": False, "error": "Search result not found"}
+        if not delete_request.delete_all:
+            if not delete_request.search_ids:
+                return {"success": False, "error": "No search ids given"}
+            if len(delete_request.search_ids) > BULK_DELETE_MAX_SEARCHES:
+                return {"success": False, "error": f"At most {BULK_DELETE_MAX_SEARCHES} searches per request"}
+        
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            
+            search_history_service = AsyncSearchHistoryService(db)
+            deleted = await search_history_service.delete_search_results(
+                user.id, None if delete_request.delete_all else list(set(delete_request.search_ids))
+            )
+            if deleted:
+                replica_monitor.record_delete(user.id)
+            
+            return {"success": True, "deleted": deleted, "message": f"Deleted {deleted} search results"}
         
     except Exception as e:
         return {
@@ -659,9 +1065,9 @@ async def delete_search_result(search_id: int, request: Request):
 async def get_search_statistics(request: Request):
     """Get search statistics for the current user"""
     try:
-        from auth_service import AuthService
-        from database import get_db
-        from search_history_service import SearchHistoryService
+        from auth_service import AsyncAuthService
+        from database import ReadSessionLocal, use_primary
+        from search_history_service import AsyncSearchHistoryService
         
         # Extract token from Authorization header
         auth_header = request.headers.get("Authorization")
@@ -670,25 +1076,134 @@ async def get_search_statistics(request: Request):
         
         token = auth_header.split(" ")[1]
         
-        db = next(get_db())
-        auth_service = AuthService(db)
+        async with ReadSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user and use_primary(db):
+                # Signed up after the replica's last sync
+                user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            if replica_monitor.deleted_recently(user.id):
+                # The replica may still have the searches this user just deleted
+                use_primary(db)
+            
+            search_history_service = AsyncSearchHistoryService(db)
+            stats = await search_history_service.get_search_statistics(user.id)
+            
+            return {
+                "success": True,
+                "statistics": stats
+            }
         
-        # Verify token and get user
-        email = auth_service.verify_token(token)
-        if not email:
-            return {"success": False, "error": "Invalid token"}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.get("/candidates/search")
+async def search_saved_candidates(request: Request, q: str = "", after: Optional[str] = None,
+                                  limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Full-text search across every candidate in the user's saved searches,
+    best match first. Words are ANDed; supports "exact phrases" and OR
+    (e.g. ?q=quantum OR INSEAD). Pass next_cursor as ?after= for more.
+    """
+    try:
+        from auth_service import AsyncAuthService
+        from database import AsyncSessionLocal
+        from search_history_service import AsyncSearchHistoryService
         
-        user = auth_service.get_user_by_email(email)
-        if not user:
-            return {"success": False, "error": "User not found"}
+        # Extract token from Authorization header
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return {"success": False, "error": "Authentication required"}
         
-        search_history_service = SearchHistoryService(db)
-        stats = search_history_service.get_search_statistics(user.id)
+        token = auth_header.split(" ")[1]
         
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            
+            if not q.strip():
+                return {"success": False, "error": "Search query is required"}
+            
+            try:
+                candidates, next_cursor = await AsyncSearchHistoryService(db).search_candidates(
+                    user.id, q, limit=limit, after=after
+                )
+            except ValueError as cursor_error:
+                return {"success": False, "error": str(cursor_error)}
+            
+            return {
+                "success": True,
+                "query": q,
+                "candidates": candidates,
+                "page": {
+                    "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }
+        
+    except Exception as e:
         return {
-            "success": True,
-            "statistics": stats
+            "success": False,
+            "error": str(e)
         }
+
+@app.get("/candidates/lookup")
+async def lookup_candidate(request: Request, linkedin_url: str = "", profile_id: Optional[str] = None):
+    """Whether the user has saved this founder before, and in which searches"""
+    try:
+        from auth_service import AsyncAuthService
+        from database import AsyncSessionLocal
+        from search_history_service import AsyncSearchHistoryService
+        
+        # Extract token from Authorization header
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return {"success": False, "error": "Authentication required"}
+        
+        token = auth_header.split(" ")[1]
+        
+        async with AsyncSessionLocal() as db:
+            auth_service = AsyncAuthService(db)
+            
+            # Verify token and get user
+            email = auth_service.verify_token(token)
+            if not email:
+                return {"success": False, "error": "Invalid token"}
+            
+            user = await auth_service.get_user_by_email(email)
+            if not user:
+                return {"success": False, "error": "User not found"}
+            
+            if not linkedin_url.strip() and not profile_id:
+                return {"success": False, "error": "linkedin_url or profile_id is required"}
+            
+            found = await AsyncSearchHistoryService(db).find_candidate(user.id, linkedin_url, profile_id)
+            return {
+                "success": True,
+                "seen": found is not None,
+                "candidate": found["candidate"] if found else None,
+                "appearances": found["appearances"] if found else []
+            }
         
     except Exception as e:
         return {
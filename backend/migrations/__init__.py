@@ -0,0 +1,171 @@
+"""
+Versioned database migrations - the single source of truth for the schema
+
+Each module in this package named vNNNN_<name>.py is one migration with an
+upgrade(connection) function. Applied versions are recorded in the
+schema_migrations table; upgrade() runs the pending ones in order, each in
+its own transaction. Migrations are written to be idempotent, so databases
+created by the old create_all() calls converge on the same schema.
+
+Usage (from backend/):
+    python -m migrations upgrade   # apply pending migrations
+    python -m migrations status    # list applied / pending versions
+    python -m migrations check     # pending migrations and index risks
+"""
+
+import importlib
+import pkgutil
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import func
+
+SCHEMA_MIGRATIONS_TABLE = "schema_migrations"
+
+# pg_advisory_lock key so concurrent deploys never run migrations twice
+_PG_LOCK_KEY = 72150043
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+_metadata = MetaData()
+schema_migrations = Table(
+    SCHEMA_MIGRATIONS_TABLE, _metadata,
+    Column("version", String(20), primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now())
+)
+
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    upgrade: Callable
+
+
+def load_migrations() -> List[Migration]:
+    """Every migration module in this package, oldest first"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(match.group(1), match.group(2), module.upgrade))
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_versions(engine: Engine) -> Dict[str, str]:
+    """{version: name} already recorded in schema_migrations"""
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(SCHEMA_MIGRATIONS_TABLE):
+            return {}
+        return dict(connection.execute(select(schema_migrations.c.version, schema_migrations.c.name)).all())
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [migration for migration in load_migrations() if migration.version not in applied]
+
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """Apply every pending migration in order; returns the ones applied"""
+    lock = None
+    if engine.dialect.name == "postgresql":
+        # Held on its own connection for the whole run (session-level lock)
+        lock = engine.connect()
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+        lock.commit()
+
+    try:
+        with engine.begin() as connection:
+            schema_migrations.create(connection, checkfirst=True)
+
+        applied = []
+        for migration in pending_migrations(engine):
+            print(f"🔄 Applying migration {migration.version} {migration.name}...")
+            start = time.monotonic()
+            with engine.begin() as connection:
+                migration.upgrade(connection)
+                connection.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+            print(f"✅ Migration {migration.version} applied in {time.monotonic() - start:.2f}s")
+            applied.append(migration)
+        return applied
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+            lock.close()
+
+
+def _indexes(connection, inspector, table_name: str) -> List[Tuple[str, tuple]]:
+    """(name, columns) for each index on the table; an expression's column is None."""
+    if connection.dialect.name != "sqlite":
+        return [(index["name"], tuple(index["column_names"])) for index in inspector.get_indexes(table_name)]
+    # SQLAlchemy skips SQLite expression indexes such as ix_search_candidates_result_tier_score
+    names = connection.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {"table": table_name}
+    ).scalars().all()
+    return [
+        (name, tuple(row.name for row in connection.execute(text(f'PRAGMA index_info("{name}")'))))
+        for name in names
+    ]
+
+
+def index_risks(engine: Engine, metadata: MetaData = None) -> List[str]:
+    """
+    Slow-query risks in the live schema: foreign keys whose first column
+    does not lead any index (joins and ON DELETE scans become sequential), and
+    indexes the models declare that the database does not have.
+    """
+    risks = []
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+
+        for table_name in sorted(tables):
+            if table_name == SCHEMA_MIGRATIONS_TABLE:
+                continue
+            leading = [tuple(inspector.get_pk_constraint(table_name).get("constrained_columns") or ())]
+            leading += [columns for _, columns in _indexes(connection, inspector, table_name)]
+            if connection.dialect.name != "sqlite":  # SQLite's are autoindexes, listed above
+                leading += [tuple(unique["column_names"]) for unique in inspector.get_unique_constraints(table_name)]
+            for foreign_key in inspector.get_foreign_keys(table_name):
+                columns = tuple(foreign_key["constrained_columns"])
+                # A composite key (search_result_id, created_at) is found through its leading column
+                if not any(index[:1] == columns[:1] for index in leading):
+                    risks.append(
+                        f"{table_name}({', '.join(columns)}) references {foreign_key['referred_table']} "
+                        f"but no index starts with it"
+                    )
+
+        if metadata is not None:
+            for table in metadata.sorted_tables:
+                if table.name not in tables:
+                    risks.append(f"table {table.name} is declared by the models but missing")
+                    continue
+                existing = {name for name, _ in _indexes(connection, inspector, table.name)}
+                for index in table.indexes:
+                    if index.name not in existing:
+                        risks.append(f"index {index.name} on {table.name} is declared by the models but missing")
+    return risks
+
+
+def check_schema(engine: Engine, metadata: MetaData = None) -> bool:
+    """Startup report: pending migrations and index risks. Returns True when clean."""
+    try:
+        pending = pending_migrations(engine)
+        risks = index_risks(engine, metadata)
+    except Exception as e:
+        print(f"⚠️  Schema check failed: {e}")
+        return False
+
+    if pending:
+        versions = ", ".join(f"{migration.version}_{migration.name}" for migration in pending)
+        print(f"⚠️  {len(pending)} pending migrations ({versions}) - run: python -m migrations upgrade")
+    for risk in risks:
+        print(f"⚠️  Slow-query risk: {risk}")
+    if not pending and not risks:
+        print("✅ Database schema is up to date")
+    return not pending and not risks
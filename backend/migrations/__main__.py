@@ -0,0 +1,36 @@
+"""
+python -m migrations upgrade|status|check (run from backend/)
+Uses DATABASE_URL like the app does.
+"""
+
+import argparse
+import sys
+
+import migrations
+from database import Base, engine
+import auth_models  # noqa: F401 - register every model for the check
+import search_models  # noqa: F401
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Database schema migrations")
+    parser.add_argument("command", choices=("upgrade", "status", "check"))
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = migrations.upgrade(engine)
+        print(f"✅ {len(applied)} migrations applied" if applied else "✅ No pending migrations")
+        return 0
+
+    if args.command == "status":
+        applied = migrations.applied_versions(engine)
+        for migration in migrations.load_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version}  {migration.name:<30} {state}")
+        return 0
+
+    return 0 if migrations.check_schema(engine, Base.metadata) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
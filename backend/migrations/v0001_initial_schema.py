@@ -0,0 +1,66 @@
+"""
+Initial schema: users, search_results and the original wide search_candidates
+(the tables create_all() used to build). Existing tables are left alone.
+"""
+
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.sql import func
+
+metadata = MetaData()
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("first_name", String, nullable=False),
+    Column("last_name", String, nullable=False),
+    Column("company", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("is_active", Boolean, default=True),
+    Column("is_verified", Boolean, default=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True))
+)
+
+search_results = Table(
+    "search_results", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("search_criteria", JSON, nullable=False),
+    Column("search_query", String(500), nullable=False),
+    Column("industry", String(100)),
+    Column("experience_depth", Integer),
+    Column("max_results", Integer),
+    Column("total_candidates", Integer),
+    Column("tier_distribution", JSON),
+    Column("profile_distribution", JSON),
+    Column("export_path", String(255)),
+    Column("csv_filename", String(255)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True))
+)
+
+search_candidates = Table(
+    "search_candidates", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("search_result_id", Integer, ForeignKey("search_results.id"), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("linkedin_url", String(500)),
+    Column("email", String(255)),
+    Column("current_company", String(255)),
+    Column("current_role", String(255)),
+    Column("tier", String(10)),
+    Column("profile_type", String(50)),
+    Column("summary", Text),
+    Column("match_justification", Text),
+    Column("confidence_score", Float),
+    Column("contacts", JSON),
+    Column("source_links", JSON),
+    Column("data_source", String(50)),
+    Column("source_note", String(255)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now())
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,27 @@
+"""
+Indexes for the history and candidate listings: (user_id, created_at, id)
+for keyset-paginated history (also covers the users FK), and for candidate
+pages (search_result_id, coalesce(tier, 'Z'), -coalesce(confidence_score, -1.0), id),
+the exact sort key of the page query (also covers the search_results FK).
+create_all() never added these to existing tables.
+"""
+
+from sqlalchemy import text
+
+# Listing columns INCLUDEd on PostgreSQL so history pages are index-only scans
+HISTORY_INCLUDE = ("search_query", "industry", "total_candidates", "tier_distribution",
+                   "profile_distribution", "csv_filename")
+
+
+def upgrade(connection):
+    include = ""
+    if connection.dialect.name == "postgresql":
+        include = f" INCLUDE ({', '.join(HISTORY_INCLUDE)})"
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_results_user_created "
+        f"ON search_results (user_id, created_at, id){include}"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_candidates_result_tier_score "
+        "ON search_candidates (search_result_id, (coalesce(tier, 'Z')), (-coalesce(confidence_score, -1.0)), id)"
+    ))
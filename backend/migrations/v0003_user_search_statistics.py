@@ -0,0 +1,57 @@
+"""
+Per-user statistics rollup, backfilled from search history. The rebuild
+also repairs rows written before this migration was tracked.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, case, delete, func, insert, select, text
+
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+search_results = Table(
+    "search_results", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer)
+)
+search_candidates = Table(
+    "search_candidates", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("search_result_id", Integer),
+    Column("tier", String(10)),
+    Column("profile_type", String(50))
+)
+
+COUNT_COLUMNS = ("total_searches", "total_candidates", "tier_a_candidates", "tier_b_candidates",
+                 "tier_c_candidates", "business_candidates", "technical_candidates")
+
+user_search_statistics = Table(
+    "user_search_statistics", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    *[Column(name, Integer, nullable=False, default=0, server_default=text("0")) for name in COUNT_COLUMNS],
+    Column("updated_at", DateTime(timezone=True), server_default=func.now())
+)
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def upgrade(connection):
+    user_search_statistics.create(connection, checkfirst=True)
+
+    candidates = search_candidates.c
+    totals = select(
+        search_results.c.user_id,
+        func.count(func.distinct(search_results.c.id)),
+        func.count(candidates.id),
+        _count(candidates.tier == "A"),
+        _count(candidates.tier == "B"),
+        _count(candidates.tier == "C"),
+        _count(candidates.profile_type == "business"),
+        _count(candidates.profile_type == "technical")
+    ).select_from(search_results)\
+        .outerjoin(search_candidates, candidates.search_result_id == search_results.c.id)\
+        .group_by(search_results.c.user_id)
+
+    connection.execute(delete(user_search_statistics))
+    connection.execute(insert(user_search_statistics).from_select(["user_id", *COUNT_COLUMNS], totals))
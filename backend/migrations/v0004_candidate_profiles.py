@@ -0,0 +1,157 @@
+"""
+Canonical candidate profiles: move the identity and contact columns of
+search_candidates into candidate_profiles, one profile per person (newest
+data wins). The per-search analysis (tier, profile_type, summary,
+match_justification, confidence_score) stays on the search_candidates rows.
+Resumable: rows are linked before any column is dropped.
+"""
+
+import sqlite3
+from typing import Dict, List, Optional
+
+from sqlalchemy import (JSON, Column, DateTime, Integer, MetaData, String, Table, Text,
+                        bindparam, inspect, insert, select, text, update)
+from sqlalchemy.sql import func
+
+from services.candidate_profiles import profile_key
+
+MIGRATION_CHUNK_ROWS = 500
+
+# Columns moved to candidate_profiles - spelled out so later changes to the service cannot rewrite this migration
+PROFILE_FIELDS = (
+    "name", "linkedin_url", "email", "current_company", "current_role",
+    "contacts", "source_links", "data_source", "source_note"
+)
+
+metadata = MetaData()
+
+candidate_profiles = Table(
+    "candidate_profiles", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("profile_key", String(500), unique=True),
+    Column("profile_id", String(100), index=True),
+    Column("name", String(255), nullable=False),
+    Column("linkedin_url", String(500)),
+    Column("email", String(255)),
+    Column("current_company", String(255)),
+    Column("current_role", String(255)),
+    Column("contacts", JSON),
+    Column("source_links", JSON),
+    Column("data_source", String(50)),
+    Column("source_note", String(255)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True))
+)
+
+
+def _legacy_search_candidates(columns: List[str]) -> Table:
+    """The pre-migration search_candidates shape, as far as the migration needs it"""
+    json_fields = ("contacts", "source_links")
+    return Table(
+        "search_candidates", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("candidate_id", Integer),
+        *[Column(field, JSON if field in json_fields else Text) for field in PROFILE_FIELDS if field in columns]
+    )
+
+
+def _drop_legacy_search_index(connection, dialect: str):
+    # The first full-text index was attached to search_candidates' text columns
+    if dialect == "sqlite":
+        for trigger in ("search_candidates_fts_ai", "search_candidates_fts_ad", "search_candidates_fts_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(text("DROP TABLE IF EXISTS search_candidates_fts"))
+    elif dialect == "postgresql":
+        connection.execute(text("ALTER TABLE search_candidates DROP COLUMN IF EXISTS search_vector"))
+
+
+def _link_unlinked_rows(connection, legacy: Table, profiles: Table) -> Dict[str, int]:
+    """Point every search_candidates row without candidate_id at a (new or existing) profile"""
+    # Pass 1: identity only - which rows are the same person, and the newest row of each
+    key_of_row: Dict[int, Optional[str]] = {}
+    newest_by_key: Dict[str, int] = {}
+    rows = connection.execute(
+        select(legacy.c.id, legacy.c.linkedin_url).where(legacy.c.candidate_id.is_(None)).order_by(legacy.c.id)
+    )
+    for row_id, linkedin_url in rows:
+        key = profile_key(linkedin_url)
+        key_of_row[row_id] = key
+        if key is not None:
+            newest_by_key[key] = row_id
+
+    # Profiles an earlier, interrupted run (or a new search) already created
+    profile_by_key: Dict[str, int] = {}
+    keys = list(newest_by_key)
+    for start in range(0, len(keys), MIGRATION_CHUNK_ROWS):
+        profile_by_key.update(connection.execute(
+            select(profiles.c.profile_key, profiles.c.id)
+            .where(profiles.c.profile_key.in_(keys[start:start + MIGRATION_CHUNK_ROWS]))
+        ).all())
+
+    # Pass 2: copy the newest row of each new person (and every unidentifiable row) into a profile
+    sources = sorted(
+        [newest for key, newest in newest_by_key.items() if key not in profile_by_key]
+        + [row_id for row_id, key in key_of_row.items() if key is None]
+    )
+    profile_by_source: Dict[int, int] = {}
+    for start in range(0, len(sources), MIGRATION_CHUNK_ROWS):
+        source_rows = connection.execute(
+            select(legacy).where(legacy.c.id.in_(sources[start:start + MIGRATION_CHUNK_ROWS])).order_by(legacy.c.id)
+        ).mappings().all()
+        values = [
+            {**{field: row[field] for field in PROFILE_FIELDS if field in row}, "profile_key": key_of_row[row["id"]]}
+            for row in source_rows
+        ]
+        new_ids = connection.execute(
+            insert(profiles).returning(profiles.c.id, sort_by_parameter_order=True), values
+        ).scalars().all()
+        profile_by_source.update(zip((row["id"] for row in source_rows), new_ids))
+
+    links = []
+    for row_id, key in key_of_row.items():
+        if key is None:
+            candidate_id = profile_by_source[row_id]
+        else:
+            candidate_id = profile_by_key.get(key) or profile_by_source[newest_by_key[key]]
+        links.append({"row_id": row_id, "new_candidate_id": candidate_id})
+
+    statement = update(legacy).where(legacy.c.id == bindparam("row_id")).values(candidate_id=bindparam("new_candidate_id"))
+    for start in range(0, len(links), MIGRATION_CHUNK_ROWS):
+        connection.execute(statement, links[start:start + MIGRATION_CHUNK_ROWS])
+    return {"rows_linked": len(links), "profiles_created": len(profile_by_source)}
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+    candidate_profiles.create(connection, checkfirst=True)
+
+    columns = [column["name"] for column in inspect(connection).get_columns("search_candidates")]
+    legacy_columns = [field for field in PROFILE_FIELDS if field in columns]
+    if "candidate_id" in columns and not legacy_columns:
+        return
+
+    if dialect == "sqlite" and sqlite3.sqlite_version_info < (3, 35, 0):
+        raise RuntimeError(f"Candidate profile migration needs SQLite 3.35+ (found {sqlite3.sqlite_version})")
+
+    _drop_legacy_search_index(connection, dialect)
+
+    if "candidate_id" not in columns:
+        connection.execute(text(
+            "ALTER TABLE search_candidates ADD COLUMN candidate_id INTEGER REFERENCES candidate_profiles(id)"
+        ))
+        columns.append("candidate_id")
+
+    result = {"rows_linked": 0, "profiles_created": 0}
+    if "linkedin_url" in columns:
+        result = _link_unlinked_rows(connection, _legacy_search_candidates(columns), candidate_profiles)
+
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_candidates_candidate_id ON search_candidates (candidate_id)"
+    ))
+    for field in legacy_columns:
+        connection.execute(text(f'ALTER TABLE search_candidates DROP COLUMN "{field}"'))
+    if dialect == "postgresql":
+        connection.execute(text("ALTER TABLE search_candidates ALTER COLUMN candidate_id SET NOT NULL"))
+
+    if result["rows_linked"]:
+        print(f"   Linked {result['rows_linked']} search candidates to {result['profiles_created']} new profiles")
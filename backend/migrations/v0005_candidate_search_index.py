@@ -0,0 +1,98 @@
+"""
+Full-text index over saved candidates (see services/candidate_search.py).
+One entry per search_candidates link: the profile's name, role and company
+plus the summary and justification written for that search, so a user only
+ever matches the analysis of their own searches.
+
+- SQLite: an external-content FTS5 table over a view that joins each link
+  to its profile, kept in sync by triggers on both tables.
+- PostgreSQL: a tsvector column with a GIN index on search_candidates. A
+  generated column cannot read the profile, so it is filled here for the
+  existing links and by SearchHistoryService afterwards.
+
+Names are spelled out here so later changes to the service cannot
+rewrite this migration.
+"""
+
+from sqlalchemy import text
+
+_COLUMNS = '"name", "current_role", "current_company", "summary", "match_justification"'
+_CONTENT_VIEW = "search_candidates_search_text"
+_PG_CONFIG = "'english'::regconfig"
+
+
+def _values(link: str, profile: str) -> str:
+    return (f'{profile}."name", {profile}."current_role", {profile}."current_company", '
+            f'{link}."summary", {link}."match_justification"')
+
+
+def _upgrade_sqlite(connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_candidates_fts'")
+    ).first()
+
+    connection.execute(text(
+        f'CREATE VIEW IF NOT EXISTS {_CONTENT_VIEW} ("id", {_COLUMNS}) AS '
+        f'SELECT sc."id", {_values("sc", "p")} '
+        f'FROM search_candidates sc JOIN candidate_profiles p ON p."id" = sc."candidate_id"'
+    ))
+    # Fails on an SQLite build without FTS5 - better at deploy time than on the first search
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS search_candidates_fts USING fts5("
+        f"{_COLUMNS}, content='{_CONTENT_VIEW}', content_rowid='id', "
+        f"tokenize='porter unicode61 remove_diacritics 2')"
+    ))
+    insert_link = (f"INSERT INTO search_candidates_fts(rowid, {_COLUMNS}) "
+                   f"SELECT new.id, {_values('new', 'p')} FROM candidate_profiles p WHERE p.id = new.candidate_id;")
+    delete_link = (f"INSERT INTO search_candidates_fts(search_candidates_fts, rowid, {_COLUMNS}) "
+                   f"SELECT 'delete', old.id, {_values('old', 'p')} FROM candidate_profiles p WHERE p.id = old.candidate_id;")
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS search_candidates_fts_ai AFTER INSERT ON search_candidates BEGIN {insert_link} END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS search_candidates_fts_ad AFTER DELETE ON search_candidates BEGIN {delete_link} END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS search_candidates_fts_au AFTER UPDATE ON search_candidates BEGIN "
+        f"{delete_link} {insert_link} END"
+    ))
+    # A profile's new name, role or company re-indexes every link to it
+    connection.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS candidate_profiles_fts_link_au '
+        f'AFTER UPDATE OF "name", "current_role", "current_company" ON candidate_profiles BEGIN '
+        f"INSERT INTO search_candidates_fts(search_candidates_fts, rowid, {_COLUMNS}) "
+        f"SELECT 'delete', sc.id, {_values('sc', 'old')} FROM search_candidates sc WHERE sc.candidate_id = old.id; "
+        f"INSERT INTO search_candidates_fts(rowid, {_COLUMNS}) "
+        f"SELECT sc.id, {_values('sc', 'new')} FROM search_candidates sc WHERE sc.candidate_id = new.id; END"
+    ))
+
+    if not exists:
+        # Index the links saved before the table existed
+        connection.execute(text("INSERT INTO search_candidates_fts(search_candidates_fts) VALUES ('rebuild')"))
+
+
+def _upgrade_postgres(connection):
+    connection.execute(text("ALTER TABLE search_candidates ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    connection.execute(text(
+        f"UPDATE search_candidates SET search_vector = "
+        f"setweight(to_tsvector({_PG_CONFIG}, coalesce(p.name, '')), 'A') || "
+        f"setweight(to_tsvector({_PG_CONFIG}, coalesce(p.\"current_role\", '') || ' ' || coalesce(p.current_company, '')), 'B') || "
+        f"setweight(to_tsvector({_PG_CONFIG}, coalesce(search_candidates.summary, '') || ' ' || "
+        f"coalesce(search_candidates.match_justification, '')), 'C') "
+        f"FROM candidate_profiles p "
+        f"WHERE p.id = search_candidates.candidate_id AND search_candidates.search_vector IS NULL"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_candidates_search_vector "
+        "ON search_candidates USING GIN (search_vector)"
+    ))
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        _upgrade_sqlite(connection)
+    elif dialect == "postgresql":
+        _upgrade_postgres(connection)
+    else:
+        print(f"⚠️  Candidate full-text search is not available on {dialect}")
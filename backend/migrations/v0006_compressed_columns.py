@@ -0,0 +1,218 @@
+"""
+Compressed storage for the large JSON / text columns (services/compression.py).
+One zstd dictionary is trained per column family from the existing rows.
+The columns are then rewritten as compressed binary:
+- search_results.search_criteria, tier_distribution and profile_distribution
+- search_candidates.summary and match_justification
+- candidate_profiles.contacts and source_links
+
+The candidate full-text index cannot read compressed text directly. On
+SQLite its content view, FTS5 table and triggers (0005) are rebuilt to
+decode the text columns with the zstd_text() SQL function. PostgreSQL's
+search_vector is already written by the application and is kept as is.
+
+Resumable: each column is filled into a temporary copy before the original
+is dropped. Run VACUUM (SQLite) or VACUUM FULL (PostgreSQL) afterwards to
+return the space the old values used.
+"""
+
+from sqlalchemy import (JSON, Column, DateTime, Integer, LargeBinary, MetaData, String, Table, Text,
+                        bindparam, inspect, select, text, update)
+from sqlalchemy.sql import func
+
+from services.compression import (COMPRESSION_MIN_BYTES, COMPRESSION_TRAIN_MAX_SAMPLES, column_codec,
+                                  dump_json, register_sqlite_functions)
+
+MIGRATION_CHUNK_ROWS = 500
+
+# (table, column, dictionary family, JSON?)
+COMPRESSED_COLUMNS = (
+    ("search_results", "search_criteria", "search_json", True),
+    ("search_results", "tier_distribution", "search_json", True),
+    ("search_results", "profile_distribution", "search_json", True),
+    ("search_candidates", "summary", "candidate_text", False),
+    ("search_candidates", "match_justification", "candidate_text", False),
+    ("candidate_profiles", "contacts", "candidate_links", True),
+    ("candidate_profiles", "source_links", "candidate_links", True),
+)
+_TEMP_SUFFIX = "__compressed"
+
+metadata = MetaData()
+
+compression_dictionaries = Table(
+    "compression_dictionaries", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("family", String(50), nullable=False, index=True),
+    Column("dictionary", LargeBinary, nullable=False),
+    Column("sample_count", Integer),
+    Column("created_at", DateTime(timezone=True), server_default=func.now())
+)
+
+# Full-text index pieces (names as in v0005)
+_FTS_COLUMNS = '"name", "current_role", "current_company", "summary", "match_justification"'
+_FTS_TRIGGERS = ("search_candidates_fts_ai", "search_candidates_fts_ad", "search_candidates_fts_au",
+                 "candidate_profiles_fts_link_au")
+_FTS_CONTENT_VIEW = "search_candidates_search_text"
+
+
+def _decoded_values(link: str, profile: str) -> str:
+    return (f'{profile}."name", {profile}."current_role", {profile}."current_company", '
+            f'zstd_text({link}."summary"), zstd_text({link}."match_justification")')
+
+
+def _plain_table(table_name: str, column: str, is_json: bool) -> Table:
+    return Table(
+        table_name, MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column(column, JSON if is_json else Text),
+        Column(column + _TEMP_SUFFIX, LargeBinary)
+    )
+
+
+def _columns(connection, table_name: str):
+    return {column["name"]: column["type"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _encode(value, is_json: bool):
+    if value is None:
+        return None
+    return dump_json(value) if is_json else value.encode("utf-8")
+
+
+def _train_dictionaries(connection):
+    """One dictionary per family from the newest uncompressed values, unless it already has one"""
+    trained = {family for (family,) in connection.execute(select(compression_dictionaries.c.family).distinct())}
+    samples = {}
+    for table_name, column, family, is_json in COMPRESSED_COLUMNS:
+        if family in trained:
+            continue
+        existing = _columns(connection, table_name)
+        if column not in existing or isinstance(existing[column], LargeBinary):
+            continue
+        plain = _plain_table(table_name, column, is_json)
+        rows = connection.execute(
+            select(plain.c[column]).where(plain.c[column].isnot(None))
+            .order_by(plain.c.id.desc()).limit(COMPRESSION_TRAIN_MAX_SAMPLES)
+        )
+        family_samples = samples.setdefault(family, [])
+        for (value,) in rows:
+            encoded = _encode(value, is_json)
+            # Values below the threshold are stored raw - they would only dilute the dictionary
+            if encoded is not None and len(encoded) >= COMPRESSION_MIN_BYTES:
+                family_samples.append(encoded)
+
+    for family, family_samples in samples.items():
+        if column_codec.train_and_store(connection, family, family_samples) is None:
+            print(f"ℹ️  No {family} dictionary yet ({len(family_samples)} samples) - "
+                  f"values compress without one until train_compression_dictionaries.py runs")
+
+
+def _compress_column(connection, table_name: str, column: str, family: str, is_json: bool):
+    existing = _columns(connection, table_name)
+    temp = column + _TEMP_SUFFIX
+    binary = LargeBinary().compile(dialect=connection.dialect)
+    if temp not in existing:
+        if column in existing and isinstance(existing[column], LargeBinary):
+            return
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{temp}" {binary}'))
+
+    if column in existing:
+        plain = _plain_table(table_name, column, is_json)
+        fill = update(plain).where(plain.c.id == bindparam("row_id")).values({temp: bindparam("value")})
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(plain.c.id, plain.c[column]).where(plain.c.id > last_id)
+                .order_by(plain.c.id).limit(MIGRATION_CHUNK_ROWS)
+            ).all()
+            if not rows:
+                break
+            connection.execute(fill, [
+                {"row_id": row_id, "value": None if value is None else column_codec.compress(family, _encode(value, is_json))}
+                for row_id, value in rows
+            ])
+            last_id = rows[-1][0]
+        connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN "{column}"'))
+
+    connection.execute(text(f'ALTER TABLE {table_name} RENAME COLUMN "{temp}" TO "{column}"'))
+    if column == "search_criteria" and connection.dialect.name == "postgresql":
+        connection.execute(text('ALTER TABLE search_results ALTER COLUMN search_criteria SET NOT NULL'))
+
+
+def drop_sqlite_search_index(connection):
+    """The triggers and the content view reference the text columns, which blocks DROP COLUMN"""
+    for trigger in _FTS_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    connection.execute(text("DROP TABLE IF EXISTS search_candidates_fts"))
+    connection.execute(text(f"DROP VIEW IF EXISTS {_FTS_CONTENT_VIEW}"))
+
+
+def create_sqlite_search_index(connection):
+    """The 0005 index over the compressed columns (needs register_sqlite_functions on the connection)"""
+    # External content for FTS5: each link with its profile's identity and its own text decoded
+    connection.execute(text(
+        f'CREATE VIEW {_FTS_CONTENT_VIEW} ("id", {_FTS_COLUMNS}) AS '
+        f'SELECT sc."id", {_decoded_values("sc", "p")} '
+        f'FROM search_candidates sc JOIN candidate_profiles p ON p."id" = sc."candidate_id"'
+    ))
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE search_candidates_fts USING fts5("
+        f"{_FTS_COLUMNS}, content='{_FTS_CONTENT_VIEW}', content_rowid='id', "
+        f"tokenize='porter unicode61 remove_diacritics 2')"
+    ))
+    insert_link = (f"INSERT INTO search_candidates_fts(rowid, {_FTS_COLUMNS}) "
+                   f"SELECT new.id, {_decoded_values('new', 'p')} FROM candidate_profiles p WHERE p.id = new.candidate_id;")
+    delete_link = (f"INSERT INTO search_candidates_fts(search_candidates_fts, rowid, {_FTS_COLUMNS}) "
+                   f"SELECT 'delete', old.id, {_decoded_values('old', 'p')} FROM candidate_profiles p WHERE p.id = old.candidate_id;")
+    connection.execute(text(
+        f"CREATE TRIGGER search_candidates_fts_ai AFTER INSERT ON search_candidates BEGIN {insert_link} END"
+    ))
+    # Also fires for the ON DELETE CASCADE from search_results (0008)
+    connection.execute(text(
+        f"CREATE TRIGGER search_candidates_fts_ad AFTER DELETE ON search_candidates BEGIN {delete_link} END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER search_candidates_fts_au AFTER UPDATE ON search_candidates BEGIN {delete_link} {insert_link} END"
+    ))
+    connection.execute(text(
+        f'CREATE TRIGGER candidate_profiles_fts_link_au AFTER UPDATE OF "name", "current_role", "current_company" '
+        f"ON candidate_profiles BEGIN "
+        f"INSERT INTO search_candidates_fts(search_candidates_fts, rowid, {_FTS_COLUMNS}) "
+        f"SELECT 'delete', sc.id, {_decoded_values('sc', 'old')} FROM search_candidates sc WHERE sc.candidate_id = old.id; "
+        f"INSERT INTO search_candidates_fts(rowid, {_FTS_COLUMNS}) "
+        f"SELECT sc.id, {_decoded_values('sc', 'new')} FROM search_candidates sc WHERE sc.candidate_id = new.id; END"
+    ))
+    connection.execute(text("INSERT INTO search_candidates_fts(search_candidates_fts) VALUES ('rebuild')"))
+
+
+def _before_postgres(connection):
+    # INCLUDEs tier_distribution / profile_distribution - recreated afterwards
+    connection.execute(text("DROP INDEX IF EXISTS ix_search_results_user_created"))
+
+
+def _after_postgres(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_search_results_user_created ON search_results (user_id, created_at, id) "
+        "INCLUDE (search_query, industry, total_candidates, tier_distribution, profile_distribution, csv_filename)"
+    ))
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+    compression_dictionaries.create(connection, checkfirst=True)
+    column_codec.load(connection)
+    _train_dictionaries(connection)
+
+    if dialect == "sqlite":
+        register_sqlite_functions(connection.connection.driver_connection)
+        drop_sqlite_search_index(connection)
+    elif dialect == "postgresql":
+        _before_postgres(connection)
+
+    for table_name, column, family, is_json in COMPRESSED_COLUMNS:
+        _compress_column(connection, table_name, column, family, is_json)
+
+    if dialect == "sqlite":
+        create_sqlite_search_index(connection)
+    elif dialect == "postgresql":
+        _after_postgres(connection)
@@ -0,0 +1,114 @@
+"""
+PostgreSQL: search_results and search_candidates become tables partitioned by
+month of created_at (services/history_retention.py), so expired history is
+dropped a partition at a time instead of row by row.
+
+- Both tables get the primary key (id, created_at); PostgreSQL requires
+  unique constraints on a partitioned table to include the partition key.
+- Links reference their search by (search_result_id, created_at). They are
+  rewritten with their search's created_at, so a search and its candidates
+  always share a month.
+- Partitions are created from the oldest search to HISTORY_PARTITIONS_AHEAD
+  months ahead, plus a DEFAULT partition for anything outside them.
+
+The rows are copied into the new tables in this migration's transaction.
+Both tables are locked while it runs.
+
+SQLite has no partitioning and is left unchanged; retention range-deletes
+there instead.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+from services.history_retention import HISTORY_PARTITIONS_AHEAD, add_months, ensure_partitions, month_start
+
+_OLD_SUFFIX = "__unpartitioned"
+
+
+def _is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar() == "p"
+
+
+def _column_names(connection, table: str):
+    return [column["name"] for column in inspect(connection).get_columns(table)]
+
+
+def _new_partitioned_table(connection, table: str):
+    """Rename table aside and create an empty partitioned copy of its columns under the old name"""
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {table}{_OLD_SUFFIX}"))
+    # INCLUDING DEFAULTS keeps id drawing from the same sequence
+    connection.execute(text(
+        f"CREATE TABLE {table} (LIKE {table}{_OLD_SUFFIX} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL"))
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                  {"table": f"{table}{_OLD_SUFFIX}"}).scalar()
+    if sequence:
+        # Otherwise dropping the old table would take the sequence with it
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+
+def upgrade(connection):
+    if connection.dialect.name != "postgresql" or _is_partitioned(connection, "search_results"):
+        return
+
+    oldest = connection.execute(text("SELECT MIN(created_at) FROM search_results")).scalar()
+    this_month = month_start(datetime.now(timezone.utc))
+    first_month = min(month_start(oldest), this_month) if oldest else this_month
+
+    # The links' foreign key to search_results goes with the old table
+    _new_partitioned_table(connection, "search_results")
+    _new_partitioned_table(connection, "search_candidates")
+    ensure_partitions(connection, first_month, add_months(this_month, HISTORY_PARTITIONS_AHEAD))
+
+    columns = _column_names(connection, "search_results")
+    values = ", ".join("COALESCE(created_at, now())" if column == "created_at" else column for column in columns)
+    connection.execute(text(
+        f"INSERT INTO search_results ({', '.join(columns)}) "
+        f"SELECT {values} FROM search_results{_OLD_SUFFIX}"
+    ))
+    columns = _column_names(connection, "search_candidates")
+    values = ", ".join("r.created_at" if column == "created_at" else f"c.{column}" for column in columns)
+    connection.execute(text(
+        f"INSERT INTO search_candidates ({', '.join(columns)}) "
+        f"SELECT {values} FROM search_candidates{_OLD_SUFFIX} c JOIN search_results r ON r.id = c.search_result_id"
+    ))
+    connection.execute(text(f"DROP TABLE search_candidates{_OLD_SUFFIX}"))
+    connection.execute(text(f"DROP TABLE search_results{_OLD_SUFFIX}"))
+
+    # Keys and indexes (names as the models and earlier migrations declared them)
+    connection.execute(text("ALTER TABLE search_results ADD CONSTRAINT search_results_pkey PRIMARY KEY (id, created_at)"))
+    connection.execute(text(
+        "ALTER TABLE search_results ADD CONSTRAINT search_results_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id)"
+    ))
+    connection.execute(text("CREATE INDEX ix_search_results_id ON search_results (id)"))
+    connection.execute(text(
+        "CREATE INDEX ix_search_results_user_created ON search_results (user_id, created_at, id) "
+        "INCLUDE (search_query, industry, total_candidates, tier_distribution, profile_distribution, csv_filename)"
+    ))
+
+    connection.execute(text(
+        "ALTER TABLE search_candidates ADD CONSTRAINT search_candidates_pkey PRIMARY KEY (id, created_at)"
+    ))
+    connection.execute(text(
+        "ALTER TABLE search_candidates ADD CONSTRAINT search_candidates_search_result_id_fkey "
+        "FOREIGN KEY (search_result_id, created_at) REFERENCES search_results (id, created_at)"
+    ))
+    connection.execute(text(
+        "ALTER TABLE search_candidates ADD CONSTRAINT search_candidates_candidate_id_fkey "
+        "FOREIGN KEY (candidate_id) REFERENCES candidate_profiles (id)"
+    ))
+    connection.execute(text("CREATE INDEX ix_search_candidates_id ON search_candidates (id)"))
+    connection.execute(text("CREATE INDEX ix_search_candidates_candidate_id ON search_candidates (candidate_id)"))
+    connection.execute(text(
+        "CREATE INDEX ix_search_candidates_result_tier_score "
+        "ON search_candidates (search_result_id, (coalesce(tier, 'Z')), (-coalesce(confidence_score, -1.0)), id)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX ix_search_candidates_search_vector ON search_candidates USING GIN (search_vector)"
+    ))
@@ -0,0 +1,90 @@
+"""
+search_candidates.search_result_id becomes ON DELETE CASCADE, so deleting a
+search is one DELETE on search_results and the database removes its
+candidate links, instead of the ORM loading and deleting them one by one.
+
+- PostgreSQL: the foreign key is re-created with ON DELETE CASCADE, on
+  (search_result_id, created_at) when the tables are partitioned (0007).
+- SQLite cannot alter a foreign key, so search_candidates is rebuilt. SQLite
+  now enforces foreign keys (database.py), so links whose search or profile
+  is already gone are not copied. Dropping the old table takes the
+  full-text triggers with it, so the 0006 index is rebuilt afterwards.
+"""
+
+from sqlalchemy import inspect, text
+
+from migrations.v0006_compressed_columns import create_sqlite_search_index, drop_sqlite_search_index
+from services.compression import register_sqlite_functions
+
+_FOREIGN_KEY = "search_candidates_search_result_id_fkey"
+_REBUILT = "search_candidates__cascade"
+
+
+def _search_result_foreign_key(connection):
+    for foreign_key in inspect(connection).get_foreign_keys("search_candidates"):
+        if foreign_key["referred_table"] == "search_results":
+            return foreign_key
+    return None
+
+
+def _upgrade_postgresql(connection, foreign_key):
+    # Partitioned tables reference their search by (search_result_id, created_at)
+    columns = ", ".join(foreign_key["constrained_columns"])
+    referred = ", ".join(foreign_key["referred_columns"])
+    connection.execute(text(f"ALTER TABLE search_candidates DROP CONSTRAINT {foreign_key['name'] or _FOREIGN_KEY}"))
+    connection.execute(text(
+        f"ALTER TABLE search_candidates ADD CONSTRAINT {_FOREIGN_KEY} "
+        f"FOREIGN KEY ({columns}) REFERENCES search_results ({referred}) ON DELETE CASCADE"
+    ))
+
+
+def _upgrade_sqlite(connection):
+    columns = ["id", "search_result_id", "candidate_id", "tier", "profile_type",
+               "summary", "match_justification", "confidence_score", "created_at"]
+
+    register_sqlite_functions(connection.connection.driver_connection)
+    drop_sqlite_search_index(connection)
+    connection.execute(text(f"DROP TABLE IF EXISTS {_REBUILT}"))
+    connection.execute(text(
+        f"CREATE TABLE {_REBUILT} ("
+        "id INTEGER NOT NULL PRIMARY KEY, "
+        "search_result_id INTEGER NOT NULL REFERENCES search_results (id) ON DELETE CASCADE, "
+        "candidate_id INTEGER NOT NULL REFERENCES candidate_profiles (id), "
+        "tier VARCHAR(10), "
+        "profile_type VARCHAR(50), "
+        "summary BLOB, "
+        "match_justification BLOB, "
+        "confidence_score FLOAT, "
+        "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP))"
+    ))
+    copied = connection.execute(text(
+        f"INSERT INTO {_REBUILT} ({', '.join(columns)}) "
+        f"SELECT {', '.join('c.' + name for name in columns)} "
+        "FROM search_candidates c "
+        "WHERE EXISTS (SELECT 1 FROM search_results r WHERE r.id = c.search_result_id) "
+        "AND EXISTS (SELECT 1 FROM candidate_profiles p WHERE p.id = c.candidate_id)"
+    )).rowcount
+    total = connection.execute(text("SELECT COUNT(*) FROM search_candidates")).scalar()
+    if copied != total:
+        print(f"⚠️  Dropped {total - copied} search_candidates rows whose search or profile no longer exists")
+
+    connection.execute(text("DROP TABLE search_candidates"))
+    connection.execute(text(f"ALTER TABLE {_REBUILT} RENAME TO search_candidates"))
+    connection.execute(text("CREATE INDEX ix_search_candidates_id ON search_candidates (id)"))
+    connection.execute(text("CREATE INDEX ix_search_candidates_candidate_id ON search_candidates (candidate_id)"))
+    connection.execute(text(
+        "CREATE INDEX ix_search_candidates_result_tier_score "
+        "ON search_candidates (search_result_id, (coalesce(tier, 'Z')), (-coalesce(confidence_score, -1.0)), id)"
+    ))
+    create_sqlite_search_index(connection)
+
+
+def upgrade(connection):
+    foreign_key = _search_result_foreign_key(connection)
+    if foreign_key is None or (foreign_key.get("options") or {}).get("ondelete", "").upper() == "CASCADE":
+        return
+
+    if connection.dialect.name == "postgresql":
+        _upgrade_postgresql(connection, foreign_key)
+    elif connection.dialect.name == "sqlite":
+        _upgrade_sqlite(connection)
@@ -28,6 +28,7 @@ class SearchCriteria(BaseModel):
     founder_signals: List[str] = []
     technical_signals: List[str] = []
     max_results: int = 10
+    time_budget_seconds: Optional[float] = None  # Overall search deadline (capped server-side)
 
 
 class Candidate(BaseModel):
@@ -38,4 +39,9 @@ class Candidate(BaseModel):
     contacts: List[str] = []
     source_links: List[str] = []
     match_justification: str
-    tier: Tier
\ No newline at end of file
+    tier: Tier
+
+class SearchHistoryDeleteRequest(BaseModel):
+    """Searches to delete from the user's history at once"""
+    search_ids: List[int] = []
+    delete_all: bool = False  # Clear the whole history (search_ids is ignored)
@@ -0,0 +1,51 @@
+"""
+Apply the search history retention policy (services/history_retention.py)
+
+Expires every month of history that ended more than HISTORY_RETENTION_DAYS
+ago: archives it to Parquet in export storage (unless
+HISTORY_ARCHIVE_EXPIRED=false), takes it out of the statistics rollups,
+then drops its partitions (PostgreSQL) or range-deletes it (SQLite).
+Also creates the next HISTORY_PARTITIONS_AHEAD months of partitions. Run it
+daily, e.g. from Cloud Scheduler or cron.
+
+Usage (from backend/):
+    python purge_search_history.py
+    python purge_search_history.py --days 365 --dry-run
+    python purge_search_history.py --no-archive
+"""
+
+import argparse
+
+from database import SessionLocal, engine
+import auth_models  # noqa: F401 - users table for the foreign keys
+from services.history_retention import (HISTORY_ARCHIVE_EXPIRED, HISTORY_RETENTION_DAYS, HistoryRetention,
+                                        ensure_history_partitions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=HISTORY_RETENTION_DAYS,
+                        help="Keep this many days of history (default HISTORY_RETENTION_DAYS; 0 keeps everything)")
+    parser.add_argument("--no-archive", action="store_true", help="Drop expired history without archiving it")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be expired")
+    args = parser.parse_args()
+
+    ensure_history_partitions(engine)
+
+    retention = HistoryRetention(engine, SessionLocal, retention_days=args.days,
+                                 archive=HISTORY_ARCHIVE_EXPIRED and not args.no_archive)
+    summary = retention.purge(dry_run=args.dry_run)
+    if not summary["enabled"]:
+        print("ℹ️  History retention is off (HISTORY_RETENTION_DAYS=0) - nothing expired")
+        return
+
+    months = ", ".join(summary["months"]) or "none"
+    if args.dry_run:
+        print(f"🔍 Searches before {summary['cutoff']} are expired; months to remove: {months}")
+        return
+    print(f"✅ Expired months: {months} - {summary['searches_deleted']} searches, "
+          f"{summary['profiles_deleted']} orphaned candidate profiles, {len(summary['archived'])} archive files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Backfill / repair the user_search_statistics rollup
+
+Recomputes every user's row (or one user's) from search_results and
+search_candidates. Migration 0003 fills the table once; run this
+whenever the statistics look out of step with a user's history.
+
+Usage (from backend/):
+    python rebuild_search_statistics.py
+    python rebuild_search_statistics.py --user-id 42
+"""
+
+import argparse
+
+from database import SessionLocal
+import auth_models  # noqa: F401 - users table for the foreign key
+from search_history_service import SearchHistoryService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user's statistics")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = SearchHistoryService(db).rebuild_search_statistics(args.user_id)
+    finally:
+        db.close()
+
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"✅ Rebuilt search statistics for {scope}: {rows} rows written")
+
+
+if __name__ == "__main__":
+    main()
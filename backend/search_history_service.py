@@ -2,69 +2,374 @@
 Service for managing search history and results
 """
 
+import base64
+import json
+from sqlalchemy import and_, case, delete, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from search_models import SearchResult, SearchCandidate
+from typing import List, Dict, Optional, Iterator, Tuple
+from search_models import (CANDIDATE_SCORE_KEY, CANDIDATE_TIER_KEY, CandidateProfile, SearchCandidate, SearchResult,
+                           UserSearchStatistics)
+from services.deadline import Deadline
+from services.candidate_search import (PG_LINK_VECTOR_UPDATE, PG_PROFILE_VECTOR_REFRESH, PROFILE_FTS_COLUMNS,
+                                      match_and_rank)
+from services.candidate_profiles import LINK_FIELDS, PROFILE_FIELDS, profile_key, profile_values
 from datetime import datetime
 
+# Page size limits for keyset-paginated listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+# Columns shown in history lists - everything except the search_criteria JSON
+_HISTORY_LIST_COLUMNS = (
+    SearchResult.id,
+    SearchResult.search_query,
+    SearchResult.industry,
+    SearchResult.total_candidates,
+    SearchResult.tier_distribution,
+    SearchResult.profile_distribution,
+    SearchResult.csv_filename,
+    SearchResult.created_at
+)
+
+# Rollup columns of user_search_statistics fed by candidate tier / profile_type
+_TIER_STATISTICS = {'A': 'tier_a_candidates', 'B': 'tier_b_candidates', 'C': 'tier_c_candidates'}
+_PROFILE_STATISTICS = {'business': 'business_candidates', 'technical': 'technical_candidates'}
+_STATISTICS_COLUMNS = ('total_searches', 'total_candidates', *_TIER_STATISTICS.values(), *_PROFILE_STATISTICS.values())
+
+def _candidate_count_columns() -> list:
+    """SQL aggregates over search_candidates matching the rollup's candidate columns"""
+    columns = [func.count(SearchCandidate.id).label('total_candidates')]
+    columns += [func.coalesce(func.sum(case((SearchCandidate.tier == tier, 1), else_=0)), 0).label(name)
+                for tier, name in _TIER_STATISTICS.items()]
+    columns += [func.coalesce(func.sum(case((SearchCandidate.profile_type == profile, 1), else_=0)), 0).label(name)
+                for profile, name in _PROFILE_STATISTICS.items()]
+    return columns
+
+def encode_cursor(values: list) -> str:
+    """Opaque keyset cursor: the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+# Cursor element types: JSON numbers decode to int or float
+_NUMBER = (int, float)
+
+def decode_cursor(cursor: str, types: Tuple) -> list:
+    """Decode a cursor, checking it holds one value of each of `types` (ValueError otherwise)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass, but never a valid cursor value
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError("Invalid cursor")
+    return values
+
 class SearchHistoryService:
     def __init__(self, db: Session):
         self.db = db
     
-    def save_search_result(self, user_id: int, search_criteria: Dict, search_response: Dict) -> SearchResult:
-        """Save a complete search result to the database"""
-        
-        # Create the search result record
-        search_result = SearchResult(
-            user_id=user_id,
-            search_criteria=search_criteria,
-            search_query=search_response.get('search_query', ''),
-            industry=search_criteria.get('industry'),
-            experience_depth=search_criteria.get('experience_depth'),
-            max_results=search_criteria.get('max_results'),
-            total_candidates=search_response.get('summary', {}).get('total_candidates', 0),
-            tier_distribution=search_response.get('summary', {}).get('tier_distribution', {}),
-            profile_distribution=search_response.get('summary', {}).get('profile_distribution', {}),
-            export_path=search_response.get('export_path', ''),
-            csv_filename=search_response.get('export_path', '').split('/')[-1] if search_response.get('export_path') else None
-        )
+    def _apply_deadline(self, deadline: Optional[Deadline]):
+        """Bound the current transaction's statements by the remaining request budget (PostgreSQL)"""
+        if deadline is None or self.db.get_bind().dialect.name != "postgresql":
+            return
+        timeout_ms = max(1, int(deadline.timeout() * 1000))
+        self.db.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+    
+    @staticmethod
+    def search_result_values(user_id: int, search_criteria: Dict, search_response: Dict) -> Dict:
+        """Column values of the SearchResult row for one completed search"""
+        summary = search_response.get('summary', {})
+        export_path = search_response.get('export_path', '')
+        return {
+            'user_id': user_id,
+            'search_criteria': search_criteria,
+            'search_query': search_response.get('search_query', ''),
+            'industry': search_criteria.get('industry'),
+            'experience_depth': search_criteria.get('experience_depth'),
+            'max_results': search_criteria.get('max_results'),
+            'total_candidates': summary.get('total_candidates', 0),
+            'tier_distribution': summary.get('tier_distribution', {}),
+            'profile_distribution': summary.get('profile_distribution', {}),
+            'export_path': export_path,
+            'csv_filename': export_path.split('/')[-1] if export_path else None
+        }
+    
+    @staticmethod
+    def candidate_rows(search_response: Dict) -> List[Dict]:
+        """Candidate data for one search: profile fields plus the per-search LINK_FIELDS"""
+        return [
+            {
+                'name': candidate_data.get('name', 'Unknown'),
+                'linkedin_url': candidate_data.get('linkedin_url'),
+                'email': candidate_data.get('email'),
+                'current_company': candidate_data.get('current_company'),
+                'current_role': candidate_data.get('current_role'),
+                'tier': candidate_data.get('tier'),
+                'profile_type': candidate_data.get('profile_type'),
+                'summary': candidate_data.get('summary'),
+                'match_justification': candidate_data.get('match_justification'),
+                'confidence_score': candidate_data.get('confidence_score'),
+                'contacts': candidate_data.get('contacts', []),
+                'source_links': candidate_data.get('source_links', []),
+                'data_source': candidate_data.get('data_source'),
+                'source_note': candidate_data.get('source_note'),
+                'profile_id': candidate_data.get('profile_id')
+            }
+            for candidate_data in search_response.get('candidates', [])
+        ]
+    
+    @staticmethod
+    def statistics_delta(candidate_rows: List[Dict], searches: int = 1) -> Dict:
+        """How saving these searches changes the user's user_search_statistics row"""
+        delta = dict.fromkeys(_STATISTICS_COLUMNS, 0)
+        delta['total_searches'] = searches
+        delta['total_candidates'] = len(candidate_rows)
+        for row in candidate_rows:
+            if row.get('tier') in _TIER_STATISTICS:
+                delta[_TIER_STATISTICS[row['tier']]] += 1
+            if row.get('profile_type') in _PROFILE_STATISTICS:
+                delta[_PROFILE_STATISTICS[row['profile_type']]] += 1
+        return delta
+    
+    def _apply_statistics_delta(self, user_id: int, delta: Dict):
+        """
+        Add delta to the user's rollup row inside the current transaction.
+        The increment happens in SQL, so concurrent saves for one user
+        serialize on the row lock instead of overwriting each other.
+        """
+        increments = {column: getattr(UserSearchStatistics, column) + amount for column, amount in delta.items()}
+        increments['updated_at'] = func.now()
+        statement = update(UserSearchStatistics).where(UserSearchStatistics.user_id == user_id).values(**increments)
+        if self.db.execute(statement).rowcount:
+            return
         
-        self.db.add(search_result)
-        self.db.commit()
-        self.db.refresh(search_result)
-        
-        # Save individual candidates
-        candidates = search_response.get('candidates', [])
-        for candidate_data in candidates:
-            candidate = SearchCandidate(
-                search_result_id=search_result.id,
-                name=candidate_data.get('name', 'Unknown'),
-                linkedin_url=candidate_data.get('linkedin_url'),
-                email=candidate_data.get('email'),
-                current_company=candidate_data.get('current_company'),
-                current_role=candidate_data.get('current_role'),
-                tier=candidate_data.get('tier'),
-                profile_type=candidate_data.get('profile_type'),
-                summary=candidate_data.get('summary'),
-                match_justification=candidate_data.get('match_justification'),
-                confidence_score=candidate_data.get('confidence_score'),
-                contacts=candidate_data.get('contacts', []),
-                source_links=candidate_data.get('source_links', []),
-                data_source=candidate_data.get('data_source'),
-                source_note=candidate_data.get('source_note')
-            )
-            self.db.add(candidate)
+        # The user's first search: create the row, unless a concurrent save just did
+        created = self.db.execute(
+            self._upsert(UserSearchStatistics).values(user_id=user_id, **delta)
+            .on_conflict_do_nothing(index_elements=[UserSearchStatistics.user_id])
+        ).rowcount
+        if not created:
+            self.db.execute(statement)
+    
+    def _upsert(self, model):
+        """Dialect INSERT supporting ON CONFLICT (PostgreSQL and SQLite)"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        return upsert(model)
+    
+    def _save_candidate_profiles(self, candidate_rows: List[Dict]) -> List[int]:
+        """
+        Find or create the CandidateProfile of every row and return their ids
+        in input order. Known people are found by profile_key in one query
+        and only rewritten when the new data actually differs, so re-finding
+        a founder costs an index lookup rather than another copy of their
+        profile. Empty new values never erase what we already know.
+        """
+        values = [profile_values(row) for row in candidate_rows]
+        # Existing profiles whose indexed identity this call changes (see _refresh_profile_vectors)
+        renamed = []
+        
+        # Last occurrence wins within one call; sorted so concurrent saves lock rows in the same order
+        keyed = {v['profile_key']: v for v in values if v['profile_key'] is not None}
+        keys = sorted(keyed)
+        ids_by_key = {}
+        if keys:
+            changes = []
+            existing = self.db.execute(
+                select(CandidateProfile.id, CandidateProfile.profile_key, CandidateProfile.profile_id,
+                       *[getattr(CandidateProfile, field) for field in PROFILE_FIELDS])
+                .where(CandidateProfile.profile_key.in_(keys))
+            ).mappings()
+            for current in existing:
+                ids_by_key[current['profile_key']] = current['id']
+                new = keyed[current['profile_key']]
+                change = {field: new[field] for field in (*PROFILE_FIELDS, 'profile_id')
+                          if new[field] not in (None, '') and new[field] != current[field]}
+                if change:
+                    changes.append({'id': current['id'], **change})
+                    if any(field in change for field in PROFILE_FTS_COLUMNS):
+                        renamed.append(current['id'])
+            if changes:
+                # ORM bulk UPDATE by primary key - one executemany per set of changed columns
+                self.db.execute(update(CandidateProfile), sorted(changes, key=lambda change: change['id']))
+            
+            new_profiles = [keyed[key] for key in keys if key not in ids_by_key]
+            if new_profiles:
+                # DO NOTHING: a concurrent save may create the same person first
+                inserted = dict(self.db.execute(
+                    self._upsert(CandidateProfile)
+                    .on_conflict_do_nothing(index_elements=[CandidateProfile.profile_key])
+                    .returning(CandidateProfile.profile_key, CandidateProfile.id),
+                    new_profiles
+                ).all())
+                ids_by_key.update(inserted)
+                lost_race = [v['profile_key'] for v in new_profiles if v['profile_key'] not in ids_by_key]
+                if lost_race:
+                    ids_by_key.update(self.db.execute(
+                        select(CandidateProfile.profile_key, CandidateProfile.id)
+                        .where(CandidateProfile.profile_key.in_(lost_race))
+                    ).all())
+        
+        # Rows we cannot identify always get a profile of their own
+        anonymous = [v for v in values if v['profile_key'] is None]
+        anonymous_ids = self.db.scalars(
+            insert(CandidateProfile).returning(CandidateProfile.id, sort_by_parameter_order=True), anonymous
+        ).all() if anonymous else []
+        
+        self._refresh_profile_vectors(sorted(renamed))
+        anonymous_ids = iter(anonymous_ids)
+        return [ids_by_key[v['profile_key']] if v['profile_key'] is not None else next(anonymous_ids)
+                for v in values]
+    
+    def _refresh_profile_vectors(self, profile_ids: List[int]):
+        """
+        Re-index the links of profiles whose name, role or company changed.
+        PostgreSQL only: the SQLite triggers on candidate_profiles do this themselves.
+        """
+        if profile_ids and self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(PG_PROFILE_VECTOR_REFRESH, [{'id': profile_id} for profile_id in profile_ids])
+    
+    def _insert_candidate_links(self, search_results: List[Tuple[int, datetime]], candidates: List[List[Dict]]):
+        """
+        Profiles for every candidate, then one executemany of
+        search_candidates rows carrying this search's analysis. search_results
+        are (id, created_at) pairs: links carry their search's created_at, the
+        key both tables are partitioned by on PostgreSQL. PostgreSQL cannot
+        read the compressed text, so the links' full-text vectors are written
+        from the plain values; the SQLite triggers decode it with zstd_text().
+        """
+        flat = [row for candidate_rows in candidates for row in candidate_rows]
+        if not flat:
+            return
+        candidate_ids = iter(self._save_candidate_profiles(flat))
+        links = [
+            {'search_result_id': search_result_id, 'candidate_id': next(candidate_ids), 'created_at': created_at,
+             **{field: row.get(field) for field in LINK_FIELDS}}
+            for (search_result_id, created_at), candidate_rows in zip(search_results, candidates)
+            for row in candidate_rows
+        ]
+        if self.db.get_bind().dialect.name != "postgresql":
+            self.db.execute(insert(SearchCandidate), links)
+            return
+        
+        link_ids = self.db.scalars(
+            insert(SearchCandidate).returning(SearchCandidate.id, sort_by_parameter_order=True), links
+        ).all()
+        self.db.execute(PG_LINK_VECTOR_UPDATE, [
+            {'id': link_id, 'created_at': link['created_at'],
+             'summary': link['summary'], 'match_justification': link['match_justification']}
+            for link_id, link in zip(link_ids, links)
+        ])
+    
+    def save_search_result(self, user_id: int, search_criteria: Dict, search_response: Dict, deadline: Optional[Deadline] = None) -> SearchResult:
+        """
+        Save a complete search result to the database in one transaction:
+        the parent row comes back via INSERT ... RETURNING, candidates are
+        matched to their profiles and linked with a single executemany
+        """
+        
+        self._apply_deadline(deadline)
+        
+        try:
+            search_result = self.db.scalars(
+                insert(SearchResult).returning(SearchResult),
+                [self.search_result_values(user_id, search_criteria, search_response)]
+            ).one()
+            
+            candidate_rows = self.candidate_rows(search_response)
+            self._insert_candidate_links([(search_result.id, search_result.created_at)], [candidate_rows])
+            
+            self._apply_statistics_delta(user_id, self.statistics_delta(candidate_rows))
+            
+            # Detach so commit does not expire the RETURNING values (no refresh SELECT)
+            self.db.expunge(search_result)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         
-        self.db.commit()
         return search_result
     
-    def get_user_search_history(self, user_id: int, limit: int = 20) -> List[SearchResult]:
-        """Get search history for a user"""
-        return self.db.query(SearchResult)\
-            .filter(SearchResult.user_id == user_id)\
-            .order_by(SearchResult.created_at.desc())\
-            .limit(limit)\
-            .all()
+    def save_search_results_batch(self, results: List[Dict], candidates: List[List[Dict]]) -> List[int]:
+        """
+        Save many searches in one transaction: one multi-row INSERT ... RETURNING
+        for the parents, one profile upsert and one link executemany for
+        every candidate row.
+        results[i] are search_result_values(), candidates[i] the matching
+        candidate_rows(); returns the new ids in input order.
+        """
+        if not results:
+            return []
+        
+        try:
+            parents = self.db.execute(
+                insert(SearchResult).returning(SearchResult.id, SearchResult.created_at, sort_by_parameter_order=True),
+                results
+            ).all()
+            ids = [search_result_id for search_result_id, _ in parents]
+            
+            self._insert_candidate_links(parents, candidates)
+            
+            # One rollup update per user; ascending user_id keeps lock order stable
+            deltas = {}
+            for values, candidate_rows in zip(results, candidates):
+                delta = self.statistics_delta(candidate_rows)
+                total = deltas.setdefault(values['user_id'], dict.fromkeys(_STATISTICS_COLUMNS, 0))
+                for column, amount in delta.items():
+                    total[column] += amount
+            for user_id in sorted(deltas):
+                self._apply_statistics_delta(user_id, deltas[user_id])
+            
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return ids
+    
+    def get_user_search_history(self, user_id: int, limit: int = 20) -> List:
+        """Get search history for a user (newest first, list columns only)"""
+        rows, _ = self.get_user_search_history_page(user_id, limit=limit)
+        return rows
+    
+    def get_user_search_history_page(
+        self,
+        user_id: int,
+        limit: int = 20,
+        after: Optional[str] = None
+    ) -> Tuple[List, Optional[str]]:
+        """
+        One page of a user's history, newest first, keyset-paginated on
+        (created_at, id) so it walks ix_search_results_user_created instead
+        of counting past skipped rows. Only list columns are loaded - never
+        the search_criteria JSON. Returns (rows, next_cursor).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = self.db.query(*_HISTORY_LIST_COLUMNS).filter(SearchResult.user_id == user_id)
+        
+        if after:
+            created_at, last_id = decode_cursor(after, (str, int))
+            # Compare against the stored value when the row still exists, so the
+            # cursor never depends on how a dialect formats timestamps
+            anchor = func.coalesce(
+                select(SearchResult.created_at).where(SearchResult.id == last_id).scalar_subquery(),
+                datetime.fromisoformat(created_at)
+            )
+            query = query.filter(tuple_(SearchResult.created_at, SearchResult.id) < tuple_(anchor, last_id))
+        
+        rows = query.order_by(SearchResult.created_at.desc(), SearchResult.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+        return rows, next_cursor
     
     def get_search_result_by_id(self, search_result_id: int, user_id: int) -> Optional[SearchResult]:
         """Get a specific search result with candidates"""
@@ -72,43 +377,408 @@ class SearchHistoryService:
             .filter(SearchResult.id == search_result_id, SearchResult.user_id == user_id)\
             .first()
     
+    def _candidate_export_query(self):
+        """Link rows joined to their profiles, flattened as the API and exports expect"""
+        return self.db.query(
+            SearchCandidate.id,
+            SearchCandidate.search_result_id,
+            SearchCandidate.candidate_id,
+            CandidateProfile.name,
+            CandidateProfile.linkedin_url,
+            CandidateProfile.email,
+            CandidateProfile.current_company,
+            CandidateProfile.current_role,
+            SearchCandidate.tier,
+            SearchCandidate.profile_type,
+            SearchCandidate.summary,
+            SearchCandidate.match_justification,
+            SearchCandidate.confidence_score,
+            CandidateProfile.contacts,
+            CandidateProfile.source_links,
+            CandidateProfile.data_source,
+            CandidateProfile.source_note,
+            SearchCandidate.created_at
+        ).select_from(SearchCandidate).join(CandidateProfile, CandidateProfile.id == SearchCandidate.candidate_id)
+    
+    def get_candidate_page(
+        self,
+        search_result_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+        tiers: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a search's candidates, ordered by tier then confidence.
+        Keyset pagination: `after` is the cursor returned with the previous
+        page. ix_search_candidates_result_tier_score holds this exact sort key,
+        so a page is an index seek plus `limit` rows, never a sort of the search.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = self._candidate_export_query()\
+            .filter(SearchCandidate.search_result_id == search_result_id)
+        
+        if tiers:
+            query = query.filter(SearchCandidate.tier.in_(tiers))
+        
+        if after:
+            tier, score, last_id = decode_cursor(after, (str, _NUMBER, int))
+            # The score key is the negated confidence, so the whole key ascends. The separate
+            # tier bound lets SQLite seek the index too (it does not seek on row values of expressions).
+            query = query.filter(
+                CANDIDATE_TIER_KEY >= tier,
+                tuple_(CANDIDATE_TIER_KEY, CANDIDATE_SCORE_KEY, SearchCandidate.id) > tuple_(tier, -score, last_id)
+            )
+        
+        # One extra row tells us whether another page exists
+        rows = [
+            row._asdict() for row in
+            query.order_by(CANDIDATE_TIER_KEY, CANDIDATE_SCORE_KEY, SearchCandidate.id).limit(limit + 1)
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            score = last['confidence_score']
+            next_cursor = encode_cursor([last['tier'] or 'Z', -1.0 if score is None else score, last['id']])
+        return rows, next_cursor
+    
+    def search_candidates(
+        self,
+        user_id: int,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Full-text search over all of a user's saved candidates (name, role,
+        company, summary, justification), best match first. Uses the FTS5 /
+        tsvector index from services.candidate_search; keyset-paginated on
+        (rank, id) like the other listings. Returns (rows, next_cursor).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        search = match_and_rank(self.db.get_bind().dialect.name, query, SearchCandidate.id)
+        if search is None:
+            return [], None
+        join, match, rank = search
+        
+        db_query = self._candidate_export_query()\
+            .add_columns(SearchResult.search_query, rank.label('rank'))
+        if join is not None:
+            db_query = db_query.join(*join)
+        db_query = db_query.join(SearchResult, SearchResult.id == SearchCandidate.search_result_id)\
+            .filter(match, SearchResult.user_id == user_id)
+        
+        if after:
+            last_rank, last_id = decode_cursor(after, (_NUMBER, int))
+            db_query = db_query.filter(or_(rank > last_rank, and_(rank == last_rank, SearchCandidate.id > last_id)))
+        
+        rows = [row._asdict() for row in db_query.order_by(rank, SearchCandidate.id).limit(limit + 1)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1]['rank'], rows[-1]['id']])
+        for row in rows:
+            # Dialect-specific scale - only the ordering is meaningful to clients
+            del row['rank']
+        return rows, next_cursor
+    
+    def find_candidate(self, user_id: int, linkedin_url: Optional[str], profile_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        "Have we seen this founder before?" - an indexed lookup on
+        profile_key (or the Harvest profile id), then the user's own searches that
+        found them (newest first). None when the user has never saved this person.
+        """
+        key = profile_key(linkedin_url, profile_id)
+        profile = None
+        if key is not None:
+            profile = self.db.query(CandidateProfile).filter(CandidateProfile.profile_key == key).first()
+        if profile is None and profile_id:
+            # Profiles keyed by their LinkedIn URL still record the Harvest id
+            profile = self.db.query(CandidateProfile).filter(CandidateProfile.profile_id == profile_id).first()
+        if profile is None:
+            return None
+        
+        appearances = [
+            row._asdict() for row in self.db.query(
+                SearchCandidate.search_result_id,
+                SearchResult.search_query,
+                SearchCandidate.tier,
+                SearchCandidate.profile_type,
+                SearchCandidate.summary,
+                SearchCandidate.match_justification,
+                SearchCandidate.confidence_score,
+                SearchCandidate.created_at
+            ).join(SearchResult, SearchResult.id == SearchCandidate.search_result_id)
+            .filter(SearchCandidate.candidate_id == profile.id, SearchResult.user_id == user_id)
+            .order_by(SearchCandidate.created_at.desc(), SearchCandidate.id.desc())
+        ]
+        if not appearances:
+            # Found by someone else's search only - not this user's to see
+            return None
+        
+        return {
+            "candidate": {
+                "id": profile.id,
+                **{field: getattr(profile, field) for field in PROFILE_FIELDS},
+                "updated_at": profile.updated_at or profile.created_at
+            },
+            "appearances": appearances
+        }
+    
+    def iter_candidate_rows(self, search_result_id: int, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Stream a search's candidates as plain dicts, fetching batch_size rows
+        per round-trip instead of loading every ORM object at once
+        """
+        query = self._candidate_export_query()\
+            .filter(SearchCandidate.search_result_id == search_result_id)\
+            .order_by(SearchCandidate.id)\
+            .yield_per(batch_size)
+        
+        for row in query:
+            yield row._asdict()
+    
+    def iter_user_candidate_rows(self, user_id: int, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream every candidate from a user's whole search history, oldest search first"""
+        query = self._candidate_export_query()\
+            .join(SearchResult, SearchCandidate.search_result_id == SearchResult.id)\
+            .filter(SearchResult.user_id == user_id)\
+            .order_by(SearchCandidate.search_result_id, SearchCandidate.id)\
+            .yield_per(batch_size)
+        
+        for row in query:
+            yield row._asdict()
+    
     def delete_search_result(self, search_result_id: int, user_id: int) -> bool:
-        """Delete a search result (and all its candidates)"""
-        search_result = self.get_search_result_by_id(search_result_id, user_id)
-        if search_result:
-            self.db.delete(search_result)
+        """Delete a search result (and all its candidates) and take it out of the user's statistics"""
+        return self.delete_search_results(user_id, [search_result_id]) == 1
+    
+    def delete_search_results(self, user_id: int, search_result_ids: Optional[List[int]] = None,
+                              chunk_rows: int = 500) -> int:
+        """
+        Delete many of a user's searches in one transaction - all of them when
+        search_result_ids is None. Ids that are not the user's are ignored.
+        Returns the number of searches deleted.
+        """
+        query = select(SearchResult.id).where(SearchResult.user_id == user_id).order_by(SearchResult.id)
+        if search_result_ids is not None:
+            if not search_result_ids:
+                return 0
+            query = query.where(SearchResult.id.in_(search_result_ids))
+        ids = self.db.scalars(query).all()
+        if not ids:
+            return 0
+        
+        try:
+            for start in range(0, len(ids), chunk_rows):
+                self._delete_searches(ids[start:start + chunk_rows])
             self.db.commit()
-            return True
-        return False
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(ids)
     
-    def get_search_statistics(self, user_id: int) -> Dict:
-        """Get search statistics for a user"""
-        total_searches = self.db.query(SearchResult)\
-            .filter(SearchResult.user_id == user_id)\
-            .count()
+    def _release_statistics(self, *criteria, link_criteria=()) -> int:
+        """
+        Take the searches matching criteria out of their users' rollup rows,
+        before they are deleted. Returns the number of searches released.
+        """
+        released = self.db.execute(
+            select(
+                SearchResult.user_id,
+                func.count(func.distinct(SearchResult.id)).label('total_searches'),
+                *_candidate_count_columns()
+            ).select_from(SearchResult)
+            .outerjoin(SearchCandidate, and_(SearchCandidate.search_result_id == SearchResult.id, *link_criteria))
+            .where(*criteria)
+            .group_by(SearchResult.user_id)
+        ).mappings().all()
         
-        total_candidates = self.db.query(SearchCandidate)\
-            .join(SearchResult)\
-            .filter(SearchResult.user_id == user_id)\
-            .count()
+        for counts in released:
+            # Users saved before the rollup existed have no row until the rebuild
+            # command runs - decrement only, never create negative counts
+            decrements = {column: getattr(UserSearchStatistics, column) - counts[column]
+                          for column in _STATISTICS_COLUMNS}
+            decrements['updated_at'] = func.now()
+            self.db.execute(
+                update(UserSearchStatistics).where(UserSearchStatistics.user_id == counts['user_id']).values(**decrements)
+            )
+        return sum(counts['total_searches'] for counts in released)
+    
+    def _delete_searches(self, search_result_ids: List[int]):
+        """Delete searches and their candidate links inside the current transaction, keeping the rollups in step"""
+        self._release_statistics(SearchResult.id.in_(search_result_ids))
+        # One statement: ON DELETE CASCADE removes the links
+        self.db.execute(delete(SearchResult).where(SearchResult.id.in_(search_result_ids)))
+    
+    def release_statistics_between(self, start: datetime, end: datetime) -> int:
+        """
+        Take every search created in [start, end) out of the rollups, in the
+        current transaction - for dropping whole history partitions. Links
+        are matched on their own created_at too (equal to their search's,
+        as the partitioned foreign key enforces), so only one candidate
+        partition is read.
+        """
+        return self._release_statistics(
+            SearchResult.created_at >= start, SearchResult.created_at < end,
+            link_criteria=(SearchCandidate.created_at >= start, SearchCandidate.created_at < end)
+        )
+    
+    def delete_searches_between(self, start: datetime, end: datetime, chunk_rows: int = 500) -> int:
+        """
+        Delete every search created in [start, end) with its candidate links,
+        chunk_rows searches per transaction so no lock is held for long.
+        Returns the number of searches deleted.
+        """
+        deleted = 0
+        while True:
+            # Oldest first: expired searches are the lowest ids, so each chunk is found quickly
+            ids = self.db.scalars(
+                select(SearchResult.id)
+                .where(SearchResult.created_at >= start, SearchResult.created_at < end)
+                .order_by(SearchResult.id).limit(chunk_rows)
+            ).all()
+            if not ids:
+                return deleted
+            try:
+                self._delete_searches(ids)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            deleted += len(ids)
+    
+    def delete_orphan_profiles(self, before: datetime, chunk_rows: int = 500) -> int:
+        """
+        Delete candidate profiles no search links to any more and that were
+        last written before `before` (people only found by expired searches).
+        Returns the number of profiles deleted.
+        """
+        orphaned = select(CandidateProfile.id).where(
+            func.coalesce(CandidateProfile.updated_at, CandidateProfile.created_at) < before,
+            ~select(SearchCandidate.id).where(SearchCandidate.candidate_id == CandidateProfile.id).exists()
+        ).order_by(CandidateProfile.id).limit(chunk_rows)
         
-        # Get tier distribution across all searches
-        tier_counts = {}
-        profile_counts = {}
+        deleted = 0
+        while True:
+            ids = self.db.scalars(orphaned).all()
+            if not ids:
+                return deleted
+            try:
+                self.db.execute(delete(CandidateProfile).where(CandidateProfile.id.in_(ids)))
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            deleted += len(ids)
+    
+    def iter_search_rows_between(self, start: datetime, end: datetime, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream every search created in [start, end) as a dict of its columns, for archiving"""
+        query = self.db.query(*SearchResult.__table__.columns)\
+            .filter(SearchResult.created_at >= start, SearchResult.created_at < end)\
+            .order_by(SearchResult.id)\
+            .yield_per(batch_size)
         
-        search_results = self.get_user_search_history(user_id, limit=100)
-        for result in search_results:
-            if result.tier_distribution:
-                for tier, count in result.tier_distribution.items():
-                    tier_counts[tier] = tier_counts.get(tier, 0) + count
-            
-            if result.profile_distribution:
-                for profile_type, count in result.profile_distribution.items():
-                    profile_counts[profile_type] = profile_counts.get(profile_type, 0) + count
+        for row in query:
+            yield row._asdict()
+    
+    def iter_candidate_rows_between(self, start: datetime, end: datetime, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream the candidates of every search created in [start, end), flattened like exports"""
+        query = self._candidate_export_query()\
+            .join(SearchResult, SearchCandidate.search_result_id == SearchResult.id)\
+            .filter(SearchResult.created_at >= start, SearchResult.created_at < end)\
+            .order_by(SearchCandidate.search_result_id, SearchCandidate.id)\
+            .yield_per(batch_size)
+        
+        for row in query:
+            yield row._asdict()
+    
+    def get_search_statistics(self, user_id: int) -> Dict:
+        """Get search statistics for a user - one primary-key read of the rollup row"""
+        stats = self.db.get(UserSearchStatistics, user_id)
+        
+        def count(column: str) -> int:
+            return getattr(stats, column) if stats else 0
         
         return {
-            "total_searches": total_searches,
-            "total_candidates": total_candidates,
-            "tier_distribution": tier_counts,
-            "profile_distribution": profile_counts
+            "total_searches": count('total_searches'),
+            "total_candidates": count('total_candidates'),
+            "tier_distribution": {tier: count(column) for tier, column in _TIER_STATISTICS.items()},
+            "profile_distribution": {profile: count(column) for profile, column in _PROFILE_STATISTICS.items()}
         }
+    
+    def rebuild_search_statistics(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute user_search_statistics from search_results and
+        search_candidates (one user, or everyone) in a single transaction.
+        Used to backfill the rollup and to repair drift. Returns the number
+        of rollup rows written.
+        """
+        query = select(
+            SearchResult.user_id,
+            func.count(func.distinct(SearchResult.id)).label('total_searches'),
+            *_candidate_count_columns()
+        ).select_from(SearchResult)\
+            .outerjoin(SearchCandidate, SearchCandidate.search_result_id == SearchResult.id)\
+            .group_by(SearchResult.user_id)
+        clear = delete(UserSearchStatistics)
+        if user_id is not None:
+            query = query.where(SearchResult.user_id == user_id)
+            clear = clear.where(UserSearchStatistics.user_id == user_id)
+        
+        try:
+            rows = [row._asdict() for row in self.db.execute(query)]
+            self.db.execute(clear)
+            if rows:
+                self.db.execute(insert(UserSearchStatistics), rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(rows)
+
+
+class AsyncSearchHistoryService:
+    """
+    SearchHistoryService for request handlers. Each call runs the sync
+    method through AsyncSession.run_sync, so the same queries await the
+    async driver instead of blocking the event loop. Returned rows are
+    fully loaded - they must not lazy-load relationships afterwards.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _run(self, method, *args, **kwargs):
+        return await self.db.run_sync(lambda session: method(SearchHistoryService(session), *args, **kwargs))
+    
+    async def save_search_result(self, user_id: int, search_criteria: Dict, search_response: Dict,
+                                 deadline: Optional[Deadline] = None) -> SearchResult:
+        return await self._run(SearchHistoryService.save_search_result, user_id, search_criteria, search_response, deadline)
+    
+    async def get_user_search_history_page(self, user_id: int, limit: int = 20,
+                                           after: Optional[str] = None) -> Tuple[List, Optional[str]]:
+        return await self._run(SearchHistoryService.get_user_search_history_page, user_id, limit=limit, after=after)
+    
+    async def get_search_result_by_id(self, search_result_id: int, user_id: int) -> Optional[SearchResult]:
+        return await self._run(SearchHistoryService.get_search_result_by_id, search_result_id, user_id)
+    
+    async def get_candidate_page(self, search_result_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                                 after: Optional[str] = None, tiers: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        return await self._run(SearchHistoryService.get_candidate_page, search_result_id, limit=limit, after=after, tiers=tiers)
+    
+    async def search_candidates(self, user_id: int, query: str, limit: int = DEFAULT_PAGE_SIZE,
+                                after: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        return await self._run(SearchHistoryService.search_candidates, user_id, query, limit=limit, after=after)
+    
+    async def find_candidate(self, user_id: int, linkedin_url: Optional[str], profile_id: Optional[str] = None) -> Optional[Dict]:
+        return await self._run(SearchHistoryService.find_candidate, user_id, linkedin_url, profile_id)
+    
+    async def delete_search_result(self, search_result_id: int, user_id: int) -> bool:
+        return await self._run(SearchHistoryService.delete_search_result, search_result_id, user_id)
+    
+    async def delete_search_results(self, user_id: int, search_result_ids: Optional[List[int]] = None) -> int:
+        return await self._run(SearchHistoryService.delete_search_results, user_id, search_result_ids)
+    
+    async def get_search_statistics(self, user_id: int) -> Dict:
+        return await self._run(SearchHistoryService.get_search_statistics, user_id)
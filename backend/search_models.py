@@ -2,20 +2,25 @@
 Database models for search results and history
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index, LargeBinary, literal_column, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from services.compression import CANDIDATE_LINKS, CANDIDATE_TEXT, SEARCH_JSON, CompressedJSON, CompressedText
 
 class SearchResult(Base):
-    """Model for storing search results"""
+    """
+    Model for storing search results.
+    On PostgreSQL the table is partitioned by month of created_at (see
+    services.history_retention), with primary key (id, created_at).
+    """
     __tablename__ = "search_results"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Search criteria
-    search_criteria = Column(JSON, nullable=False)  # Store the original search criteria
+    search_criteria = Column(CompressedJSON(SEARCH_JSON), nullable=False)  # Store the original search criteria
     search_query = Column(String(500), nullable=False)
     industry = Column(String(100))
     experience_depth = Column(Integer)
@@ -23,8 +28,8 @@ class SearchResult(Base):
     
     # Results summary
     total_candidates = Column(Integer, default=0)
-    tier_distribution = Column(JSON)  # {"A": 2, "B": 3, "C": 1}
-    profile_distribution = Column(JSON)  # {"business": 3, "technical": 3}
+    tier_distribution = Column(CompressedJSON(SEARCH_JSON))  # {"A": 2, "B": 3, "C": 1}
+    profile_distribution = Column(CompressedJSON(SEARCH_JSON))  # {"business": 3, "technical": 3}
     
     # Export info
     export_path = Column(String(255))
@@ -35,37 +40,118 @@ class SearchResult(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    candidates = relationship("SearchCandidate", back_populates="search_result", cascade="all, delete-orphan")
+    # The database deletes the links (ON DELETE CASCADE); the ORM never loads them to do it
+    candidates = relationship("SearchCandidate", back_populates="search_result",
+                              cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        # History listing: WHERE user_id = ? ORDER BY created_at DESC, id DESC.
+        # On PostgreSQL the list columns are INCLUDEd so pages are index-only scans.
+        Index(
+            "ix_search_results_user_created", "user_id", "created_at", "id",
+            postgresql_include=["search_query", "industry", "total_candidates", "tier_distribution",
+                                "profile_distribution", "csv_filename"]
+        ),
+    )
 
-class SearchCandidate(Base):
-    """Model for storing individual candidates from search results"""
-    __tablename__ = "search_candidates"
+class CandidateProfile(Base):
+    """
+    One row per real person, shared by every search that found them.
+    profile_key is the de-duplication key: the normalized LinkedIn URL,
+    or the Harvest profile id when there is no URL (see services.candidate_profiles).
+    Identity and contact data only - the analysis of a search stays on its link.
+    """
+    __tablename__ = "candidate_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    search_result_id = Column(Integer, ForeignKey("search_results.id"), nullable=False)
+    profile_key = Column(String(500), unique=True)  # NULL when the profile cannot be identified
+    profile_id = Column(String(100), index=True)     # Harvest profile id, when known
     
-    # Candidate data
+    # Latest known profile data
     name = Column(String(255), nullable=False)
     linkedin_url = Column(String(500))
     email = Column(String(255))
     current_company = Column(String(255))
     current_role = Column(String(255))
     
-    # Analysis results
-    tier = Column(String(10))  # A, B, C
-    profile_type = Column(String(50))  # business, technical
-    summary = Column(Text)
-    match_justification = Column(Text)
-    confidence_score = Column(Float)
-    
     # Additional data
-    contacts = Column(JSON)  # Array of contact links
-    source_links = Column(JSON)  # Array of source links
+    contacts = Column(CompressedJSON(CANDIDATE_LINKS))  # Array of contact links
+    source_links = Column(CompressedJSON(CANDIDATE_LINKS))  # Array of source links
     data_source = Column(String(50))  # linkedin_real, mock, etc.
     source_note = Column(String(255))
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    appearances = relationship("SearchCandidate", back_populates="candidate")
+
+class SearchCandidate(Base):
+    """
+    Link between a search result and a candidate profile, with the per-search
+    ranking and analysis. The full-text index covers these rows (see
+    services.candidate_search). Partitioned like search_results on
+    PostgreSQL, where it references its search by (search_result_id, created_at).
+    """
+    __tablename__ = "search_candidates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    search_result_id = Column(Integer, ForeignKey("search_results.id", ondelete="CASCADE"), nullable=False)
+    candidate_id = Column(Integer, ForeignKey("candidate_profiles.id"), nullable=False, index=True)
+    
+    # Per-search analysis results
+    tier = Column(String(10))  # A, B, C
+    profile_type = Column(String(50))  # business, technical
+    summary = Column(CompressedText(CANDIDATE_TEXT))
+    match_justification = Column(CompressedText(CANDIDATE_TEXT))
+    confidence_score = Column(Float)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # the search's created_at
     
     # Relationships
     search_result = relationship("SearchResult", back_populates="candidates")
+    candidate = relationship("CandidateProfile", back_populates="appearances")
+
+# Candidate page order: tier A first, then highest confidence, then id - NULLs last.
+# The constants are literals, not bound parameters, so queries can match the index.
+CANDIDATE_TIER_KEY = func.coalesce(SearchCandidate.tier, literal_column("'Z'"))
+CANDIDATE_SCORE_KEY = -func.coalesce(SearchCandidate.confidence_score, literal_column("-1.0"))
+
+# Candidate pages filter by search and walk (tier key, score key, id) ascending,
+# so each page is one range scan of this index (see migrations/v0002)
+Index(
+    "ix_search_candidates_result_tier_score",
+    SearchCandidate.search_result_id, CANDIDATE_TIER_KEY, CANDIDATE_SCORE_KEY, SearchCandidate.id
+)
+
+class UserSearchStatistics(Base):
+    """Per-user rollup of search history, kept in step by SearchHistoryService"""
+    __tablename__ = "user_search_statistics"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    
+    # Totals over every saved search (server defaults so increments never hit NULL)
+    total_searches = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    total_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    
+    # Candidate counts by tier and profile type
+    tier_a_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    tier_b_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    tier_c_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    business_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    technical_candidates = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CompressionDictionary(Base):
+    """A trained zstd dictionary for the compressed columns (see services.compression)"""
+    __tablename__ = "compression_dictionaries"
+    
+    id = Column(Integer, primary_key=True)  # also the dictionary id inside every zstd frame
+    family = Column(String(50), nullable=False, index=True)
+    dictionary = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
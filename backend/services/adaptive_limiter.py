@@ -0,0 +1,158 @@
+"""
+Adaptive concurrency limiter (AIMD) for outbound API traffic
+Grows the allowed parallelism while calls are fast and healthy, and cuts it
+sharply on overload signals (429/5xx, timeouts, latency spikes)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Outcomes reported to AdaptiveConcurrencyLimiter.release()
+SUCCESS = "success"
+OVERLOAD = "overload"   # 429, 5xx, timeouts - the upstream is telling us to slow down
+ERROR = "error"         # failures that say nothing about upstream capacity (4xx, parse errors)
+CANCELLED = "cancelled" # slot given back without calling upstream - does not move the limit
+
+# Default bounds: the limit starts at INITIAL and adapts between MIN and MAX
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 16
+
+
+class ConcurrencyLimitTimeout(Exception):
+    """Raised when no slot became free within the acquire timeout"""
+    pass
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Thread-safe AIMD limiter shared by every caller in the process.
+
+    Each healthy completion adds additive_increase / limit to the limit, so the
+    limit grows by roughly additive_increase per window of `limit` calls. An
+    overload or a call slower than latency_threshold multiplies the limit by
+    backoff_ratio, at most once per decrease_cooldown seconds so a single
+    burst of failures counts as one congestion event.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        latency_threshold: float = 10.0,
+        backoff_ratio: float = 0.5,
+        additive_increase: float = 1.0,
+        error_rate_threshold: float = 0.2,
+        decrease_cooldown: float = 1.0
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.additive_increase = additive_increase
+        self.error_rate_threshold = error_rate_threshold
+        self.decrease_cooldown = decrease_cooldown
+
+        self._condition = threading.Condition()
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+
+        # Exponentially weighted error rate and latency (alpha = 0.1)
+        self._error_rate = 0.0
+        self._latency_ewma = 0.0
+
+        # Counters for metrics
+        self._completed = {SUCCESS: 0, OVERLOAD: 0, ERROR: 0, CANCELLED: 0}
+        self._increases = 0
+        self._decreases = 0
+        self._acquire_timeouts = 0
+        self._peak_in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        """Current whole-number concurrency limit"""
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot. Returns False if timeout elapsed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._acquire_timeouts += 1
+                    return False
+                self._condition.wait(remaining)
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            return True
+
+    def release(self, latency: float, outcome: str = SUCCESS):
+        """Return a slot and adjust the limit from the call's latency and outcome"""
+        with self._condition:
+            self._in_flight -= 1
+            self._completed[outcome] = self._completed.get(outcome, 0) + 1
+            if outcome == CANCELLED:
+                self._condition.notify_all()
+                return
+            self._error_rate = 0.9 * self._error_rate + 0.1 * (0.0 if outcome == SUCCESS else 1.0)
+            self._latency_ewma = 0.9 * self._latency_ewma + 0.1 * latency if self._latency_ewma else latency
+
+            if outcome == OVERLOAD or latency > self.latency_threshold:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                    self._last_decrease = now
+                    self._decreases += 1
+            elif outcome == SUCCESS and self._error_rate < self.error_rate_threshold:
+                previous = int(self._limit)
+                self._limit = min(float(self.max_limit), self._limit + self.additive_increase / self._limit)
+                if int(self._limit) > previous:
+                    self._increases += 1
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        Hold a slot for the duration of the block. The block may set
+        `outcome` on the yielded dict; anything raised counts as an error.
+        """
+        if not self.acquire(timeout):
+            raise ConcurrencyLimitTimeout(f"{self.name}: no free slot within {timeout}s (limit {self.limit})")
+        call = {"outcome": SUCCESS}
+        start = time.monotonic()
+        try:
+            yield call
+        except Exception:
+            if call["outcome"] == SUCCESS:
+                call["outcome"] = ERROR
+            raise
+        finally:
+            self.release(time.monotonic() - start, call["outcome"])
+
+    def snapshot(self) -> Dict:
+        """Current limiter state for the /metrics endpoint"""
+        with self._condition:
+            return {
+                "name": self.name,
+                "limit": int(self._limit),
+                "limit_exact": round(self._limit, 3),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "error_rate": round(self._error_rate, 4),
+                "latency_ewma_seconds": round(self._latency_ewma, 4),
+                "latency_threshold_seconds": self.latency_threshold,
+                "completed": dict(self._completed),
+                "limit_increases": self._increases,
+                "limit_decreases": self._decreases,
+                "acquire_timeouts": self._acquire_timeouts
+            }
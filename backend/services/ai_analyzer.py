@@ -5,13 +5,63 @@ Updated to preserve data source information from harvest client
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import json
-from typing import Dict, List
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from services.adaptive_limiter import (AdaptiveConcurrencyLimiter, ConcurrencyLimitTimeout, OVERLOAD, ERROR, CANCELLED,
+                                       DEFAULT_INITIAL_LIMIT, DEFAULT_MAX_LIMIT, DEFAULT_MIN_LIMIT)
+from services.circuit_breaker import CircuitBreaker
+from services.deadline import Deadline
+from services.cancellation import CancellationToken, SearchCancelled
+
+# Optional: httpx enables HTTP/2 multiplexing to Gemini (pip install "httpx[http2]")
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 load_dotenv()
 
+# How often a waiting batch re-checks its cancellation token
+CANCEL_POLL_INTERVAL = 0.25
+
+# One limiter per process so every search shares the same view of Gemini's quota.
+# GEMINI_MAX_CONCURRENCY is the ceiling the adaptive limit may grow to, not a
+# fixed parallelism; it also sizes the connection pool and worker threads.
+gemini_limiter = AdaptiveConcurrencyLimiter(
+    "gemini",
+    initial_limit=int(os.getenv("GEMINI_INITIAL_CONCURRENCY", str(DEFAULT_INITIAL_LIMIT))),
+    min_limit=int(os.getenv("GEMINI_MIN_CONCURRENCY", str(DEFAULT_MIN_LIMIT))),
+    max_limit=int(os.getenv("GEMINI_MAX_CONCURRENCY", str(DEFAULT_MAX_LIMIT))),
+    latency_threshold=float(os.getenv("GEMINI_LATENCY_THRESHOLD", "15"))
+)
+
+# Stop calling Gemini after sustained failures; a half-open probe decides when to resume
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_TIMEOUT", "30"))
+)
+
+# Transport failures that signal an overloaded or unreachable upstream
+_OVERLOAD_ERRORS = (requests.Timeout, requests.ConnectionError) + ((httpx.TransportError,) if httpx else ())
+
+
+class GeminiAPIError(requests.RequestException):
+    """Non-200 response from Gemini"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
 class AIAnalyzer:
     """AI service for analyzing founder profiles"""
     
@@ -19,13 +69,138 @@ class AIAnalyzer:
         self.api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
         self.base_url = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
         
-    def analyze_candidate(self, profile: Dict, criteria: Dict) -> Dict:
+        # Connection pool and worker threads sized to the limiter's ceiling
+        self.max_concurrency = gemini_limiter.max_limit
+        self.pool_size = int(os.getenv("GEMINI_POOL_SIZE", str(self.max_concurrency)))
+        self.connect_timeout = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = float(os.getenv("GEMINI_READ_TIMEOUT", "30"))
+        self.use_http2 = os.getenv("GEMINI_HTTP2", "false").lower() == "true"
+        self.client = self._create_http_client()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="gemini")
+        
+        # Hedging: once a call runs past the configured latency percentile,
+        # send a duplicate and take whichever answers first
+        self.hedge_enabled = os.getenv("GEMINI_HEDGE_ENABLED", "true").lower() == "true"
+        self.hedge_percentile = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+        self.hedge_budget = float(os.getenv("GEMINI_HEDGE_BUDGET", "0.1"))  # max hedges per primary call
+        self.hedge_min_samples = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+        self._hedge_executor = ThreadPoolExecutor(max_workers=self.max_concurrency * 2, thread_name_prefix="gemini-hedge")
+        self._hedge_lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self._primary_calls = 0
+        self._hedges_sent = 0
+        self._hedge_wins = 0
+    
+    def _create_http_client(self):
+        """Create the pooled keep-alive client used for every Gemini call"""
+        
+        if self.use_http2:
+            if httpx is None:
+                print("⚠️  GEMINI_HTTP2 requested but httpx is not installed - using HTTP/1.1 pool")
+            else:
+                try:
+                    client = httpx.Client(
+                        http2=True,
+                        limits=httpx.Limits(
+                            max_connections=self.pool_size,
+                            max_keepalive_connections=self.pool_size
+                        ),
+                        headers={"Content-Type": "application/json"}
+                    )
+                    print(f"🔌 Gemini client: HTTP/2 (pool size {self.pool_size})")
+                    return client
+                except ImportError:
+                    print("⚠️  GEMINI_HTTP2 requested but the h2 package is missing - using HTTP/1.1 pool")
+                    self.use_http2 = False
+        
+        self.use_http2 = False
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+    
+    def _request_timeout(self, deadline: Optional[Deadline] = None):
+        """Explicit connect/read timeouts (never beyond the request deadline) in the form the active client expects"""
+        connect_timeout, read_timeout = self.connect_timeout, self.read_timeout
+        if deadline is not None:
+            connect_timeout = deadline.timeout(connect_timeout)
+            read_timeout = deadline.timeout(read_timeout)
+        if self.use_http2:
+            return httpx.Timeout(read_timeout, connect=connect_timeout)
+        return (connect_timeout, read_timeout)
+    
+    def close(self):
+        """Release pooled connections and worker threads"""
+        self._executor.shutdown(wait=False)
+        self._hedge_executor.shutdown(wait=False)
+        self.client.close()
+    
+    def analyze_candidates(
+        self,
+        profiles: List[Dict],
+        criteria: Dict,
+        deadline: Optional[Deadline] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict]:
+        """
+        Analyze a batch of profiles concurrently, keeping input order.
+        The shared gemini_limiter decides how many Gemini calls really run at once.
+        
+        With a deadline, returns as soon as it expires: profiles whose analysis
+        has not finished get rule-based scoring flagged 'deadline_exceeded'.
+        With a cancel token, pending analyses are dropped and SearchCancelled
+        is raised once the token trips; calls already in flight finish in the
+        background and their results are discarded.
+        """
+        futures = [
+            self._executor.submit(self.analyze_candidate, profile, criteria, deadline, cancel_token)
+            for profile in profiles
+        ]
+        
+        pending = set(futures)
+        while pending:
+            if cancel_token is not None and cancel_token.cancelled:
+                break
+            if deadline is not None and deadline.expired():
+                break
+            timeout = CANCEL_POLL_INTERVAL if cancel_token is not None else None
+            if deadline is not None:
+                timeout = deadline.remaining() if timeout is None else min(timeout, deadline.remaining())
+            _, pending = wait(pending, timeout=timeout)
+        
+        if cancel_token is not None and cancel_token.cancelled:
+            skipped = sum(1 for future in futures if not future.done())
+            for future in futures:
+                future.cancel()
+            print(f"🛑 Analysis batch cancelled ({cancel_token.reason}) - {skipped} pending analyses dropped")
+            raise SearchCancelled(cancel_token.reason, analyses_skipped=skipped)
+        
+        analyses = []
+        for profile, future in zip(profiles, futures):
+            if future.done() and not future.cancelled():
+                analyses.append(future.result())
+            else:
+                future.cancel()
+                analyses.append(self._get_fallback_analysis(profile, criteria, 'deadline_exceeded'))
+        return analyses
+        
+    def analyze_candidate(
+        self,
+        profile: Dict,
+        criteria: Dict,
+        deadline: Optional[Deadline] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Dict:
         """
         Analyze a candidate profile against search criteria
         
         Args:
             profile: LinkedIn profile data
             criteria: Search criteria
+            deadline: Optional request deadline; Gemini calls never outlive it
+            cancel_token: Optional token; once cancelled, no Gemini call is made
             
         Returns:
             Analysis with summary, tier, and justification
@@ -42,12 +217,41 @@ class AIAnalyzer:
             print("⚠️  No Gemini API key - using mock analysis")
             return self._get_mock_analysis(profile, criteria, original_data_source)
         
+        if cancel_token is not None and cancel_token.cancelled:
+            # Nobody will read this result - skip Gemini entirely
+            return self._get_fallback_analysis(profile, criteria, 'cancelled')
+        
+        if deadline is not None and deadline.expired():
+            print("⏱️  Request deadline reached - using rule-based analysis")
+            return self._get_fallback_analysis(profile, criteria, 'deadline_exceeded')
+        
+        if not gemini_breaker.allow_request():
+            print("⚡ Gemini circuit open - using rule-based analysis")
+            return self._get_fallback_analysis(profile, criteria, 'circuit_open')
+        
         try:
             # Create prompt for Gemini
             prompt = self._create_analysis_prompt(profile, criteria)
             
             # Call Gemini API
-            response = self._call_gemini_api(prompt)
+            try:
+                response = self._call_gemini_api(prompt, deadline, cancel_token)
+            except SearchCancelled:
+                gemini_breaker.record_cancelled()
+                return self._get_fallback_analysis(profile, criteria, 'cancelled')
+            except ConcurrencyLimitTimeout as e:
+                # Queued behind our own limiter, Gemini was never called - not a failure of Gemini
+                gemini_breaker.record_cancelled()
+                print(f"⏳ {e} - using rule-based analysis")
+                return self._get_fallback_analysis(profile, criteria, 'concurrency_limit')
+            except Exception:
+                if deadline is not None and deadline.expired():
+                    # Our own budget ran out - says nothing about Gemini's health
+                    gemini_breaker.record_cancelled()
+                else:
+                    gemini_breaker.record_failure()
+                raise
+            gemini_breaker.record_success()
             
             # Parse the response
             analysis = self._parse_gemini_response(response, profile)
@@ -60,7 +264,15 @@ class AIAnalyzer:
         except Exception as e:
             print(f"❌ AI Analysis error: {e}")
             # Fallback to mock analysis but preserve data source
-            return self._get_mock_analysis(profile, criteria, original_data_source)
+            reason = 'deadline_exceeded' if deadline is not None and deadline.expired() else 'gemini_error'
+            return self._get_fallback_analysis(profile, criteria, reason)
+    
+    def _get_fallback_analysis(self, profile: Dict, criteria: Dict, reason: str) -> Dict:
+        """Rule-based analysis labelled with why Gemini was not used"""
+        analysis = self._get_mock_analysis(profile, criteria, profile.get('data_source', 'unknown'))
+        analysis['data_source'] = profile.get('data_source', 'unknown')
+        analysis['fallback_reason'] = reason
+        return analysis
     
     def _create_analysis_prompt(self, profile: Dict, criteria: Dict) -> str:
         """Create an enhanced prompt for AI analysis with clear Tier A criteria"""
@@ -117,7 +329,7 @@ class AIAnalyzer:
         
         return prompt
     
-    def _call_gemini_api(self, prompt: str) -> Dict:
+    def _call_gemini_api(self, prompt: str, deadline: Optional[Deadline] = None, cancel_token: Optional[CancellationToken] = None) -> Dict:
         """Make API call to Google Gemini with advanced model"""
         
         print(f"🤖 GEMINI DEBUG: Making API call")
@@ -150,17 +362,127 @@ class AIAnalyzer:
         print(f"📞 Calling: {url}")
         print(f"📋 Payload size: {len(str(data))} characters")
         
-        response = requests.post(url, headers=headers, json=data)
+        return self._post_with_hedging(url, headers, data, deadline, cancel_token)
+    
+    def _post_with_hedging(
+        self,
+        url: str,
+        headers: Dict,
+        data: Dict,
+        deadline: Optional[Deadline] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Dict:
+        """
+        Send the request; if it is still running after the hedge delay and the
+        hedge budget allows, send a duplicate and return the first success.
+        The slower request is not cancelled - its result is simply dropped.
+        """
+        
+        with self._hedge_lock:
+            self._primary_calls += 1
+        
+        delay = self._hedge_delay()
+        if delay is None or (deadline is not None and delay >= deadline.remaining()):
+            return self._post_once(url, headers, data, deadline, cancel_token)
         
-        print(f"📊 Response status: {response.status_code}")
-        print(f"📝 Response headers: {dict(response.headers)}")
-        print(f"🔤 Response text (first 1000 chars): {response.text[:1000]}")
+        primary = self._hedge_executor.submit(self._post_once, url, headers, data, deadline, cancel_token)
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+        
+        if (cancel_token is not None and cancel_token.cancelled) or not self._take_hedge_token():
+            return primary.result()
+        
+        print(f"🔀 Gemini call exceeded p{self.hedge_percentile:g} ({delay:.2f}s) - sending hedged request")
+        hedge = self._hedge_executor.submit(self._post_once, url, headers, data, deadline, cancel_token)
+        
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._hedge_lock:
+                            self._hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which to hedge, or None if hedging is off or unwarmed"""
+        if not self.hedge_enabled:
+            return None
+        with self._hedge_lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
+    
+    def _take_hedge_token(self) -> bool:
+        """Spend hedge budget: hedges may not exceed hedge_budget x primary calls"""
+        with self._hedge_lock:
+            if self._hedges_sent + 1 > self.hedge_budget * self._primary_calls:
+                return False
+            self._hedges_sent += 1
+            return True
+    
+    def hedging_snapshot(self) -> Dict:
+        """Hedging state for the /metrics endpoint"""
+        with self._hedge_lock:
+            return {
+                "enabled": self.hedge_enabled,
+                "percentile": self.hedge_percentile,
+                "budget": self.hedge_budget,
+                "latency_samples": len(self._latencies),
+                "primary_calls": self._primary_calls,
+                "hedges_sent": self._hedges_sent,
+                "hedge_wins": self._hedge_wins
+            }
+    
+    def _post_once(
+        self,
+        url: str,
+        headers: Dict,
+        data: Dict,
+        deadline: Optional[Deadline] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Dict:
+        """Single Gemini request through the adaptive limiter"""
         
-        if response.status_code != 200:
-            print(f"❌ Gemini API error: {response.text}")
-            raise requests.RequestException(f"API returned {response.status_code}: {response.text}")
+        start = time.monotonic()
+        # A timeout we shortened to fit the deadline is not an upstream overload signal
+        truncated = deadline is not None and deadline.remaining() < self.read_timeout
+        
+        # Wait at most one read timeout (or the remaining budget) for the adaptive limiter to admit us
+        acquire_timeout = deadline.timeout(self.read_timeout) if deadline is not None else self.read_timeout
+        with gemini_limiter.slot(timeout=acquire_timeout) as call:
+            # The search may have been cancelled while we queued for a slot
+            if cancel_token is not None and cancel_token.cancelled:
+                call["outcome"] = CANCELLED
+                raise SearchCancelled(cancel_token.reason)
+            try:
+                response = self.client.post(url, headers=headers, json=data, timeout=self._request_timeout(deadline))
+            except _OVERLOAD_ERRORS:
+                call["outcome"] = ERROR if truncated and deadline.expired() else OVERLOAD
+                raise
+            
+            print(f"📊 Response status: {response.status_code}")
+            print(f"📝 Response headers: {dict(response.headers)}")
+            print(f"🔤 Response text (first 1000 chars): {response.text[:1000]}")
+            
+            if response.status_code != 200:
+                # 429 and 5xx mean Gemini wants less traffic; other codes are our problem
+                call["outcome"] = OVERLOAD if response.status_code == 429 or response.status_code >= 500 else ERROR
+                print(f"❌ Gemini API error: {response.text}")
+                raise GeminiAPIError(response.status_code, f"API returned {response.status_code}: {response.text}")
         
-        return response.json()
+        result = response.json()
+        with self._hedge_lock:
+            self._latencies.append(time.monotonic() - start)
+        return result
     
     def _parse_gemini_response(self, response: Dict, profile: Dict) -> Dict:
         """Parse Gemini API response"""
@@ -185,6 +507,8 @@ class AIAnalyzer:
                 analysis.update({
                     "name": profile.get("name", "Unknown"),
                     "linkedin_url": profile.get("linkedin_url", ""),
+                    # Harvest id: de-duplicates candidates without a LinkedIn URL (candidate_profiles)
+                    "profile_id": profile.get("profile_id", ""),
                     "email": profile.get("email", ""),
                     "current_company": profile.get("current_company", ""),
                     "current_role": profile.get("current_role", ""),
@@ -238,6 +562,7 @@ class AIAnalyzer:
                                  f"Current role as {role} demonstrates relevant expertise for the search criteria.",
             "confidence_score": 0.75,
             "linkedin_url": profile.get("linkedin_url", ""),
+            "profile_id": profile.get("profile_id", ""),
             "email": profile.get("email", ""),
             "current_company": company,
             "current_role": role,
@@ -0,0 +1,107 @@
+"""
+Cooperative cancellation for in-flight searches
+A token is created per search and checked between pipeline stages; it is
+tripped by a client disconnect or an explicit cancel call
+
+The registry lives in one process. Behind gunicorn a cancel call reaches a
+random worker, so only the disconnect watcher is reliable; an explicit
+cancel only lands when it hits the worker running the search
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+class SearchCancelled(Exception):
+    """Raised inside the pipeline once the search's token has been cancelled"""
+
+    def __init__(self, reason: str = "cancelled", analyses_skipped: int = 0):
+        super().__init__(f"Search cancelled: {reason}")
+        self.reason = reason
+        self.analyses_skipped = analyses_skipped
+
+
+class CancellationToken:
+    """Thread-safe one-shot cancellation flag, owned by the user who started the search"""
+
+    def __init__(self, owner: Optional[str] = None):
+        self._event = threading.Event()
+        self.owner = owner
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise SearchCancelled(self.reason)
+
+
+class CancellationRegistry:
+    """In-flight searches of this process, addressable by search id for explicit cancel calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, CancellationToken] = {}
+
+        # Counters for metrics
+        self._cancelled_by_reason: Dict[str, int] = {}
+        self._analyses_skipped = 0
+        self._exports_skipped = 0
+
+    def register(self, search_id: str, owner: Optional[str] = None) -> Optional[CancellationToken]:
+        """Token for a new search. Returns None if the id is already in flight here."""
+        with self._lock:
+            if search_id in self._tokens:
+                return None
+            token = self._tokens[search_id] = CancellationToken(owner)
+        return token
+
+    def unregister(self, search_id: str):
+        with self._lock:
+            self._tokens.pop(search_id, None)
+
+    def cancel(self, search_id: str, owner: str, reason: str = "cancel_requested") -> bool:
+        """
+        Cancel an in-flight search of this owner. Returns False if this process
+        runs no such search; anonymous searches are never cancelled this way.
+        """
+        with self._lock:
+            token = self._tokens.get(search_id)
+        if token is None or token.owner is None or token.owner != owner:
+            return False
+        token.cancel(reason)
+        return True
+
+    def record_cancelled(self, reason: str, analyses_skipped: int = 0, export_skipped: bool = True):
+        with self._lock:
+            self._cancelled_by_reason[reason] = self._cancelled_by_reason.get(reason, 0) + 1
+            self._analyses_skipped += analyses_skipped
+            if export_skipped:
+                self._exports_skipped += 1
+
+    def record_export_skipped(self):
+        """A search finished too close to its deadline to write its CSV export"""
+        with self._lock:
+            self._exports_skipped += 1
+
+    def snapshot(self) -> Dict:
+        """Cancellation counters for the /metrics endpoint"""
+        with self._lock:
+            return {
+                "in_flight_searches": len(self._tokens),
+                "searches_cancelled": sum(self._cancelled_by_reason.values()),
+                "cancelled_by_reason": dict(self._cancelled_by_reason),
+                "analyses_skipped": self._analyses_skipped,
+                "exports_skipped": self._exports_skipped
+            }
+
+
+# Shared by the search endpoint and the cancel endpoint
+search_registry = CancellationRegistry()
@@ -0,0 +1,47 @@
+"""
+Canonical candidate profiles
+Identity rules for de-duplicating candidates across searches
+(the table split itself is migrations/v0004_candidate_profiles.py)
+"""
+
+import re
+from typing import Dict, Optional
+
+# Columns that live on candidate_profiles (latest value wins) - who the person is
+PROFILE_FIELDS = (
+    "name", "linkedin_url", "email", "current_company", "current_role",
+    "contacts", "source_links", "data_source", "source_note"
+)
+# Columns that stay on search_candidates - the per-search analysis. Gemini writes
+# the summary and justification for one user's criteria, so they are never shared.
+LINK_FIELDS = ("tier", "profile_type", "summary", "match_justification", "confidence_score")
+
+# Placeholder URLs that do not identify a person (see HarvestClient._build_linkedin_url)
+_ANONYMOUS_PROFILES = ("/in/profile-hidden",)
+
+
+def profile_key(linkedin_url: Optional[str], profile_id: Optional[str] = None) -> Optional[str]:
+    """
+    De-duplication key for a candidate: the LinkedIn URL without scheme,
+    subdomain, query string or trailing slash, lower-cased - so
+    https://www.linkedin.com/in/Jane/ and linkedin.com/in/jane match.
+    Falls back to the Harvest profile id; None means "cannot tell who this is".
+    """
+    if linkedin_url and linkedin_url.strip():
+        url = linkedin_url.strip().lower()
+        url = re.sub(r"^[a-z][a-z0-9+.-]*://", "", url)
+        url = re.split(r"[?#]", url, 1)[0].rstrip("/")
+        url = re.sub(r"^([a-z]{2,3}\.)?linkedin\.com/", "linkedin.com/", url)
+        if url and not url.endswith(_ANONYMOUS_PROFILES):
+            return url
+    if profile_id:
+        return f"harvest:{profile_id}"
+    return None
+
+
+def profile_values(row: Dict) -> Dict:
+    """candidate_profiles values for one SearchHistoryService.candidate_rows() entry"""
+    values = {field: row.get(field) for field in PROFILE_FIELDS}
+    values["profile_id"] = row.get("profile_id") or None
+    values["profile_key"] = profile_key(row.get("linkedin_url"), values["profile_id"])
+    return values
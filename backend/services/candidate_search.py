@@ -0,0 +1,120 @@
+"""
+Full-text index over saved candidates
+One index entry per search_candidates link: the profile's identity plus the
+summary and justification written for that search, so a user only ever
+matches the analysis of their own searches. SQLite uses an external-content
+FTS5 table over a view that joins the two tables and decodes the compressed
+text, kept in sync by triggers; PostgreSQL uses a tsvector column with a GIN
+index that SearchHistoryService writes with each link
+(migrations/v0005_candidate_search_index.py, v0006_compressed_columns.py)
+"""
+
+import re
+
+from sqlalchemy import Float, column, func, literal_column, table, text
+
+# Indexed columns in FTS5 column order: CandidateProfile identity, then the SearchCandidate analysis
+PROFILE_FTS_COLUMNS = ("name", "current_role", "current_company")
+LINK_FTS_COLUMNS = ("summary", "match_justification")
+FTS_COLUMNS = PROFILE_FTS_COLUMNS + LINK_FTS_COLUMNS
+# bm25() weights for FTS_COLUMNS - a hit in the name counts most
+FTS5_WEIGHTS = (10.0, 4.0, 4.0, 1.0, 1.0)
+
+FTS5_TABLE = "search_candidates_fts"
+INDEXED_TABLE = "search_candidates"
+PG_VECTOR_COLUMN = "search_vector"
+PG_TEXT_CONFIG = "english"
+
+_PG_IDENTITY_VECTOR = (
+    f"setweight(to_tsvector('{PG_TEXT_CONFIG}'::regconfig, coalesce(p.name, '')), 'A') || "
+    f"setweight(to_tsvector('{PG_TEXT_CONFIG}'::regconfig, "
+    f"coalesce(p.\"current_role\", '') || ' ' || coalesce(p.current_company, '')), 'B')"
+)
+
+# summary / match_justification are compressed, so PostgreSQL cannot compute the
+# vector itself: the identity comes from the profile, the text from the plain values
+PG_LINK_VECTOR_UPDATE = text(
+    f"UPDATE {INDEXED_TABLE} SET {PG_VECTOR_COLUMN} = {_PG_IDENTITY_VECTOR} || "
+    f"setweight(to_tsvector('{PG_TEXT_CONFIG}'::regconfig, "
+    f"coalesce(CAST(:summary AS text), '') || ' ' || coalesce(CAST(:match_justification AS text), '')), 'C') "
+    f"FROM candidate_profiles p "
+    f"WHERE p.id = {INDEXED_TABLE}.candidate_id AND {INDEXED_TABLE}.id = :id AND {INDEXED_TABLE}.created_at = :created_at"
+)
+
+# A profile's identity changed: rewrite the A/B part of all its links' vectors, keeping the C (text) part
+PG_PROFILE_VECTOR_REFRESH = text(
+    f"UPDATE {INDEXED_TABLE} SET {PG_VECTOR_COLUMN} = {_PG_IDENTITY_VECTOR} || "
+    f"ts_filter(coalesce({INDEXED_TABLE}.{PG_VECTOR_COLUMN}, ''::tsvector), '{{c}}') "
+    f"FROM candidate_profiles p "
+    f"WHERE p.id = {INDEXED_TABLE}.candidate_id AND {INDEXED_TABLE}.candidate_id = :id"
+)
+
+_QUERY_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def fts5_match_expression(query: str) -> str:
+    """
+    Translate a search box query into FTS5 syntax, web-search style like
+    PostgreSQL's websearch_to_tsquery: words are ANDed, "quoted phrases"
+    match in order, OR between terms and -word excludes. A trailing * is
+    a prefix match (SQLite only). Every term is quoted, so user input can
+    never be an FTS5 syntax error.
+    """
+    parts = []
+    excluded = []
+    pending_or = False
+    for negated, phrase, word in _QUERY_TOKEN.findall(query):
+        if word.upper() == "OR":
+            pending_or = bool(parts)
+            continue
+        terms = re.findall(r"\w+", phrase or word)
+        if not terms:
+            continue
+        prefix = "*" if word.endswith("*") and len(terms) == 1 else ""
+        term = '"' + " ".join(terms) + '"' + prefix
+        if negated or word.startswith("-"):
+            excluded.append(term)
+            continue
+        if parts and pending_or:
+            parts.append("OR")
+        parts.append(term)
+        pending_or = False
+
+    if not parts:
+        # FTS5 NOT needs something on its left
+        return ""
+    expression = " ".join(parts)
+    if excluded:
+        expression = f"({expression}) NOT " + " NOT ".join(excluded)
+    return expression
+
+
+def match_and_rank(dialect: str, query: str, link_id):
+    """
+    (join target, WHERE clause, rank expression) for a full-text query over
+    search_candidates rows; link_id is the SearchCandidate.id column.
+    Lower rank is a better match on both dialects, so callers sort ascending.
+    Returns None when the query has no searchable terms.
+    """
+    if dialect == "sqlite":
+        expression = fts5_match_expression(query)
+        if not expression:
+            return None
+        fts = table(FTS5_TABLE, column("rowid"))
+        weights = ", ".join(str(weight) for weight in FTS5_WEIGHTS)
+        return (
+            (fts, fts.c.rowid == link_id),
+            literal_column(FTS5_TABLE).op("MATCH")(expression),
+            literal_column(f"bm25({FTS5_TABLE}, {weights})")
+        )
+    if dialect == "postgresql":
+        if not re.search(r"\w", query):
+            return None
+        vector = literal_column(f"{INDEXED_TABLE}.{PG_VECTOR_COLUMN}")
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{PG_TEXT_CONFIG}'::regconfig"), query)
+        return (
+            None,
+            vector.op("@@")(tsquery),
+            -func.ts_rank_cd(vector, tsquery).cast(Float)
+        )
+    raise RuntimeError(f"Candidate full-text search is not supported on {dialect}")
@@ -0,0 +1,98 @@
+"""
+Circuit breaker for outbound API calls
+Stops calling an upstream after sustained failures and lets a single
+half-open probe decide when to resume
+"""
+
+import threading
+import time
+from typing import Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe consecutive-failure circuit breaker.
+
+    closed     - calls flow; failure_threshold failures in a row open the circuit
+    open       - calls are rejected until reset_timeout seconds have passed
+    half_open  - exactly one probe call is let through; success closes the
+                 circuit, failure re-opens it for another reset_timeout
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Counters for metrics
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether the caller may call the upstream right now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                print(f"✅ {self.name} circuit closed - probe succeeded")
+            self._state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._times_opened += 1
+                    print(f"⚡ {self.name} circuit opened after {self._consecutive_failures} consecutive failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """The call ended for reasons unrelated to upstream health (e.g. our own deadline)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        """Current breaker state for the /metrics endpoint"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "rejected_calls": self._rejected,
+                "times_opened": self._times_opened
+            }
@@ -0,0 +1,265 @@
+"""
+Compressed columns
+The large JSON / text columns (search criteria and distributions, Gemini
+summaries and match justifications, contact and source links) are stored
+as zstd frames compressed with a dictionary trained on our own rows.
+Values this short compress poorly on their own; a shared dictionary
+supplies the phrasing and URL structure they all repeat.
+
+Dictionaries live in the compression_dictionaries table, one row per
+training run, and are shared by every worker. Each zstd frame records the
+id of the dictionary it was written with, so training a new one never
+requires rewriting old rows.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import LargeBinary, text
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression settings
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "9"))
+# Shorter values are stored as they are - the frame header would eat the saving
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "64"))
+COMPRESSION_DICT_SIZE_KB = int(os.getenv("COMPRESSION_DICT_SIZE_KB", "32"))
+# Fewer samples than this do not train a useful dictionary (frames then use none)
+COMPRESSION_TRAIN_MIN_SAMPLES = int(os.getenv("COMPRESSION_TRAIN_MIN_SAMPLES", "200"))
+COMPRESSION_TRAIN_MAX_SAMPLES = int(os.getenv("COMPRESSION_TRAIN_MAX_SAMPLES", "20000"))
+
+# Dictionary families - columns with similar content share a dictionary
+SEARCH_JSON = "search_json"            # search criteria, tier / profile distributions
+CANDIDATE_TEXT = "candidate_text"      # Gemini summaries and match justifications
+CANDIDATE_LINKS = "candidate_links"    # contact and source link lists
+
+DICTIONARY_TABLE = "compression_dictionaries"
+# zstd reserves dictionary ids below 32768 for a public registry
+FIRST_DICTIONARY_ID = 32768
+
+# One-byte format marker in front of every stored value
+_RAW = b"\x00"
+_ZSTD = b"\x01"
+
+
+def dump_json(value: Any) -> bytes:
+    """Compact JSON - the byte form CompressedJSON stores and dictionaries are trained on"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class ColumnCodec:
+    """
+    Process-wide codec behind the compressed column types.
+
+    compress() uses the newest dictionary of the value's family, and
+    decompress() reads the dictionary id from the frame header.
+    Dictionaries are loaded from the bound engine on first use. They are
+    loaded again when a frame names one this process has not seen, which
+    happens after another process trains a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self._loaded = False
+        self._dictionaries: Dict[int, Any] = {}
+        self._current: Dict[str, int] = {}
+        # zstd compressor / decompressor objects must not be shared between threads
+        self._local = threading.local()
+
+        # Counters for metrics
+        self._values_compressed = 0
+        self._values_raw = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._reloads = 0
+
+    def bind(self, engine):
+        """Engine the dictionaries are loaded from"""
+        self._engine = engine
+
+    def load(self, connection=None):
+        """(Re)load every dictionary - from the bound engine, or through connection inside a migration"""
+        if zstandard is None:
+            self._loaded = True
+            return
+        query = text(f"SELECT id, family, dictionary FROM {DICTIONARY_TABLE} ORDER BY id")
+        if connection is not None:
+            rows = connection.execute(query).all()
+        elif self._engine is None:
+            rows = []
+        else:
+            try:
+                with self._engine.connect() as own_connection:
+                    rows = own_connection.execute(query).all()
+            except Exception as e:
+                # Before the migration that creates the table: compress without a dictionary
+                print(f"⚠️  Compression dictionaries not loaded: {str(e).splitlines()[0]}")
+                rows = []
+        for dict_id, family, data in rows:
+            self.add_dictionary(family, dict_id, bytes(data))
+        self._loaded = True
+
+    def add_dictionary(self, family: str, dict_id: int, data: bytes):
+        dictionary = zstandard.ZstdCompressionDict(data)
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+            if dict_id > self._current.get(family, 0):
+                self._current[family] = dict_id
+
+    def train(self, family: str, samples: List[bytes], dict_id: int):
+        """Train a dictionary on samples; None when there are too few to be worth it"""
+        if zstandard is None or len(samples) < COMPRESSION_TRAIN_MIN_SAMPLES:
+            return None
+        try:
+            return zstandard.train_dictionary(
+                COMPRESSION_DICT_SIZE_KB * 1024, samples[:COMPRESSION_TRAIN_MAX_SAMPLES],
+                dict_id=dict_id, level=COMPRESSION_LEVEL
+            )
+        except zstandard.ZstdError as e:
+            print(f"⚠️  Could not train a {family} dictionary on {len(samples)} samples: {e}")
+            return None
+
+    def train_and_store(self, connection, family: str, samples: List[bytes]) -> Optional[int]:
+        """Train a new dictionary for family, save it and use it for new values"""
+        dict_id = max(FIRST_DICTIONARY_ID - 1,
+                      connection.execute(text(f"SELECT MAX(id) FROM {DICTIONARY_TABLE}")).scalar() or 0) + 1
+        dictionary = self.train(family, samples, dict_id)
+        if dictionary is None:
+            return None
+        data = dictionary.as_bytes()
+        connection.execute(
+            text(f"INSERT INTO {DICTIONARY_TABLE} (id, family, dictionary, sample_count) "
+                 f"VALUES (:id, :family, :dictionary, :sample_count)"),
+            {"id": dict_id, "family": family, "dictionary": data, "sample_count": len(samples)}
+        )
+        self.add_dictionary(family, dict_id, data)
+        print(f"📚 Trained {family} dictionary {dict_id} ({len(data) // 1024} KB, {len(samples)} samples)")
+        return dict_id
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _compressor(self, dict_id: int):
+        compressors = getattr(self._local, "compressors", None)
+        if compressors is None:
+            compressors = self._local.compressors = {}
+        if dict_id not in compressors:
+            compressors[dict_id] = zstandard.ZstdCompressor(
+                level=COMPRESSION_LEVEL, dict_data=self._dictionaries.get(dict_id), write_checksum=False
+            )
+        return compressors[dict_id]
+
+    def _decompressor(self, dict_id: int):
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        if dict_id not in decompressors:
+            decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+        return decompressors[dict_id]
+
+    def compress(self, family: str, data: bytes) -> bytes:
+        """Stored form of data: a zstd frame, or the bytes as they are when that is not smaller"""
+        if zstandard is not None and len(data) >= COMPRESSION_MIN_BYTES:
+            self._ensure_loaded()
+            frame = self._compressor(self._current.get(family, 0)).compress(data)
+            if len(frame) < len(data):
+                self._values_compressed += 1
+                self._bytes_in += len(data)
+                self._bytes_out += len(frame)
+                return _ZSTD + frame
+        self._values_raw += 1
+        return _RAW + data
+
+    def decompress(self, value: bytes) -> bytes:
+        marker, payload = value[:1], value[1:]
+        if marker == _RAW:
+            return payload
+        if marker != _ZSTD:
+            raise ValueError(f"Unknown compressed column format {marker!r}")
+        if zstandard is None:
+            raise RuntimeError("Compressed column values need the zstandard package (pip install zstandard)")
+        self._ensure_loaded()
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        if dict_id and dict_id not in self._dictionaries:
+            # Trained by another process since we loaded
+            self._reloads += 1
+            self.load()
+            if dict_id not in self._dictionaries:
+                raise ValueError(f"Compression dictionary {dict_id} not found")
+        return self._decompressor(dict_id).decompress(payload)
+
+    def snapshot(self) -> Dict:
+        """Codec counters for the /metrics endpoint"""
+        return {
+            "available": zstandard is not None,
+            "dictionaries": dict(self._current),
+            "values_compressed": self._values_compressed,
+            "values_stored_raw": self._values_raw,
+            "bytes_in": self._bytes_in,
+            "bytes_out": self._bytes_out,
+            "ratio": round(self._bytes_in / self._bytes_out, 2) if self._bytes_out else None,
+            "dictionary_reloads": self._reloads
+        }
+
+
+# Shared by every compressed column; database.py binds it to the engine
+column_codec = ColumnCodec()
+
+
+def sqlite_decompress_text(value):
+    """zstd_text() SQL function: a CompressedText value as text (used by the SQLite full-text triggers)"""
+    if value is None or isinstance(value, str):
+        return value
+    return column_codec.decompress(bytes(value)).decode("utf-8")
+
+
+def register_sqlite_functions(dbapi_connection):
+    dbapi_connection.create_function("zstd_text", 1, sqlite_decompress_text, deterministic=True)
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as a compressed LargeBinary; str in, str out"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, family: str):
+        super().__init__()
+        self.family = family
+
+    def encode(self, value) -> bytes:
+        return value.encode("utf-8")
+
+    def decode(self, data: bytes):
+        return data.decode("utf-8")
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return column_codec.compress(self.family, self.encode(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # psycopg2 returns bytea as memoryview
+        return self.decode(column_codec.decompress(bytes(value)))
+
+
+class CompressedJSON(CompressedText):
+    """JSON stored as a compressed LargeBinary; Python objects in and out"""
+
+    cache_ok = True
+
+    def encode(self, value) -> bytes:
+        return dump_json(value)
+
+    def decode(self, data: bytes):
+        return json.loads(data)
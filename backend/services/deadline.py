@@ -0,0 +1,44 @@
+"""
+Per-request deadline budget
+Created once per search and passed down so every outbound call gets the
+remaining budget as its timeout instead of waiting for gunicorn to kill us
+"""
+
+import time
+from typing import Optional
+
+# Never hand a client library a zero/negative timeout
+MIN_TIMEOUT = 0.01
+
+
+class Deadline:
+    """Absolute time budget for one request, measured on the monotonic clock"""
+
+    def __init__(self, budget_seconds: float, started_at: Optional[float] = None):
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.budget = budget_seconds
+        self.expires_at = self.started_at + budget_seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (0 once expired)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for the next outbound call: remaining budget, capped at the call's own limit"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(cap, remaining)
+        return max(MIN_TIMEOUT, remaining)
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """A deadline that expires `seconds` earlier, keeping that slice for later stages"""
+        return Deadline(max(0.0, self.budget - seconds), started_at=self.started_at)
+
+    def __repr__(self):
+        return f"Deadline(budget={self.budget:.1f}s, remaining={self.remaining():.2f}s)"
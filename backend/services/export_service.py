@@ -3,18 +3,170 @@ Export service for saving results to CSV, database, or Airtable
 """
 
 import csv
+import hashlib
+import io
 import json
 import os
-from typing import List, Dict
+import threading
+import uuid
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional
 from datetime import datetime
 
+from services.export_store import ContentAddressedExportStore, EXPORT_PREFIX
+from services.object_storage import iter_file_range
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# CSV columns matching assignment requirements
+CSV_FIELDNAMES = [
+    'name',
+    'profile_type', 
+    'summary',
+    'contacts',
+    'source_links',
+    'match_justification',
+    'tier',
+    'current_company',
+    'current_role',
+    'confidence_score'
+]
+
+# Rows buffered before a streamed chunk is emitted
+STREAM_CHUNK_ROWS = 200
+
+# Rows per Parquet row group - also the most rows held in memory while writing
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "5000"))
+
+# Arrow schema of the flattened candidate rows (SearchCandidate link + CandidateProfile; lists and floats keep their types)
+CANDIDATE_ARROW_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('search_result_id', pa.int64()),
+    ('candidate_id', pa.int64()),
+    ('name', pa.string()),
+    ('linkedin_url', pa.string()),
+    ('email', pa.string()),
+    ('current_company', pa.string()),
+    ('current_role', pa.string()),
+    ('tier', pa.string()),
+    ('profile_type', pa.string()),
+    ('summary', pa.string()),
+    ('match_justification', pa.string()),
+    ('confidence_score', pa.float64()),
+    ('contacts', pa.list_(pa.string())),
+    ('source_links', pa.list_(pa.string())),
+    ('data_source', pa.string()),
+    ('source_note', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC'))
+]) if pa is not None else None
+
+# Arrow schema of archived SearchResult rows (JSON columns kept as JSON text)
+SEARCH_ARROW_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('user_id', pa.int64()),
+    ('search_query', pa.string()),
+    ('industry', pa.string()),
+    ('experience_depth', pa.int64()),
+    ('max_results', pa.int64()),
+    ('total_candidates', pa.int64()),
+    ('search_criteria', pa.string()),
+    ('tier_distribution', pa.string()),
+    ('profile_distribution', pa.string()),
+    ('export_path', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC'))
+]) if pa is not None else None
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+class ExportEntry(NamedTuple):
+    name: str            # file name as requested from /download
+    location: str        # object key for stored exports, file path for local ones
+    size: int
+    etag: Optional[str]  # quoted strong ETag (content SHA-256)
+    stored: bool         # content-addressed, so the bytes behind the name never change
+
+class ExportIndex:
+    """In-memory index of downloadable exports, updated as exports are written"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, ExportEntry] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def add(self, entry: ExportEntry):
+        with self._lock:
+            self._entries[entry.name] = entry
+    
+    def get(self, name: str) -> Optional[ExportEntry]:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+    
+    def discard(self, name: str):
+        with self._lock:
+            self._entries.pop(name, None)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
 class ExportService:
     """Handle exporting candidate results to various formats"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[ContentAddressedExportStore] = None):
         self.export_dir = "exports"
-        # Create exports directory if it doesn't exist
-        os.makedirs(self.export_dir, exist_ok=True)
+        # With a store, exports go to object storage instead of the local disk
+        self.store = store
+        self.index = ExportIndex()
+        if store is None:
+            # Create exports directory if it doesn't exist
+            os.makedirs(self.export_dir, exist_ok=True)
+        else:
+            store.delete_listeners.append(lambda key: self.index.discard(key.split('/')[-1]))
+        self._index_local_exports()
+    
+    def _index_local_exports(self):
+        """One directory scan at startup; after that the index is kept current on write"""
+        if not os.path.isdir(self.export_dir):
+            return
+        with os.scandir(self.export_dir) as entries:
+            for item in entries:
+                if item.is_file():
+                    self.index.add(ExportEntry(item.name, item.path, item.stat().st_size, None, False))
     
     def export_to_csv(self, candidates: List[Dict], filename: str = None) -> str:
         """
@@ -25,49 +177,172 @@ class ExportService:
             filename: Optional custom filename
             
         Returns:
-            Path to created CSV file
+            Path to created CSV file, or its object key (exports/<sha256>.csv)
+            when the service is backed by a store
         """
         
+        if self.store is not None and not filename:
+            data = b''.join(self.stream_csv(candidates))
+            key = self.store.put(data, 'csv', content_type='text/csv')
+            etag = f'"{self.store.content_hash(key)}"'
+            self.index.add(ExportEntry(key.split('/')[-1], key, len(data), etag, True))
+            return key
+        
         if not filename:
+            # Random suffix: concurrent searches within the same second must not overwrite each other
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"founder_candidates_{timestamp}.csv"
+            filename = f"founder_candidates_{timestamp}_{uuid.uuid4().hex[:8]}.csv"
         
         filepath = os.path.join(self.export_dir, filename)
         
-        # Define CSV columns matching assignment requirements
-        fieldnames = [
-            'name',
-            'profile_type', 
-            'summary',
-            'contacts',
-            'source_links',
-            'match_justification',
-            'tier',
-            'current_company',
-            'current_role',
-            'confidence_score'
-        ]
-        
         with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
             writer.writeheader()
             
             for candidate in candidates:
-                # Prepare row data
-                row = {}
-                for field in fieldnames:
-                    value = candidate.get(field, '')
-                    
-                    # Convert lists to comma-separated strings
-                    if isinstance(value, list):
-                        value = ', '.join(str(v) for v in value)
-                    
-                    row[field] = value
-                
-                writer.writerow(row)
+                writer.writerow(self._csv_row(candidate))
         
+        self.index.add(ExportEntry(filename, filepath, os.path.getsize(filepath), None, False))
         return filepath
     
+    def lookup(self, name: str) -> Optional[ExportEntry]:
+        """
+        Find a downloadable export by file name. Index hits cost no I/O; a miss
+        (e.g. written by another worker) costs a single stat, then is indexed.
+        """
+        entry = self.index.get(name)
+        
+        if entry is None and self.store is not None:
+            info = self.store.stat(EXPORT_PREFIX + name)
+            if info is not None:
+                entry = ExportEntry(name, info.key, info.size, f'"{self.store.content_hash(info.key)}"', True)
+                self.index.add(entry)
+        
+        if entry is None:
+            if os.path.basename(name) != name:
+                return None
+            path = os.path.join(self.export_dir, name)
+            if not os.path.isfile(path):
+                return None
+            entry = ExportEntry(name, path, os.path.getsize(path), None, False)
+        
+        if entry.etag is None:
+            # Local files are not content-addressed - hash once and remember it
+            digest = hashlib.sha256()
+            with open(entry.location, 'rb') as export_file:
+                for chunk in iter(lambda: export_file.read(64 * 1024), b''):
+                    digest.update(chunk)
+            entry = entry._replace(etag=f'"{digest.hexdigest()}"')
+            self.index.add(entry)
+        
+        return entry
+    
+    def open_export(self, entry: ExportEntry, start: int, end: int) -> Iterator[bytes]:
+        """Bytes start..end (inclusive) of an export; raises FileNotFoundError if it is gone"""
+        try:
+            if entry.stored:
+                return self.store.open_range(entry.location, start, end)
+            return iter_file_range(open(entry.location, 'rb'), start, end)
+        except FileNotFoundError:
+            self.index.discard(entry.name)
+            raise
+    
+    def _csv_row(self, candidate: Dict) -> Dict:
+        """Prepare one candidate for CSV output"""
+        row = {}
+        for field in CSV_FIELDNAMES:
+            value = candidate.get(field, '')
+            
+            # Convert lists to comma-separated strings
+            if isinstance(value, list):
+                value = ', '.join(str(v) for v in value)
+            
+            row[field] = '' if value is None else value
+        return row
+    
+    def download_url(self, export_path: str) -> Optional[str]:
+        """Signed, expiring URL for a stored export (None for local files)"""
+        if self.store is None or not export_path.startswith(EXPORT_PREFIX):
+            return None
+        return self.store.signed_url(export_path, filename=f"founder_candidates_{datetime.now().strftime('%Y%m%d')}.csv")
+    
+    def stream_csv(self, candidates: Iterable[Dict]) -> Iterator[bytes]:
+        """
+        Generate a CSV export chunk by chunk, without touching the disk.
+        Memory use is bounded by STREAM_CHUNK_ROWS rows, whatever the input size.
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        
+        for index, candidate in enumerate(candidates, start=1):
+            writer.writerow(self._csv_row(candidate))
+            if index % STREAM_CHUNK_ROWS == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+        
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+    
+    def stream_ndjson(self, candidates: Iterable[Dict]) -> Iterator[bytes]:
+        """Generate newline-delimited JSON (one candidate per line), chunked like stream_csv"""
+        lines = []
+        for candidate in candidates:
+            lines.append(json.dumps(candidate, ensure_ascii=False, default=str))
+            if len(lines) >= STREAM_CHUNK_ROWS:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+        
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+    
+    def stream_parquet(self, candidates: Iterable[Dict], row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+                       schema=None) -> Iterator[bytes]:
+        """
+        Generate a Parquet file (CANDIDATE_ARROW_SCHEMA unless another schema
+        is given) one row group at a time. Each group is flushed to the caller
+        as soon as it is encoded, so memory stays bounded by row_group_size rows.
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed - pip install pyarrow")
+        schema = schema or CANDIDATE_ARROW_SCHEMA
+        
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+        try:
+            batch = []
+            for candidate in candidates:
+                batch.append(candidate)
+                if len(batch) >= row_group_size:
+                    writer.write_table(self._arrow_table(batch, schema))
+                    batch = []
+                    yield sink.drain()
+            
+            if batch:
+                writer.write_table(self._arrow_table(batch, schema))
+        finally:
+            writer.close()
+        # The footer (schema and row group offsets) is written on close
+        yield sink.drain()
+    
+    def _arrow_table(self, records: List[Dict], schema):
+        rows = []
+        for record in records:
+            row = {field.name: record.get(field.name) for field in schema}
+            for field in schema:
+                value = row[field.name]
+                if value is None:
+                    continue
+                if pa.types.is_list(field.type) and isinstance(value, str):
+                    row[field.name] = [value]
+                elif pa.types.is_string(field.type) and isinstance(value, (dict, list)):
+                    row[field.name] = json.dumps(value, ensure_ascii=False)
+                elif pa.types.is_floating(field.type):
+                    row[field.name] = float(value)
+            rows.append(row)
+        return pa.Table.from_pylist(rows, schema=schema)
+    
     def export_to_json(self, candidates: List[Dict], filename: str = None) -> str:
         """Export candidates to JSON file"""
         
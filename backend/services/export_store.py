@@ -0,0 +1,196 @@
+"""
+Content-addressed export store
+Export files are named by the SHA-256 of their contents, so identical
+exports are written once, and a background job enforces age and size limits
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from services.object_storage import ObjectInfo, ObjectStorageBackend
+
+# Retention settings
+EXPORT_MAX_AGE_SECONDS = int(os.getenv("EXPORT_MAX_AGE_SECONDS", "86400"))
+EXPORT_MAX_TOTAL_MB = float(os.getenv("EXPORT_MAX_TOTAL_MB", "512"))
+EXPORT_GC_INTERVAL_SECONDS = int(os.getenv("EXPORT_GC_INTERVAL_SECONDS", "600"))
+EXPORT_URL_TTL_SECONDS = int(os.getenv("EXPORT_URL_TTL_SECONDS", "3600"))
+# Lifetime of the backend URL /download redirects to (GCS) - only needs to outlive the redirect
+EXPORT_REDIRECT_TTL_SECONDS = int(os.getenv("EXPORT_REDIRECT_TTL_SECONDS", "300"))
+
+EXPORT_PREFIX = "exports/"
+
+
+class ContentAddressedExportStore:
+    """
+    Stores export payloads under exports/<sha256>.<ext>.
+
+    Writing content that already exists only refreshes its age, so a result
+    downloaded again keeps its object alive. The GC pass removes objects
+    older than max_age_seconds, then the least recently written ones until
+    the total is under max_total_bytes.
+    """
+
+    def __init__(
+        self,
+        backend: ObjectStorageBackend,
+        max_age_seconds: int = EXPORT_MAX_AGE_SECONDS,
+        max_total_bytes: int = int(EXPORT_MAX_TOTAL_MB * 1024 * 1024),
+        gc_interval: int = EXPORT_GC_INTERVAL_SECONDS,
+        url_ttl: int = EXPORT_URL_TTL_SECONDS,
+        redirect_ttl: int = EXPORT_REDIRECT_TTL_SECONDS
+    ):
+        self.backend = backend
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self.gc_interval = gc_interval
+        self.url_ttl = url_ttl
+        self.redirect_ttl = redirect_ttl
+
+        self._lock = threading.Lock()
+        self._gc_thread: Optional[threading.Thread] = None
+        self._gc_stop = threading.Event()
+        # Called with each key the GC deletes, so caches can drop it
+        self.delete_listeners: List[Callable[[str], None]] = []
+
+        # Counters for metrics
+        self._writes = 0
+        self._dedupe_hits = 0
+        self._bytes_written = 0
+        self._gc_runs = 0
+        self._gc_deleted = 0
+        self._gc_bytes_freed = 0
+        self._last_gc: Optional[Dict] = None
+
+    @staticmethod
+    def key_for(data: bytes, extension: str) -> str:
+        return f"{EXPORT_PREFIX}{hashlib.sha256(data).hexdigest()}.{extension}"
+
+    def put(self, data: bytes, extension: str, content_type: str = "application/octet-stream") -> str:
+        """Store a payload and return its key; identical payloads share one object"""
+        key = self.key_for(data, extension)
+
+        # touch() fails if GC removed the object in the meantime - write it again
+        if self.backend.exists(key) and self.backend.touch(key):
+            with self._lock:
+                self._dedupe_hits += 1
+            return key
+
+        self.backend.put(key, data, content_type)
+        with self._lock:
+            self._writes += 1
+            self._bytes_written += len(data)
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self.backend.get(key)
+
+    def exists(self, key: str) -> bool:
+        return self.backend.exists(key)
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        return self.backend.stat(key)
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        return self.backend.open_range(key, start, end)
+
+    @staticmethod
+    def content_hash(key: str) -> str:
+        """The SHA-256 a key was derived from - a ready-made strong ETag"""
+        return key[len(EXPORT_PREFIX):].rsplit(".", 1)[0]
+
+    def _deleted(self, key: str):
+        for listener in self.delete_listeners:
+            listener(key)
+
+    def signed_url(self, key: str, filename: Optional[str] = None) -> str:
+        return self.backend.signed_url(key, self.url_ttl, filename)
+
+    def verify_signature(self, key: str, expires: str, signature: str) -> bool:
+        return self.backend.verify_signature(key, expires, signature)
+
+    def direct_url(self, key: str, filename: Optional[str] = None) -> Optional[str]:
+        return self.backend.direct_url(key, self.redirect_ttl, filename)
+
+    def collect_garbage(self) -> Dict:
+        """One retention pass: age limit first, then total size limit"""
+        now = time.time()
+        objects = sorted(self.backend.list_objects(EXPORT_PREFIX), key=lambda obj: obj.updated_at)
+        deleted = 0
+        freed = 0
+        kept = []
+
+        for obj in objects:
+            if now - obj.updated_at > self.max_age_seconds:
+                if self.backend.delete(obj.key):
+                    self._deleted(obj.key)
+                    deleted += 1
+                    freed += obj.size
+            else:
+                kept.append(obj)
+
+        total = sum(obj.size for obj in kept)
+        for obj in kept:
+            if total <= self.max_total_bytes:
+                break
+            if self.backend.delete(obj.key):
+                self._deleted(obj.key)
+                deleted += 1
+                freed += obj.size
+            total -= obj.size
+
+        result = {
+            "objects_deleted": deleted,
+            "bytes_freed": freed,
+            "objects_remaining": len(objects) - deleted,
+            "bytes_remaining": max(0, total),
+            "ran_at": now
+        }
+        with self._lock:
+            self._gc_runs += 1
+            self._gc_deleted += deleted
+            self._gc_bytes_freed += freed
+            self._last_gc = result
+        if deleted:
+            print(f"🧹 Export GC removed {deleted} objects ({freed / 1024:.1f} KB)")
+        return result
+
+    def _gc_loop(self):
+        while not self._gc_stop.wait(self.gc_interval):
+            try:
+                self.collect_garbage()
+            except Exception as e:
+                print(f"❌ Export GC failed: {e}")
+
+    def start_gc(self):
+        """Run collect_garbage every gc_interval seconds in a daemon thread"""
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+        self._gc_stop.clear()
+        self._gc_thread = threading.Thread(target=self._gc_loop, name="export-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stop_gc(self):
+        self._gc_stop.set()
+        if self._gc_thread:
+            self._gc_thread.join(timeout=5)
+            self._gc_thread = None
+
+    def snapshot(self) -> Dict:
+        """Store counters for the /metrics endpoint"""
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "bucket": self.backend.bucket,
+                "writes": self._writes,
+                "dedupe_hits": self._dedupe_hits,
+                "bytes_written": self._bytes_written,
+                "max_age_seconds": self.max_age_seconds,
+                "max_total_bytes": self.max_total_bytes,
+                "gc_runs": self._gc_runs,
+                "gc_objects_deleted": self._gc_deleted,
+                "gc_bytes_freed": self._gc_bytes_freed,
+                "last_gc": self._last_gc
+            }
@@ -5,19 +5,180 @@ Updated with enhanced mock data and clear data source labeling
 """
 
 import requests
+import json
 import os
-from typing import List, Dict, Optional
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import random
 
+from services.deadline import Deadline
+from services.cancellation import CancellationToken
+
 load_dotenv()
 
+# Connecting gets its own short limit; HARVEST_TIMEOUT bounds each wait for response data
+HARVEST_CONNECT_TIMEOUT = float(os.getenv("HARVEST_CONNECT_TIMEOUT", "5"))
+# The response body is read in chunks of this size, checking for cancellation between them
+HARVEST_READ_CHUNK_BYTES = 64 * 1024
+
+# Position parsing rules, compiled once. Each keyword group is a plain substring
+# alternation, so a single regex search matches the old any(word in ...) scans.
+_COMPANY_SEPARATORS = [" at ", " presso ", " @ ", " - ", " chez ", " bei ", " en "]
+# Lookahead so overlapping separators are all reported; the earliest one in
+# _COMPANY_SEPARATORS wins, as in the original loop.
+_COMPANY_SEPARATOR_RE = re.compile("(?=(" + "|".join(re.escape(s) for s in _COMPANY_SEPARATORS) + "))")
+
+_FOUNDER_ROLE_RE = re.compile("founder|ceo|fondatore")
+_TECHNICAL_ROLE_RE = re.compile("cto|technical|engineer|developer")
+_MANAGEMENT_ROLE_RE = re.compile("director|manager|vp|chief")
+
+_AI_INDUSTRY_RE = re.compile("ai|artificial intelligence|machine learning")
+_FINTECH_INDUSTRY_RE = re.compile("fintech|financial technology|payments")
+_STARTUP_INDUSTRY_RE = re.compile("startup|innovation|venture")
+
+_EXECUTIVE_RE = re.compile("founder|ceo|chief")
+_MANAGEMENT_LEVEL_RE = re.compile("director|vp|head")
+_SPECIALIST_LEVEL_RE = re.compile("senior|lead|principal")
+
+# French business schools (short name -> full name), in priority order
+_EDUCATION_SCHOOLS = [
+    ("INSEAD", "INSEAD Business School"),
+    ("HEC", "HEC Paris"),
+    ("ESSEC", "ESSEC Business School"),
+    ("EDHEC", "EDHEC Business School"),
+    ("EM Lyon", "EM Lyon Business School"),
+    ("Polytechnique", "École Polytechnique"),
+    ("Sciences Po", "Sciences Po Paris")
+]
+_SCHOOL_PRIORITY = {short.upper(): i for i, (short, _) in enumerate(_EDUCATION_SCHOOLS)}
+_SCHOOL_RE = re.compile("(?=(" + "|".join(re.escape(short.upper()) for short, _ in _EDUCATION_SCHOOLS) + "))")
+
+# Job titles repeat heavily across pages and searches
+POSITION_CACHE_SIZE = int(os.getenv("HARVEST_POSITION_CACHE_SIZE", "4096"))
+
+
+@lru_cache(maxsize=POSITION_CACHE_SIZE)
+def _analyze_position(position: str) -> Tuple[str, Optional[str], Optional[str], Optional[Tuple[str, str, str]], Optional[str]]:
+    """
+    Derive every position-based field in one pass.
+    
+    Returns (company, role_phrase, industry_phrase, experience, school). Only
+    immutable values are cached; callers build fresh dicts from them.
+    """
+    position_lower = position.lower()
+    
+    # Company: first separator (in priority order) that appears anywhere
+    separators = {m.group(1) for m in _COMPANY_SEPARATOR_RE.finditer(position)}
+    if separators:
+        separator = min(separators, key=_COMPANY_SEPARATORS.index)
+        company = position.split(separator)[-1].strip()
+        # Remove common suffixes
+        for suffix in (" | ", " |"):
+            if suffix in company:
+                company = company.split(suffix)[0]
+        company = company[:50]
+    elif "|" in position:
+        # Format like "Role | Company | Description" - usually company is the second part
+        company = position.split("|")[1].strip()[:50]
+    else:
+        company = "Unknown Company"
+    
+    # Summary phrases
+    if _FOUNDER_ROLE_RE.search(position_lower):
+        role_phrase = "with entrepreneurial leadership experience"
+    elif _TECHNICAL_ROLE_RE.search(position_lower):
+        role_phrase = "with strong technical background"
+    elif _MANAGEMENT_ROLE_RE.search(position_lower):
+        role_phrase = "in senior management role"
+    else:
+        role_phrase = None
+    
+    if _AI_INDUSTRY_RE.search(position_lower):
+        industry_phrase = "specializing in AI/ML technologies"
+    elif _FINTECH_INDUSTRY_RE.search(position_lower):
+        industry_phrase = "working in fintech sector"
+    elif _STARTUP_INDUSTRY_RE.search(position_lower):
+        industry_phrase = "focused on innovation and startups"
+    else:
+        industry_phrase = None
+    
+    # Seniority level: (level, type, years_inferred)
+    if _EXECUTIVE_RE.search(position_lower):
+        experience = ("executive", "leadership", "10+")
+    elif _MANAGEMENT_LEVEL_RE.search(position_lower):
+        experience = ("senior", "management", "7-15")
+    elif _SPECIALIST_LEVEL_RE.search(position_lower):
+        experience = ("senior", "specialist", "5-10")
+    else:
+        experience = None
+    
+    # Education hints (upper-cased to keep the original matching semantics)
+    schools = {m.group(1) for m in _SCHOOL_RE.finditer(position.upper())}
+    school = _EDUCATION_SCHOOLS[min(_SCHOOL_PRIORITY[s] for s in schools)][1] if schools else None
+    
+    return company, role_phrase, industry_phrase, experience, school
+
+
+def _build_profile_summary(name: str, position: str, location: str, role_phrase: Optional[str], industry_phrase: Optional[str]) -> str:
+    """Assemble the profile summary sentence from pre-computed phrases"""
+    summary_parts = []
+    
+    # Name handling
+    if name and name != "LinkedIn Member":
+        summary_parts.append(f"{name} is a professional")
+    else:
+        summary_parts.append("LinkedIn professional")
+    
+    # Role analysis
+    if position:
+        if role_phrase:
+            summary_parts.append(role_phrase)
+        summary_parts.append(f"currently working as {position[:100]}")
+    
+    # Location
+    if location:
+        summary_parts.append(f"based in {location}")
+    
+    # Industry insights
+    if position and industry_phrase:
+        summary_parts.append(industry_phrase)
+    
+    return ". ".join(summary_parts) + "."
+
+
+def _experience_entries(experience: Optional[Tuple[str, str, str]]) -> List[Dict]:
+    """Build the experience list from a cached seniority tuple"""
+    if not experience:
+        return []
+    level, kind, years = experience
+    return [{
+        "level": level,
+        "type": kind,
+        "years_inferred": years,
+        "source": "role_analysis"
+    }]
+
+
+def _education_entries(school: Optional[str]) -> List[Dict]:
+    """Build the education list from a cached school name"""
+    if not school:
+        return []
+    return [{
+        "school": school,
+        "degree": "Business/Engineering (inferred)",
+        "source": "profile_text",
+        "confidence": "medium"
+    }]
+
 class HarvestClient:
     """Client for Harvest API (LinkedIn data)"""
     
     def __init__(self):
         self.api_key = os.getenv("HARVEST_API_KEY")
         self.base_url = os.getenv("HARVEST_BASE_URL", "https://api.harvest-api.com")
+        self.timeout = float(os.getenv("HARVEST_TIMEOUT", "20"))
         self.session = requests.Session()
         
         if self.api_key:
@@ -27,10 +188,24 @@ class HarvestClient:
                 "Content-Type": "application/json"
             })
     
-    def search_profiles(self, query: str, max_results: int = 10, criteria: Dict = None) -> List[Dict]:
+    def search_profiles(
+        self,
+        query: str,
+        max_results: int = 10,
+        criteria: Dict = None,
+        deadline: Optional[Deadline] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> List[Dict]:
         """
         Search LinkedIn profiles using Harvest API with full parameter support
         Parameters: search, currentCompany, pastCompany, school, firstName, lastName, title, location, geoId, industryId, page
+        
+        Connecting and waiting for data are bounded by HARVEST_CONNECT_TIMEOUT and
+        HARVEST_TIMEOUT, each capped at the remaining request deadline. Once the
+        deadline has passed no profiles are returned (not mock data): the caller
+        reports a partial result. A cancelled token aborts the search
+        (SearchCancelled) before the fetch, between body chunks - closing the
+        connection rather than returning it to the pool - and before conversion.
         """
         
         print(f"🔍 HARVEST DEBUG: Starting enhanced search")
@@ -42,6 +217,14 @@ class HarvestClient:
             print("⚠️  No API key found - using enhanced mock data only")
             return self._get_enhanced_mock_profiles(query, max_results)
         
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        
+        if deadline is not None and deadline.expired():
+            # No budget left for a real call; mock data would pass for a full result
+            print("⏱️  Request deadline reached before Harvest call - returning no profiles")
+            return []
+        
         try:
             # Use the exact endpoint from documentation
             endpoint = f"{self.base_url}/linkedin/profile-search"
@@ -144,15 +327,24 @@ class HarvestClient:
             print(f"📞 Making API call to: {endpoint}")
             print(f"📋 With comprehensive params: {params}")
             
-            response = self.session.get(endpoint, params=params)
+            if deadline is not None:
+                timeout = (deadline.timeout(HARVEST_CONNECT_TIMEOUT), deadline.timeout(self.timeout))
+            else:
+                timeout = (HARVEST_CONNECT_TIMEOUT, self.timeout)
+            response = self.session.get(endpoint, params=params, timeout=timeout, stream=True)
+            body = self._read_body(response, deadline, cancel_token)
+            text = body.decode(response.encoding or "utf-8", errors="replace")
             
             print(f"📊 Response status: {response.status_code}")
             print(f"📝 Response headers: {dict(response.headers)}")
-            print(f"🔤 Response text (first 500 chars): {response.text[:500]}")
+            print(f"🔤 Response text (first 500 chars): {text[:500]}")
+            
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
             
             if response.status_code == 200:
                 try:
-                    data = response.json()
+                    data = json.loads(body)
                     print(f"📄 JSON keys in response: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
                     
                     # Extract profiles from Harvest API response structure
@@ -164,37 +356,8 @@ class HarvestClient:
                         print(f"📊 Found {total_found} total profiles matching specific filters")
                         print(f"📋 Processing {len(raw_profiles)} profiles from this page")
                         
-                        # Convert Harvest format to our internal format
-                        for idx, profile in enumerate(raw_profiles[:max_results]):
-                            name = profile.get("name", "LinkedIn Member")
-                            position = profile.get("position", "")
-                            location_data = profile.get("location", {})
-                            
-                            converted_profile = {
-                                "name": name,
-                                "linkedin_url": self._build_linkedin_url(profile),
-                                "current_company": self._extract_company_from_position(position),
-                                "current_role": position or "Unknown Role",
-                                "location": location_data.get("linkedinText", "") if isinstance(location_data, dict) else str(location_data),
-                                "summary": self._create_profile_summary(profile),
-                                "experience": self._infer_experience_from_role(position),
-                                "education": self._extract_education_hints(position),
-                                "email": None,  # Not provided by basic search
-                                "profile_id": profile.get("id", ""),
-                                "photo": profile.get("photo", ""),
-                                "hidden": profile.get("hidden", True),
-                                "data_source": "linkedin_real",  # Mark as real LinkedIn data
-                                # Add filter match info for debugging
-                                "matched_filters": {
-                                    "school": params.get("school"),
-                                    "title": params.get("title"), 
-                                    "location": params.get("location"),
-                                    "search": params.get("search")
-                                }
-                            }
-                            
-                            print(f"  {idx+1}. {name} - {position[:50]}... [REAL LINKEDIN DATA]")
-                            profiles.append(converted_profile)
+                        # Convert Harvest format to our internal format (whole page at once)
+                        profiles = self._convert_profiles(raw_profiles[:max_results], params)
                     
                     if profiles:
                         print(f"✅ Successfully found {len(profiles)} REAL LinkedIn profiles!")
@@ -219,7 +382,7 @@ class HarvestClient:
                 
                 except ValueError as e:
                     print(f"❌ JSON parsing error: {e}")
-                    print(f"🔤 Raw response: {response.text}")
+                    print(f"🔤 Raw response: {text}")
             
             elif response.status_code == 401:
                 print(f"❌ Authentication failed - check API key")
@@ -227,16 +390,43 @@ class HarvestClient:
                 print(f"❌ Rate limit exceeded - try again later")  
             else:
                 print(f"❌ API returned status {response.status_code}")
-                print(f"🔤 Error response: {response.text}")
+                print(f"🔤 Error response: {text}")
             
             print("🔄 API call failed - using enhanced mock data as complete fallback")
             return self._get_enhanced_mock_profiles(query, max_results)
             
+        except requests.Timeout as e:
+            if deadline is not None and deadline.expired():
+                print(f"⏱️  Harvest call cut off by the request deadline - returning no profiles")
+                return []
+            print(f"❌ Harvest API error: {e}")
+            print(f"🔄 Using enhanced mock data as complete fallback")
+            return self._get_enhanced_mock_profiles(query, max_results)
         except requests.RequestException as e:
             print(f"❌ Harvest API error: {e}")
             print(f"🔄 Using enhanced mock data as complete fallback")
             return self._get_enhanced_mock_profiles(query, max_results)
     
+    def _read_body(
+        self,
+        response: requests.Response,
+        deadline: Optional[Deadline],
+        cancel_token: Optional[CancellationToken]
+    ) -> bytes:
+        """Read a streamed response chunk by chunk, giving up on cancellation or the deadline"""
+        chunks = []
+        try:
+            for chunk in response.iter_content(HARVEST_READ_CHUNK_BYTES):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if deadline is not None and deadline.expired():
+                    raise requests.Timeout("Request deadline reached while reading the Harvest response")
+                chunks.append(chunk)
+        finally:
+            # A partly read response closes its connection instead of returning it to the pool
+            response.close()
+        return b"".join(chunks)
+    
     def _build_linkedin_url(self, profile: Dict) -> str:
         """Build LinkedIn URL from profile data"""
         if profile.get("linkedinUrl"):
@@ -247,140 +437,82 @@ class HarvestClient:
             # For hidden profiles, return a placeholder
             return f"https://linkedin.com/in/profile-{profile.get('id', 'hidden')}"
     
+    def _convert_profiles(self, raw_profiles: List[Dict], params: Dict) -> List[Dict]:
+        """
+        Convert a page of Harvest profiles to our internal format in one pass.
+        Position-derived fields come from the memoized _analyze_position.
+        """
+        matched_filters = {
+            "school": params.get("school"),
+            "title": params.get("title"),
+            "location": params.get("location"),
+            "search": params.get("search")
+        }
+        
+        profiles = []
+        for idx, profile in enumerate(raw_profiles):
+            name = profile.get("name", "LinkedIn Member")
+            position = profile.get("position", "")
+            location_data = profile.get("location", {})
+            location = location_data.get("linkedinText", "") if isinstance(location_data, dict) else str(location_data)
+            
+            if position:
+                company, role_phrase, industry_phrase, experience, school = _analyze_position(position)
+            else:
+                company, role_phrase, industry_phrase, experience, school = "Unknown Company", None, None, None, None
+            
+            converted_profile = {
+                "name": name,
+                "linkedin_url": self._build_linkedin_url(profile),
+                "current_company": company,
+                "current_role": position or "Unknown Role",
+                "location": location,
+                "summary": _build_profile_summary(profile.get("name", "Professional"), position, location, role_phrase, industry_phrase),
+                "experience": _experience_entries(experience),
+                "education": _education_entries(school),
+                "email": None,  # Not provided by basic search
+                "profile_id": profile.get("id", ""),
+                "photo": profile.get("photo", ""),
+                "hidden": profile.get("hidden", True),
+                "data_source": "linkedin_real",  # Mark as real LinkedIn data
+                # Add filter match info for debugging
+                "matched_filters": dict(matched_filters)
+            }
+            
+            print(f"  {idx+1}. {name} - {position[:50]}... [REAL LINKEDIN DATA]")
+            profiles.append(converted_profile)
+        
+        return profiles
+    
     def _extract_company_from_position(self, position: str) -> str:
         """Extract company name from position string"""
         if not position:
             return "Unknown Company"
-        
-        # Common patterns in different languages
-        separators = [" at ", " presso ", " @ ", " - ", " chez ", " bei ", " en "]
-        
-        for separator in separators:
-            if separator in position:
-                parts = position.split(separator)
-                if len(parts) > 1:
-                    company = parts[-1].strip()
-                    # Remove common suffixes
-                    for suffix in [" | ", " |"]:
-                        if suffix in company:
-                            company = company.split(suffix)[0]
-                    return company[:50]  # Limit length
-        
-        # If no separator found, try to extract from role patterns
-        if "|" in position:
-            # Format like "Role | Company | Description"
-            parts = [p.strip() for p in position.split("|")]
-            if len(parts) >= 2:
-                # Usually company is the second part
-                return parts[1][:50]
-        
-        return "Unknown Company"
+        return _analyze_position(position)[0]
     
     def _create_profile_summary(self, profile: Dict) -> str:
         """Create a comprehensive profile summary"""
-        name = profile.get("name", "Professional")
         position = profile.get("position", "")
         location_data = profile.get("location", {})
         location = location_data.get("linkedinText", "") if isinstance(location_data, dict) else str(location_data)
         
-        summary_parts = []
-        
-        # Name handling
-        if name and name != "LinkedIn Member":
-            summary_parts.append(f"{name} is a professional")
-        else:
-            summary_parts.append("LinkedIn professional")
-        
-        # Role analysis
+        role_phrase, industry_phrase = None, None
         if position:
-            role_lower = position.lower()
-            if any(word in role_lower for word in ["founder", "ceo", "fondatore"]):
-                summary_parts.append("with entrepreneurial leadership experience")
-            elif any(word in role_lower for word in ["cto", "technical", "engineer", "developer"]):
-                summary_parts.append("with strong technical background")
-            elif any(word in role_lower for word in ["director", "manager", "vp", "chief"]):
-                summary_parts.append("in senior management role")
-            
-            summary_parts.append(f"currently working as {position[:100]}")
+            _, role_phrase, industry_phrase, _, _ = _analyze_position(position)
         
-        # Location
-        if location:
-            summary_parts.append(f"based in {location}")
-        
-        # Industry insights
-        if position:
-            position_lower = position.lower()
-            if any(word in position_lower for word in ["ai", "artificial intelligence", "machine learning"]):
-                summary_parts.append("specializing in AI/ML technologies")
-            elif any(word in position_lower for word in ["fintech", "financial technology", "payments"]):
-                summary_parts.append("working in fintech sector")
-            elif any(word in position_lower for word in ["startup", "innovation", "venture"]):
-                summary_parts.append("focused on innovation and startups")
-        
-        return ". ".join(summary_parts) + "."
+        return _build_profile_summary(profile.get("name", "Professional"), position, location, role_phrase, industry_phrase)
     
     def _infer_experience_from_role(self, position: str) -> List[Dict]:
         """Infer experience level from role"""
         if not position:
             return []
-        
-        experience = []
-        position_lower = position.lower()
-        
-        # Infer seniority level
-        if any(word in position_lower for word in ["founder", "ceo", "chief"]):
-            experience.append({
-                "level": "executive",
-                "type": "leadership",
-                "years_inferred": "10+",
-                "source": "role_analysis"
-            })
-        elif any(word in position_lower for word in ["director", "vp", "head"]):
-            experience.append({
-                "level": "senior",
-                "type": "management", 
-                "years_inferred": "7-15",
-                "source": "role_analysis"
-            })
-        elif any(word in position_lower for word in ["senior", "lead", "principal"]):
-            experience.append({
-                "level": "senior",
-                "type": "specialist",
-                "years_inferred": "5-10",
-                "source": "role_analysis"
-            })
-        
-        return experience
+        return _experience_entries(_analyze_position(position)[3])
     
     def _extract_education_hints(self, position: str) -> List[Dict]:
         """Try to extract education hints from position"""
-        education = []
         if not position:
-            return education
-        
-        # French business schools
-        french_schools = {
-            "INSEAD": "INSEAD Business School",
-            "HEC": "HEC Paris", 
-            "ESSEC": "ESSEC Business School",
-            "EDHEC": "EDHEC Business School",
-            "EM Lyon": "EM Lyon Business School",
-            "Polytechnique": "École Polytechnique",
-            "Sciences Po": "Sciences Po Paris"
-        }
-        
-        position_upper = position.upper()
-        for short_name, full_name in french_schools.items():
-            if short_name.upper() in position_upper:
-                education.append({
-                    "school": full_name,
-                    "degree": "Business/Engineering (inferred)",
-                    "source": "profile_text",
-                    "confidence": "medium"
-                })
-                break
-        
-        return education
+            return []
+        return _education_entries(_analyze_position(position)[4])
     
     def _get_enhanced_mock_profiles(self, query: str, max_results: int) -> List[Dict]:
         """Generate enhanced mock LinkedIn profiles with clear labeling"""
@@ -0,0 +1,279 @@
+"""
+Monthly partitions and the retention policy for search history
+On PostgreSQL, search_results and search_candidates are range-partitioned by
+month of created_at (migration 0007). A search's candidate links carry its
+created_at, so both halves of a month sit in partitions with the same bounds
+and expiring the month is two DROP TABLEs, whatever their size.
+
+SQLite has no partitions: the same monthly buckets are expired with chunked
+range deletes from the oldest search onwards. Either way an expired month can
+first be archived to Parquet in export storage (archive/search_history/).
+"""
+
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+# Retention settings (HISTORY_RETENTION_DAYS=0 keeps history forever)
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "0"))
+HISTORY_ARCHIVE_EXPIRED = os.getenv("HISTORY_ARCHIVE_EXPIRED", "true").lower() == "true"
+# Monthly partitions kept ready beyond the current month (PostgreSQL)
+HISTORY_PARTITIONS_AHEAD = int(os.getenv("HISTORY_PARTITIONS_AHEAD", "3"))
+HISTORY_PURGE_CHUNK_ROWS = int(os.getenv("HISTORY_PURGE_CHUNK_ROWS", "500"))
+
+# Referenced table first: partitions are created in this order and dropped in reverse
+PARTITIONED_TABLES = ("search_results", "search_candidates")
+ARCHIVE_PREFIX = "archive/search_history/"
+
+# pg_advisory_xact_lock key: workers starting together create each partition once
+_PG_PARTITION_LOCK_KEY = 72150048
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant (UTC) of the month containing moment"""
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(connection, table: str = PARTITIONED_TABLES[0]) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+    return relkind == "p"
+
+
+def list_partitions(connection, table: str) -> Dict[datetime, str]:
+    """{month: partition name} of a table's monthly partitions (the DEFAULT one is left out)"""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {"table": table}).scalars()
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.search(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)] = name
+    return partitions
+
+
+def _has_rows(connection, table: str, month: datetime) -> bool:
+    return connection.execute(
+        text(f"SELECT 1 FROM {table} WHERE created_at >= :start AND created_at < :end LIMIT 1"),
+        {"start": month, "end": add_months(month, 1)}
+    ).first() is not None
+
+
+def ensure_partitions(connection, first_month: datetime, last_month: datetime) -> List[str]:
+    """
+    Create the monthly partitions from first_month to last_month, plus the
+    DEFAULT partition that catches rows outside them, for every partitioned
+    table. Returns the partitions created.
+
+    A month whose rows already landed in the DEFAULT partition is skipped
+    with a warning: PostgreSQL refuses the new partition, and those rows are
+    expired by a range delete instead.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_PARTITION_LOCK_KEY})
+    created = []
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+        existing = list_partitions(connection, table)
+        month = month_start(first_month)
+        while month <= last_month:
+            end = add_months(month, 1)
+            if month not in existing:
+                if _has_rows(connection, f"{table}_default", month):
+                    print(f"⚠️  {table}_default holds rows for {month:%Y-%m} - not creating {partition_name(table, month)}")
+                else:
+                    connection.execute(text(
+                        f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+                    ))
+                    created.append(partition_name(table, month))
+            month = end
+    return created
+
+
+def ensure_history_partitions(engine, months_ahead: int = HISTORY_PARTITIONS_AHEAD) -> List[str]:
+    """Partitions for this month and the next months_ahead; no-op unless the history tables are partitioned"""
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        this_month = month_start(datetime.now(timezone.utc))
+        created = ensure_partitions(connection, this_month, add_months(this_month, months_ahead))
+    if created:
+        print(f"🗓️  Created history partitions: {', '.join(created)}")
+    return created
+
+
+class HistoryRetention:
+    """
+    Applies the retention policy: every month that ended more than
+    retention_days ago is archived (optionally), taken out of the users'
+    statistics rollups and removed. Candidate profiles that no remaining
+    search links to, and that nothing updated since the cutoff, go too.
+    """
+
+    def __init__(
+        self,
+        engine,
+        session_factory,
+        retention_days: int = HISTORY_RETENTION_DAYS,
+        archive: bool = HISTORY_ARCHIVE_EXPIRED,
+        export_service=None,
+        chunk_rows: int = HISTORY_PURGE_CHUNK_ROWS
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.retention_days = retention_days
+        self.archive = archive
+        # Writes the archives; needs a store (object storage), not the local exports/ directory
+        self.export_service = export_service
+        self.chunk_rows = chunk_rows
+
+    def cutoff(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Searches created before this are expired; None when retention is off"""
+        if self.retention_days <= 0:
+            return None
+        return (now or datetime.now(timezone.utc)) - timedelta(days=self.retention_days)
+
+    def expired_months(self, cutoff: datetime) -> List[datetime]:
+        """Months, oldest first, that ended before cutoff and have a partition or unpartitioned rows"""
+        with self.engine.connect() as connection:
+            months = set()
+            if is_partitioned(connection):
+                months.update(list_partitions(connection, PARTITIONED_TABLES[0]))
+                unpartitioned = f"{PARTITIONED_TABLES[0]}_default"
+            else:
+                unpartitioned = PARTITIONED_TABLES[0]
+            oldest = connection.execute(text(f"SELECT MIN(created_at) FROM {unpartitioned}")).scalar()
+            if oldest is not None:
+                if isinstance(oldest, str):
+                    # SQLite hands back the stored text
+                    oldest = datetime.fromisoformat(oldest)
+                month = month_start(oldest)
+                while add_months(month, 1) <= cutoff:
+                    if month not in months and _has_rows(connection, unpartitioned, month):
+                        months.add(month)
+                    month = add_months(month, 1)
+        return sorted(month for month in months if add_months(month, 1) <= cutoff)
+
+    def purge(self, now: Optional[datetime] = None, dry_run: bool = False) -> Dict:
+        """Expire every month past the cutoff; returns what was (or, with dry_run, would be) removed"""
+        cutoff = self.cutoff(now)
+        if cutoff is None:
+            return {"enabled": False}
+
+        months = self.expired_months(cutoff)
+        summary = {"enabled": True, "cutoff": cutoff.isoformat(), "months": [], "archived": [],
+                   "searches_deleted": 0, "profiles_deleted": 0}
+        for month in months:
+            summary["months"].append(f"{month:%Y-%m}")
+            if dry_run:
+                continue
+            if self.archive:
+                summary["archived"].extend(self.archive_month(month))
+            summary["searches_deleted"] += self.expire_month(month)
+
+        if not dry_run and months:
+            from search_history_service import SearchHistoryService
+            db = self.session_factory()
+            try:
+                summary["profiles_deleted"] = SearchHistoryService(db).delete_orphan_profiles(cutoff, self.chunk_rows)
+            finally:
+                db.close()
+        return summary
+
+    def archive_month(self, month: datetime) -> List[str]:
+        """Write one month of searches and candidate rows to Parquet; returns the object keys"""
+        from search_history_service import SearchHistoryService
+        from services.export_service import SEARCH_ARROW_SCHEMA, ExportService
+        from services.export_store import ContentAddressedExportStore
+        from services.object_storage import create_storage_backend
+
+        if SEARCH_ARROW_SCHEMA is None:
+            raise RuntimeError("Archiving expired history needs pyarrow - pip install pyarrow "
+                               "(or set HISTORY_ARCHIVE_EXPIRED=false)")
+        if self.export_service is None:
+            self.export_service = ExportService(store=ContentAddressedExportStore(create_storage_backend()))
+        storage = self.export_service.store.backend
+
+        start, end = month, add_months(month, 1)
+        db = self.session_factory()
+        try:
+            if not _has_rows(db.connection(), PARTITIONED_TABLES[0], month):
+                return []
+            service = SearchHistoryService(db)
+            # Parquet row groups are written to a temporary file and uploaded from
+            # there, so memory stays at one row group however large the month is
+            files = {
+                "search_results.parquet": self.export_service.stream_parquet(
+                    service.iter_search_rows_between(start, end), schema=SEARCH_ARROW_SCHEMA),
+                "search_candidates.parquet": self.export_service.stream_parquet(
+                    service.iter_candidate_rows_between(start, end))
+            }
+            keys = []
+            for filename, chunks in files.items():
+                # Outside exports/, so the export GC never touches it
+                key = f"{ARCHIVE_PREFIX}{month:%Y-%m}/{filename}"
+                with tempfile.NamedTemporaryFile(prefix="history-archive-", suffix=".parquet") as spool:
+                    for chunk in chunks:
+                        spool.write(chunk)
+                    spool.flush()
+                    storage.put_file(key, spool.name, content_type="application/vnd.apache.parquet")
+                keys.append(key)
+        finally:
+            db.close()
+        print(f"📦 Archived search history for {month:%Y-%m} to {ARCHIVE_PREFIX}{month:%Y-%m}/")
+        return keys
+
+    def expire_month(self, month: datetime) -> int:
+        """Remove one month of history; returns the searches deleted"""
+        from search_history_service import SearchHistoryService
+
+        start, end = month, add_months(month, 1)
+        db = self.session_factory()
+        try:
+            service = SearchHistoryService(db)
+            connection = db.connection()
+            partitions = [list_partitions(connection, table).get(month) for table in PARTITIONED_TABLES] \
+                if is_partitioned(connection) else [None]
+            if all(partitions):
+                searches = service.release_statistics_between(start, end)
+                # The candidate partition references the search partition, so it goes first;
+                # DETACH also checks nothing else still references the searches
+                results_partition, candidates_partition = partitions
+                db.execute(text(f"DROP TABLE {candidates_partition}"))
+                db.execute(text(f"ALTER TABLE {PARTITIONED_TABLES[0]} DETACH PARTITION {results_partition}"))
+                db.execute(text(f"DROP TABLE {results_partition}"))
+                db.commit()
+                print(f"🗑️  Dropped history partitions for {month:%Y-%m} ({searches} searches)")
+                return searches
+            db.rollback()
+            # No partition for this month (SQLite, or rows in a DEFAULT partition)
+            searches = service.delete_searches_between(start, end, self.chunk_rows)
+            print(f"🗑️  Deleted {searches} searches from {month:%Y-%m}")
+            return searches
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,246 @@
+"""
+Write-behind queue for search history saves
+Completed searches from many concurrent requests are collected and written
+in one transaction every flush interval or batch size, instead of each
+request taking its own connection from the small PostgreSQL pool
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+# Write-behind settings (disabled unless HISTORY_WRITE_BEHIND=true)
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "false").lower() == "true"
+HISTORY_FLUSH_INTERVAL_MS = int(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200"))
+HISTORY_FLUSH_MAX_ROWS = int(os.getenv("HISTORY_FLUSH_MAX_ROWS", "1000"))
+HISTORY_QUEUE_MAX_SEARCHES = int(os.getenv("HISTORY_QUEUE_MAX_SEARCHES", "500"))
+# Batch window for the SQLite single writer: there is no pool to protect, so it
+# only needs to gather the saves that arrive while the previous batch commits
+SQLITE_HISTORY_FLUSH_INTERVAL_MS = int(os.getenv("SQLITE_HISTORY_FLUSH_INTERVAL_MS", "20"))
+
+
+class PendingSave(NamedTuple):
+    values: Dict             # SearchHistoryService.search_result_values()
+    candidates: List[Dict]   # SearchHistoryService.candidate_rows()
+    future: Future           # resolves to the new search_results.id once committed
+
+
+class HistoryWriteBehindQueue:
+    """
+    Bounded queue drained by one background thread per worker process.
+
+    A flush is triggered when flush_interval_ms has passed since the oldest
+    queued search, or when max_rows rows (parents + candidates) are waiting.
+    Each caller gets a Future that resolves only after its rows are
+    committed, so a response never claims a save that could still be lost.
+    When the queue is full, submit() writes synchronously instead.
+
+    With single_writer (SQLite), every write - including those synchronous
+    fallbacks - goes through one lock, so this process never has two
+    history transactions competing for the database write lock.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HISTORY_WRITE_BEHIND,
+        flush_interval_ms: int = HISTORY_FLUSH_INTERVAL_MS,
+        max_rows: int = HISTORY_FLUSH_MAX_ROWS,
+        max_queued: int = HISTORY_QUEUE_MAX_SEARCHES,
+        session_factory=None,
+        single_writer: bool = False
+    ):
+        self.enabled = enabled
+        self.single_writer = single_writer
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self.max_queued = max_queued
+        self._session_factory = session_factory
+
+        self._condition = threading.Condition()
+        # Reentrant: a failed batch is retried search by search from inside _write
+        self._write_lock = threading.RLock()
+        self._queue: Deque[PendingSave] = deque()
+        self._queued_rows = 0
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._closed = False
+
+        # Counters for metrics
+        self._flushes = 0
+        self._searches_written = 0
+        self._rows_written = 0
+        self._sync_fallbacks = 0
+        self._failed_flushes = 0
+        self._largest_batch = 0
+        self._last_flush_ms = 0.0
+
+    def use_single_writer(self, flush_interval_ms: int = SQLITE_HISTORY_FLUSH_INTERVAL_MS):
+        """Serialize all history writes through the queue (the SQLite profile)"""
+        with self._condition:
+            self.enabled = True
+            self.single_writer = True
+            self.flush_interval = flush_interval_ms / 1000
+
+    def _new_session(self):
+        if self._session_factory is None:
+            # Lazy import to avoid database connection during startup
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def _ensure_thread(self):
+        # Started lazily in the serving process: threads do not survive gunicorn's preload fork
+        if self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid():
+            return
+        self._thread = threading.Thread(target=self._run, name="history-write-behind", daemon=True)
+        self._thread_pid = os.getpid()
+        self._thread.start()
+
+    def submit(self, user_id: int, search_criteria: Dict, search_response: Dict) -> Future:
+        """Queue one completed search; the Future resolves to its search_results.id"""
+        from search_history_service import SearchHistoryService
+
+        pending = PendingSave(
+            SearchHistoryService.search_result_values(user_id, search_criteria, search_response),
+            SearchHistoryService.candidate_rows(search_response),
+            Future()
+        )
+
+        with self._condition:
+            if self.enabled and not self._closed and len(self._queue) < self.max_queued:
+                self._ensure_thread()
+                self._queue.append(pending)
+                self._queued_rows += 1 + len(pending.candidates)
+                # Wakes the writer to open a batch window, or to flush a full batch early
+                self._condition.notify_all()
+                return pending.future
+            if self.enabled:
+                self._sync_fallbacks += 1
+
+        # Disabled, shutting down or full: write in the caller's thread
+        self._write([pending])
+        return pending.future
+
+    def _take_batch(self) -> List[PendingSave]:
+        batch = []
+        rows = 0
+        while self._queue and (not batch or rows + 1 + len(self._queue[0].candidates) <= self.max_rows):
+            pending = self._queue.popleft()
+            rows += 1 + len(pending.candidates)
+            batch.append(pending)
+        self._queued_rows -= rows
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue and self._closed:
+                    return
+                # Give other requests flush_interval to join this batch, unless it is already full
+                deadline = time.monotonic() + self.flush_interval
+                while self._queued_rows < self.max_rows and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_batch()
+            self._write(batch)
+
+    def _write(self, batch: List[PendingSave]):
+        """Write a batch in one transaction; if it fails, retry each search alone"""
+        if self.single_writer:
+            with self._write_lock:
+                self._write_batch(batch)
+        else:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[PendingSave]):
+        from search_history_service import SearchHistoryService
+
+        start = time.monotonic()
+        db = self._new_session()
+        try:
+            try:
+                ids = SearchHistoryService(db).save_search_results_batch(
+                    [pending.values for pending in batch],
+                    [pending.candidates for pending in batch]
+                )
+                for pending, search_result_id in zip(batch, ids):
+                    pending.future.set_result(search_result_id)
+                self._record_flush(batch, start)
+            except Exception as batch_error:
+                if len(batch) == 1:
+                    raise
+                # Keep one bad row from failing every request in the batch
+                print(f"⚠️  History batch of {len(batch)} failed ({batch_error}) - saving one by one")
+                for pending in batch:
+                    self._write([pending])
+        except Exception as e:
+            with self._condition:
+                self._failed_flushes += 1
+            print(f"❌ History save failed: {e}")
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+        finally:
+            db.close()
+
+    def _record_flush(self, batch: List[PendingSave], start: float):
+        with self._condition:
+            self._flushes += 1
+            self._searches_written += len(batch)
+            self._rows_written += sum(1 + len(pending.candidates) for pending in batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._last_flush_ms = round((time.monotonic() - start) * 1000, 2)
+
+    def flush(self):
+        """Write everything queued so far in the caller's thread"""
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting queued writes and drain the queue (shutdown hooks)"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            pending = len(self._queue)
+            thread = self._thread if self._thread_pid == os.getpid() else None
+        if pending:
+            print(f"💾 Flushing {pending} queued history saves before exit")
+        if thread is not None:
+            thread.join(timeout)
+        # Whatever the thread did not get to (or no thread in this process)
+        self.flush()
+
+    def snapshot(self) -> Dict:
+        """Queue counters for the /metrics endpoint"""
+        with self._condition:
+            return {
+                "enabled": self.enabled,
+                "single_writer": self.single_writer,
+                "queued_searches": len(self._queue),
+                "queued_rows": self._queued_rows,
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "max_rows": self.max_rows,
+                "max_queued": self.max_queued,
+                "flushes": self._flushes,
+                "searches_written": self._searches_written,
+                "rows_written": self._rows_written,
+                "largest_batch": self._largest_batch,
+                "last_flush_ms": self._last_flush_ms,
+                "sync_fallbacks": self._sync_fallbacks,
+                "failed_flushes": self._failed_flushes
+            }
+
+
+# Shared by the search endpoint and the shutdown hooks
+history_writer = HistoryWriteBehindQueue()
@@ -0,0 +1,320 @@
+"""
+Object storage backends for export files
+A small bucket/key interface so exports can live in GCS in production and in
+a local directory laid out like a bucket during development. Download links
+are always the API's own HMAC-signed /download URLs; a backend that can hand
+out its own signed URLs (GCS) gets redirected to once the link checks out.
+"""
+
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Iterator, NamedTuple, Optional
+
+try:
+    import google.auth
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+    from google.cloud import storage as gcs_storage
+except ImportError:
+    gcs_storage = None
+
+# Storage settings
+EXPORT_STORAGE_BACKEND = os.getenv("EXPORT_STORAGE_BACKEND", "local")
+EXPORT_STORAGE_DIR = os.getenv("EXPORT_STORAGE_DIR", "object_store")
+EXPORT_BUCKET = os.getenv("EXPORT_BUCKET", "founder-sourcing-exports")
+EXPORT_SIGNING_SECRET = os.getenv("EXPORT_SIGNING_SECRET") or os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+
+# Covers both the bucket and the IAM signBlob call behind signed URLs
+GCS_AUTH_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+
+# Chunk size for ranged reads
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    updated_at: float  # unix timestamp of the last write or touch
+
+
+class ObjectStorageBackend:
+    """Interface every export storage backend implements"""
+
+    bucket: str
+
+    def __init__(self, signing_secret: str = EXPORT_SIGNING_SECRET, url_prefix: str = "/download"):
+        self.signing_secret = signing_secret.encode("utf-8")
+        self.url_prefix = url_prefix
+
+    def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        """Upload a local file without reading it into memory"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        """Object contents; raises FileNotFoundError if the key does not exist"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        """Size and updated_at of one object, or None if it does not exist"""
+        raise NotImplementedError
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Bytes start..end (inclusive) in chunks. The object is opened before
+        this returns, so a missing key raises FileNotFoundError up front.
+        """
+        raise NotImplementedError
+
+    def touch(self, key: str) -> bool:
+        """Refresh the object's updated_at. Returns False if it no longer exists."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def list_objects(self, prefix: str = "") -> Iterator[ObjectInfo]:
+        raise NotImplementedError
+
+    def _signature(self, key: str, expires: str) -> str:
+        message = f"{self.bucket}/{key}\n{expires}".encode("utf-8")
+        return hmac.new(self.signing_secret, message, hashlib.sha256).hexdigest()
+
+    def signed_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> str:
+        """Time-limited /download URL for one object, mirroring GCS V4 signed URLs"""
+        expires = str(int(time.time()) + expires_in)
+        name = key.split("/")[-1]
+        return f"{self.url_prefix}/{name}?expires={expires}&signature={self._signature(key, expires)}"
+
+    def verify_signature(self, key: str, expires: str, signature: str) -> bool:
+        """Check a token issued by signed_url"""
+        if not expires or not signature or not expires.isdigit():
+            return False
+        if int(expires) < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, expires), signature)
+
+    def direct_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        """
+        Time-limited URL that fetches the object straight from the store, for
+        /download to redirect to - None when /download must serve the bytes itself
+        """
+        return None
+
+
+class LocalObjectStorage(ObjectStorageBackend):
+    """
+    GCS-style bucket emulated in a local directory: objects are stored at
+    <root>/<bucket>/<key> and /download streams them itself
+    """
+
+    def __init__(self, root: str = EXPORT_STORAGE_DIR, bucket: str = EXPORT_BUCKET,
+                 signing_secret: str = EXPORT_SIGNING_SECRET, url_prefix: str = "/download"):
+        super().__init__(signing_secret, url_prefix)
+        self.bucket = bucket
+        self.bucket_dir = os.path.join(root, bucket)
+        os.makedirs(self.bucket_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        base = os.path.abspath(self.bucket_dir)
+        path = os.path.abspath(os.path.join(base, key))
+        if not path.startswith(base + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        self._write(key, lambda tmp_file: tmp_file.write(data))
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        def copy(tmp_file):
+            with open(path, "rb") as source:
+                shutil.copyfileobj(source, tmp_file, READ_CHUNK_BYTES)
+        self._write(key, copy)
+
+    def _write(self, key: str, write):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers never see a half-written object
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                write(tmp_file)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as obj:
+            return obj.read()
+
+    def exists(self, key: str) -> bool:
+        try:
+            return os.path.isfile(self._path(key))
+        except ValueError:
+            return False
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat = os.stat(self._path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+        return ObjectInfo(key, stat.st_size, stat.st_mtime)
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        obj = open(self._path(key), "rb")
+        return iter_file_range(obj, start, end)
+
+    def touch(self, key: str) -> bool:
+        try:
+            os.utime(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_objects(self, prefix: str = "") -> Iterator[ObjectInfo]:
+        for directory, _, files in os.walk(self.bucket_dir):
+            for name in files:
+                if name.startswith(".upload-"):
+                    continue
+                path = os.path.join(directory, name)
+                key = os.path.relpath(path, self.bucket_dir).replace(os.sep, "/")
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield ObjectInfo(key, stat.st_size, stat.st_mtime)
+
+
+class GCSObjectStorage(ObjectStorageBackend):
+    """
+    Google Cloud Storage bucket; /download checks the API's token, then
+    redirects to a short-lived GCS V4 signed URL so the bytes never pass
+    through the API. Cloud Run credentials carry no private key, so URLs are
+    signed by the IAM signBlob API as the runtime service account, which needs
+    roles/iam.serviceAccountTokenCreator on itself (see setup-gcp.sh)
+    """
+
+    def __init__(self, bucket: str = EXPORT_BUCKET, signing_secret: str = EXPORT_SIGNING_SECRET,
+                 url_prefix: str = "/download"):
+        if gcs_storage is None:
+            raise RuntimeError("google-cloud-storage is not installed - pip install google-cloud-storage")
+        super().__init__(signing_secret, url_prefix)
+        self.bucket = bucket
+        self._credentials, project = google.auth.default(scopes=[GCS_AUTH_SCOPE])
+        self._credentials_lock = threading.Lock()
+        self._bucket = gcs_storage.Client(credentials=self._credentials, project=project).bucket(bucket)
+
+    def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        self._bucket.blob(key).upload_from_string(data, content_type=content_type)
+
+    def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        # Resumable, chunked upload for large files
+        self._bucket.blob(key).upload_from_filename(path, content_type=content_type)
+
+    def get(self, key: str) -> bytes:
+        blob = self._bucket.blob(key)
+        if not blob.exists():
+            raise FileNotFoundError(key)
+        return blob.download_as_bytes()
+
+    def exists(self, key: str) -> bool:
+        return self._bucket.blob(key).exists()
+
+    def stat(self, key: str) -> Optional[ObjectInfo]:
+        blob = self._bucket.get_blob(key)
+        if blob is None:
+            return None
+        return ObjectInfo(key, blob.size or 0, blob.updated.timestamp())
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        blob = self._bucket.get_blob(key)
+        if blob is None:
+            raise FileNotFoundError(key)
+
+        def chunks():
+            position = start
+            while position <= end:
+                chunk_end = min(end, position + READ_CHUNK_BYTES - 1)
+                yield blob.download_as_bytes(start=position, end=chunk_end)
+                position = chunk_end + 1
+        return chunks()
+
+    def touch(self, key: str) -> bool:
+        blob = self._bucket.get_blob(key)
+        if blob is None:
+            return False
+        # A metadata patch bumps `updated` without rewriting the object
+        blob.metadata = {**(blob.metadata or {}), "touched_at": str(int(time.time()))}
+        blob.patch()
+        return True
+
+    def delete(self, key: str) -> bool:
+        blob = self._bucket.get_blob(key)
+        if blob is None:
+            return False
+        blob.delete()
+        return True
+
+    def list_objects(self, prefix: str = "") -> Iterator[ObjectInfo]:
+        for blob in self._bucket.list_blobs(prefix=prefix):
+            yield ObjectInfo(blob.name, blob.size or 0, blob.updated.timestamp())
+
+    def direct_url(self, key: str, expires_in: int, filename: Optional[str] = None) -> Optional[str]:
+        disposition = f'attachment; filename="{filename or key.split("/")[-1]}"'
+        with self._credentials_lock:
+            # The metadata server only fills in service_account_email on refresh
+            if not self._credentials.valid:
+                self._credentials.refresh(GoogleAuthRequest())
+            service_account_email = self._credentials.service_account_email
+            access_token = self._credentials.token
+        return self._bucket.blob(key).generate_signed_url(
+            version="v4",
+            expiration=timedelta(seconds=expires_in),
+            method="GET",
+            response_disposition=disposition,
+            service_account_email=service_account_email,
+            access_token=access_token
+        )
+
+
+def iter_file_range(obj, start: int, end: int) -> Iterator[bytes]:
+    """Read an already-open file from start to end (inclusive), closing it when done"""
+    with obj:
+        obj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = obj.read(min(READ_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def create_storage_backend(backend: str = EXPORT_STORAGE_BACKEND) -> ObjectStorageBackend:
+    """Backend selected by EXPORT_STORAGE_BACKEND (local | gcs)"""
+    if backend == "gcs":
+        print(f"☁️  Export storage: GCS bucket {EXPORT_BUCKET}")
+        return GCSObjectStorage()
+    print(f"📁 Export storage: local bucket {os.path.join(EXPORT_STORAGE_DIR, EXPORT_BUCKET)}")
+    return LocalObjectStorage()
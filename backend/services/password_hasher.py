@@ -0,0 +1,135 @@
+"""
+Password hashing off the event loop
+bcrypt is deliberately slow (about 250 ms of CPU at cost 12). Hashes and
+verifications run on a small dedicated thread pool, one thread per core by
+default (bcrypt releases the GIL while it works), instead of the shared
+threadpool that also runs file responses and other sync work. A login burst
+queues here without starving those, and once PASSWORD_HASH_MAX_PENDING
+operations are waiting, further ones are turned away rather than queued
+behind seconds of bcrypt work.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt cost (log2 of the work factor): each +1 doubles the time per hash.
+# Stored hashes with another cost are rehashed at this one on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Operations queued or running at once before callers get PasswordHasherBusy
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING password operations are already pending"""
+    pass
+
+
+def create_password_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # Hashes made at any other cost report needs_update(), so verify_and_update() re-creates them
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+class PasswordHasher:
+    """
+    Bounded executor for bcrypt, shared by every request in the process.
+    The async methods wait on the pool without holding the event loop; the
+    CryptContext is also exposed for sync callers (scripts, AuthService).
+    """
+
+    def __init__(
+        self,
+        rounds: int = BCRYPT_ROUNDS,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING
+    ):
+        self.rounds = rounds
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.context = create_password_context(rounds)
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._pending = 0
+
+        # Counters for metrics
+        self._hashes = 0
+        self._verifications = 0
+        self._rehashes = 0
+        self._rejected = 0
+        self._peak_pending = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily in the serving process: threads do not survive gunicorn's preload fork
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy(f"{self._pending} password operations already pending")
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+            future = self._get_executor().submit(fn, *args)
+        # Released when the work finishes (or is cancelled while queued), not when the caller stops waiting
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        result = await self._run(self.context.hash, password)
+        with self._lock:
+            self._hashes += 1
+        return result
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        result = await self._run(self.context.verify, password, hashed_password)
+        with self._lock:
+            self._verifications += 1
+        return result
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash): new_hash is set when the password is right but its hash uses another cost"""
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        with self._lock:
+            self._verifications += 1
+            if new_hash:
+                self._rehashes += 1
+        return valid, new_hash
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> Dict:
+        """Pool state for the /metrics endpoint"""
+        with self._lock:
+            return {
+                "bcrypt_rounds": self.rounds,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "hashes": self._hashes,
+                "verifications": self._verifications,
+                "rehashes": self._rehashes,
+                "rejected": self._rejected
+            }
+
+
+# One pool per worker process
+password_hasher = PasswordHasher()
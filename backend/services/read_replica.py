@@ -0,0 +1,194 @@
+"""
+Read-replica lag monitor
+Decides whether history reads may go to the replica: it has to be reachable
+and at most REPLICA_MAX_LAG_SECONDS behind the primary, otherwise reads fall
+back to the primary until a later check says the replica has caught up
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+# Replica routing settings (only used when DATABASE_REPLICA_URL is set)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+# A user who deleted history reads it from the primary this long afterwards
+REPLICA_PRIMARY_AFTER_DELETE_SECONDS = float(os.getenv("REPLICA_PRIMARY_AFTER_DELETE_SECONDS", "60"))
+
+# Streaming standby: seconds since the last replayed transaction, 0 when it has
+# replayed everything it received (an idle primary is not lag)
+_STANDBY_LAG_SQL = text("""
+    SELECT pg_is_in_recovery(),
+           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+""")
+_NEWEST_RESULT_SQL = text("SELECT MAX(id) FROM search_results")
+_OLDEST_MISSING_SQL = text("SELECT MIN(created_at) FROM search_results WHERE id > :newest")
+
+
+class ReplicaLagMonitor:
+    """
+    Measures replica lag every check_interval seconds from a background task.
+
+    A PostgreSQL streaming standby reports its own replay lag. Anything else
+    (a second SQLite file, a logically replicated or restored PostgreSQL) is
+    compared with the primary by search_results watermark: the lag is the age
+    of the oldest row the primary has and the replica does not. That
+    watermark only sees inserts: a replica still showing deleted searches
+    looks caught up. So a user who deletes history is read from the primary
+    for primary_after_delete seconds (record_delete / deleted_recently).
+    Like the lag, that state is kept per worker process.
+
+    Until the first check succeeds, after a failed check, or when the last
+    successful check is older than three intervals, use_replica() is False.
+    """
+
+    def __init__(
+        self,
+        primary,
+        replica=None,
+        max_lag_seconds: float = REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds: float = REPLICA_LAG_CHECK_SECONDS,
+        primary_after_delete_seconds: float = REPLICA_PRIMARY_AFTER_DELETE_SECONDS
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag_seconds
+        self.check_interval = check_interval_seconds
+        self.primary_after_delete = primary_after_delete_seconds
+        self._deleted_at: Dict[int, float] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._last_error: Optional[str] = None
+
+        # Counters for metrics
+        self._checks = 0
+        self._failed_checks = 0
+        self._replica_sessions = 0
+        self._fallback_sessions = 0
+        self._after_delete_sessions = 0
+
+    @property
+    def configured(self) -> bool:
+        return self.replica is not None
+
+    def use_replica(self) -> bool:
+        """True while the replica is reachable, fresh enough and recently checked"""
+        if not self.configured or self._lag is None:
+            return False
+        if time.monotonic() - self._checked_at > 3 * self.check_interval:
+            return False
+        return self._lag <= self.max_lag
+
+    def record_route(self, to_replica: bool):
+        if to_replica:
+            self._replica_sessions += 1
+        else:
+            self._fallback_sessions += 1
+
+    def record_delete(self, user_id: int):
+        """The user deleted history: send their reads to the primary for a while"""
+        if self.configured:
+            self._deleted_at[user_id] = time.monotonic()
+
+    def deleted_recently(self, user_id: int) -> bool:
+        """True if the user's reads must skip the replica to not see deleted searches"""
+        deleted_at = self._deleted_at.get(user_id)
+        if deleted_at is None or time.monotonic() - deleted_at > self.primary_after_delete:
+            return False
+        self._after_delete_sessions += 1
+        return True
+
+    def _forget_old_deletes(self):
+        cutoff = time.monotonic() - self.primary_after_delete
+        for user_id, deleted_at in list(self._deleted_at.items()):
+            if deleted_at < cutoff:
+                del self._deleted_at[user_id]
+
+    async def measure_lag(self) -> float:
+        """Seconds the replica is behind the primary"""
+        async with self.replica.connect() as replica:
+            if replica.dialect.name == "postgresql":
+                in_recovery, lag = (await replica.execute(_STANDBY_LAG_SQL)).one()
+                if in_recovery:
+                    return max(0.0, float(lag or 0))
+            newest = (await replica.execute(_NEWEST_RESULT_SQL)).scalar() or 0
+        async with self.primary.connect() as primary:
+            oldest_missing = (await primary.execute(_OLDEST_MISSING_SQL, {"newest": newest})).scalar()
+        if oldest_missing is None:
+            return 0.0
+        if isinstance(oldest_missing, str):
+            # SQLite without declared type affinity hands back the raw text
+            oldest_missing = datetime.fromisoformat(oldest_missing)
+        if oldest_missing.tzinfo is None:
+            # server_default=func.now() is UTC on SQLite
+            oldest_missing = oldest_missing.replace(tzinfo=timezone.utc)
+        return max(0.0, (datetime.now(timezone.utc) - oldest_missing).total_seconds())
+
+    async def check(self) -> Optional[float]:
+        """Measure lag once; a failure routes reads to the primary"""
+        self._checks += 1
+        self._forget_old_deletes()
+        try:
+            lag = await self.measure_lag()
+        except Exception as e:
+            if self._lag is not None or self._last_error is None:
+                print(f"⚠️  Read replica check failed, reading from primary: {e}")
+            self._failed_checks += 1
+            self._lag = None
+            self._last_error = str(e).splitlines()[0][:200]
+            return None
+
+        was_usable = self.use_replica()
+        self._lag = lag
+        self._checked_at = time.monotonic()
+        self._last_error = None
+        if was_usable != self.use_replica():
+            if self.use_replica():
+                print(f"✅ Read replica caught up ({lag:.1f}s behind) - history reads use the replica")
+            else:
+                print(f"⚠️  Read replica {lag:.1f}s behind (max {self.max_lag:g}s) - history reads use the primary")
+        return lag
+
+    async def _check_loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        """Start checking on the running event loop (no-op without a replica)"""
+        if not self.configured or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._check_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict:
+        """Replica state for the /metrics endpoint"""
+        return {
+            "configured": self.configured,
+            "using_replica": self.use_replica(),
+            "lag_seconds": None if self._lag is None else round(self._lag, 3),
+            "max_lag_seconds": self.max_lag,
+            "check_interval_seconds": self.check_interval,
+            "checks": self._checks,
+            "failed_checks": self._failed_checks,
+            "last_error": self._last_error,
+            "replica_sessions": self._replica_sessions,
+            "primary_fallback_sessions": self._fallback_sessions,
+            "primary_after_delete_seconds": self.primary_after_delete,
+            "primary_after_delete_sessions": self._after_delete_sessions
+        }
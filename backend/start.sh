@@ -6,6 +6,10 @@ set -e
 
 echo "🚀 Starting Founder Sourcing Agent Backend..."
 
-# Start the application directly without database setup
+# Apply pending schema migrations (see migrations/)
+echo "🔄 Running database migrations..."
+python -m migrations upgrade
+
+# Start the application
 echo "🌟 Starting Gunicorn server..."
 exec gunicorn main:app --config gunicorn.conf.py
@@ -0,0 +1,116 @@
+"""
+Train new zstd dictionaries for the compressed columns
+
+Migration 0006 trains the first dictionaries from the rows that exist
+when it runs (none on a fresh database - values then compress without
+one). Run this once there is real history, and again when compression
+ratios in /metrics drift. New values use the newest dictionary of their
+family; old rows keep decoding with the dictionary they were written with
+unless --recompress rewrites them. Running workers start writing with the
+new dictionary after their next restart.
+
+Usage (from backend/):
+    python train_compression_dictionaries.py
+    python train_compression_dictionaries.py --family candidate_text --recompress
+"""
+
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import bindparam, select, update
+
+from database import Base, SessionLocal, engine
+import auth_models  # noqa: F401 - users table for the foreign keys
+import search_models  # noqa: F401 - register the compressed columns
+from services.compression import (COMPRESSION_MIN_BYTES, COMPRESSION_TRAIN_MAX_SAMPLES, CompressedText,
+                                  column_codec)
+
+RECOMPRESS_CHUNK_ROWS = 500
+
+
+def compressed_columns():
+    """{family: [Column, ...]} for every compressed column the models declare"""
+    families = defaultdict(list)
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, CompressedText):
+                families[column.type.family].append(column)
+    return families
+
+
+def samples_for(db, columns):
+    samples = []
+    for column in columns:
+        rows = db.execute(
+            select(column).where(column.isnot(None))
+            .order_by(column.table.c.id.desc()).limit(COMPRESSION_TRAIN_MAX_SAMPLES)
+        )
+        for (value,) in rows:
+            encoded = column.type.encode(value)
+            if len(encoded) >= COMPRESSION_MIN_BYTES:
+                samples.append(encoded)
+    return samples
+
+
+def recompress(db, columns):
+    """Rewrite every value of columns with the newest dictionary; returns the rows rewritten"""
+    rewritten = 0
+    for table, table_columns in _by_table(columns).items():
+        rewrite = update(table).where(table.c.id == bindparam("row_id")).values(
+            {column.name: bindparam(f"value_{column.name}") for column in table_columns}
+        )
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(table.c.id, *table_columns).where(table.c.id > last_id)
+                .order_by(table.c.id).limit(RECOMPRESS_CHUNK_ROWS)
+            ).all()
+            if not rows:
+                break
+            db.execute(rewrite, [
+                {"row_id": row[0], **{f"value_{column.name}": value for column, value in zip(table_columns, row[1:])}}
+                for row in rows
+            ])
+            db.commit()
+            rewritten += len(rows)
+            last_id = rows[-1][0]
+    return rewritten
+
+
+def _by_table(columns):
+    tables = defaultdict(list)
+    for column in columns:
+        tables[column.table].append(column)
+    return tables
+
+
+def main():
+    families = compressed_columns()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--family", choices=sorted(families), help="Only train this family")
+    parser.add_argument("--recompress", action="store_true", help="Rewrite existing rows with the new dictionary")
+    args = parser.parse_args()
+
+    column_codec.load()
+    db = SessionLocal()
+    try:
+        for family, columns in sorted(families.items()):
+            if args.family and family != args.family:
+                continue
+            samples = samples_for(db, columns)
+            with engine.begin() as connection:
+                dict_id = column_codec.train_and_store(connection, family, samples)
+            if dict_id is None:
+                print(f"⚠️  {family}: not enough samples ({len(samples)}) - keeping the current dictionary")
+                continue
+            if args.recompress:
+                rows = recompress(db, columns)
+                print(f"✅ {family}: {rows} rows rewritten with dictionary {dict_id}")
+    finally:
+        db.close()
+
+    print(f"📊 {column_codec.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
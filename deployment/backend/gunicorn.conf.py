@@ -37,3 +37,12 @@ tmp_upload_dir = None
 # SSL (not needed for Cloud Run as it handles SSL termination)
 keyfile = None
 certfile = None
+
+# Worker lifecycle hooks
+def worker_exit(server, worker):
+    """Flush write-behind history saves before the worker process goes away"""
+    try:
+        from services.history_writer import history_writer
+    except ImportError:
+        return
+    history_writer.close()
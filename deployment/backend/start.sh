@@ -17,13 +17,7 @@ fi
 
 # Run database migrations
 echo "🔄 Running database migrations..."
-python -c "
-from database import create_tables
-from auth_models import Base
-from database import engine
-Base.metadata.create_all(bind=engine)
-print('Database tables created/updated')
-"
+python -m migrations upgrade
 
 # Start the application
 echo "🌟 Starting Gunicorn server..."
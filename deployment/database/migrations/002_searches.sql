@@ -1,54 +0,0 @@
--- Migration 002: Create searches and candidates tables
--- This migration creates tables for storing search history and candidate data
-
--- Create searches table
-CREATE TABLE IF NOT EXISTS searches (
-    id SERIAL PRIMARY KEY,
-    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    search_criteria JSONB NOT NULL,
-    search_results JSONB,
-    status VARCHAR(50) DEFAULT 'pending',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-
--- Create candidates table
-CREATE TABLE IF NOT EXISTS candidates (
-    id SERIAL PRIMARY KEY,
-    search_id INTEGER REFERENCES searches(id) ON DELETE CASCADE,
-    harvest_id VARCHAR(255),
-    name VARCHAR(255) NOT NULL,
-    title VARCHAR(255),
-    company VARCHAR(255),
-    location VARCHAR(255),
-    linkedin_url VARCHAR(500),
-    email VARCHAR(255),
-    phone VARCHAR(100),
-    bio TEXT,
-    skills JSONB,
-    experience JSONB,
-    education JSONB,
-    ai_analysis JSONB,
-    score DECIMAL(3,2),
-    status VARCHAR(50) DEFAULT 'new',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
-
--- Create indexes
-CREATE INDEX IF NOT EXISTS idx_searches_user_id ON searches(user_id);
-CREATE INDEX IF NOT EXISTS idx_searches_created_at ON searches(created_at);
-CREATE INDEX IF NOT EXISTS idx_candidates_search_id ON candidates(search_id);
-CREATE INDEX IF NOT EXISTS idx_candidates_harvest_id ON candidates(harvest_id);
-CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates(score);
-
--- Create triggers for updated_at
-CREATE TRIGGER update_searches_updated_at 
-    BEFORE UPDATE ON searches 
-    FOR EACH ROW 
-    EXECUTE FUNCTION update_updated_at_column();
-
-CREATE TRIGGER update_candidates_updated_at 
-    BEFORE UPDATE ON candidates 
-    FOR EACH ROW 
-    EXECUTE FUNCTION update_updated_at_column();
@@ -9,6 +9,8 @@ set -e
 PROJECT_ID="founder-sourcing-agent"
 REGION="us-central1"
 SERVICE_NAME="founder-sourcing-agent-backend"
+SERVICE_ACCOUNT="founder-sourcing-sa@$PROJECT_ID.iam.gserviceaccount.com"
+EXPORT_BUCKET="founder-sourcing-agent-exports"
 
 echo "🚀 Starting deployment of Founder Sourcing Agent..."
 
@@ -44,6 +46,8 @@ gcloud run deploy $SERVICE_NAME \
     --platform managed \
     --region $REGION \
     --allow-unauthenticated \
+    --service-account $SERVICE_ACCOUNT \
+    --update-env-vars="EXPORT_STORAGE_BACKEND=gcs,EXPORT_BUCKET=$EXPORT_BUCKET,EXPORT_URL_TTL_SECONDS=900,EXPORT_REDIRECT_TTL_SECONDS=300,EXPORT_MAX_AGE_SECONDS=86400" \
     --memory 1Gi \
     --cpu 1 \
     --max-instances 10 \
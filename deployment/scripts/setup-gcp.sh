@@ -9,6 +9,8 @@ set -e
 PROJECT_ID="founder-sourcing-agent"
 REGION="us-central1"
 ZONE="us-central1-a"
+SERVICE_ACCOUNT="founder-sourcing-sa@$PROJECT_ID.iam.gserviceaccount.com"
+EXPORT_BUCKET="founder-sourcing-agent-exports"
 
 echo "🚀 Setting up GCP project for Founder Sourcing Agent..."
 
@@ -25,6 +27,8 @@ gcloud services enable \
     secretmanager.googleapis.com \
     cloudresourcemanager.googleapis.com \
     iam.googleapis.com \
+    iamcredentials.googleapis.com \
+    storage.googleapis.com \
     containerregistry.googleapis.com
 
 # 3. Create Cloud SQL instance
@@ -66,20 +70,36 @@ gcloud iam service-accounts create founder-sourcing-sa \
 # 8. Grant necessary permissions
 echo "🔓 Granting permissions..."
 gcloud projects add-iam-policy-binding $PROJECT_ID \
-    --member="serviceAccount:founder-sourcing-sa@$PROJECT_ID.iam.gserviceaccount.com" \
+    --member="serviceAccount:$SERVICE_ACCOUNT" \
     --role="roles/cloudsql.client"
 
 gcloud projects add-iam-policy-binding $PROJECT_ID \
-    --member="serviceAccount:founder-sourcing-sa@$PROJECT_ID.iam.gserviceaccount.com" \
+    --member="serviceAccount:$SERVICE_ACCOUNT" \
     --role="roles/secretmanager.secretAccessor"
 
-# 9. Configure Cloud Run to use service account
+# 9. Create the export bucket (EXPORT_BUCKET); exports are served through signed URLs only
+echo "🪣 Creating export bucket..."
+gcloud storage buckets create gs://$EXPORT_BUCKET \
+    --location=$REGION \
+    --uniform-bucket-level-access \
+    --public-access-prevention || echo "Bucket already exists"
+
+gcloud storage buckets add-iam-policy-binding gs://$EXPORT_BUCKET \
+    --member="serviceAccount:$SERVICE_ACCOUNT" \
+    --role="roles/storage.objectAdmin"
+
+# Signed download URLs are signed by the IAM signBlob API as the service account itself
+gcloud iam service-accounts add-iam-policy-binding $SERVICE_ACCOUNT \
+    --member="serviceAccount:$SERVICE_ACCOUNT" \
+    --role="roles/iam.serviceAccountTokenCreator"
+
+# 10. Configure Cloud Run to use service account
 echo "⚙️ Configuring Cloud Run..."
 gcloud run services update founder-sourcing-agent-backend \
-    --service-account="founder-sourcing-sa@$PROJECT_ID.iam.gserviceaccount.com" \
+    --service-account="$SERVICE_ACCOUNT" \
     --region=$REGION || echo "Service doesn't exist yet, will be configured during deployment"
 
-# 10. Get connection info
+# 11. Get connection info
 echo "📋 Getting connection information..."
 DB_HOST=$(gcloud sql instances describe founder-sourcing-db --format="value(connectionName)")
 DB_INSTANCE_CONNECTION_NAME=$(gcloud sql instances describe founder-sourcing-db --format="value(connectionName)")
@@ -93,6 +113,7 @@ echo "Database Host: $DB_HOST"
 echo "Database Name: founder_sourcing_agent"
 echo "Database User: founder_app"
 echo "Database Password: [stored in Secret Manager]"
+echo "Export Bucket: gs://$EXPORT_BUCKET"
 echo "Secret Key: [stored in Secret Manager]"
 echo ""
 echo "🔗 Next steps:"
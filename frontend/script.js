@@ -600,7 +600,13 @@ async function handleExport() {
             
         console.log('📁 Requesting download for filename:', filename);
         
-        const response = await fetch(`${API_BASE_URL}/download/${filename}`);
+        // Stored exports come with a signed, expiring URL (absolute when served by object storage)
+        const exportUrl = lastSearchResponse.export_url;
+        const downloadUrl = exportUrl
+            ? (exportUrl.startsWith('http') ? exportUrl : `${API_BASE_URL}${exportUrl}`)
+            : `${API_BASE_URL}/download/${filename}`;
+        
+        const response = await fetch(downloadUrl);
         
         if (!response.ok) {
             const errorText = await response.text();
@@ -15,6 +15,7 @@ const Results = () => {
   const [selectedCandidate, setSelectedCandidate] = useState(null)
   const [isModalOpen, setIsModalOpen] = useState(false)
   const [searchHistory, setSearchHistory] = useState([])
+  const [historyCursor, setHistoryCursor] = useState(null)
   const [currentSearchId, setCurrentSearchId] = useState(null)
   const [filters, setFilters] = useState({
     tier: 'all',
@@ -54,6 +55,7 @@ const Results = () => {
         const historyResponse = await searchAPI.getSearchHistory()
         if (historyResponse.success) {
           setSearchHistory(historyResponse.history || [])
+          setHistoryCursor(historyResponse.page?.next_cursor || null)
         }
       } catch (error) {
         console.error('Error loading search history:', error)
@@ -63,15 +65,38 @@ const Results = () => {
     setIsLoading(false)
   }
 
+  const loadMoreHistory = async () => {
+    try {
+      const historyResponse = await searchAPI.getSearchHistory({ after: historyCursor })
+      if (historyResponse.success) {
+        setSearchHistory(previous => previous.concat(historyResponse.history || []))
+        setHistoryCursor(historyResponse.page?.next_cursor || null)
+      }
+    } catch (error) {
+      console.error('Error loading more search history:', error)
+    }
+  }
+
   const loadSearchFromHistory = async (searchId) => {
     try {
       const response = await searchAPI.getSearchResult(searchId)
       if (response.success) {
-        setCandidates(response.search_result.candidates || [])
+        // Show the first page right away, then fetch the rest in the background
+        let loaded = response.search_result.candidates || []
+        setCandidates(loaded)
         setCurrentSearchId(searchId)
         
+        let nextCursor = response.page?.next_cursor
+        while (nextCursor) {
+          const page = await searchAPI.getSearchResult(searchId, { after: nextCursor, limit: 200 })
+          if (!page.success) break
+          loaded = loaded.concat(page.search_result.candidates || [])
+          setCandidates(loaded)
+          nextCursor = page.page?.next_cursor
+        }
+        
         // Update localStorage with the loaded search
-        localStorage.setItem('searchResults', JSON.stringify(response.search_result))
+        localStorage.setItem('searchResults', JSON.stringify({ ...response.search_result, candidates: loaded }))
         localStorage.setItem('searchTimestamp', response.search_result.created_at)
       }
     } catch (error) {
@@ -286,6 +311,14 @@ const Results = () => {
                   </div>
                 </div>
               ))}
+              {historyCursor && (
+                <button
+                  onClick={loadMoreHistory}
+                  className="w-full py-2 text-sm text-primary-600 hover:text-primary-700"
+                >
+                  Load older searches
+                </button>
+              )}
             </div>
           </div>
         </div>
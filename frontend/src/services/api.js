@@ -71,9 +71,10 @@ export const searchAPI = {
   },
 
   // Get search history
-  getSearchHistory: async () => {
+  getSearchHistory: async (params = {}) => {
     try {
-      const response = await api.get('/search-history')
+      // params: { after, limit } - pass page.next_cursor as `after` for older searches
+      const response = await api.get('/search-history', { params })
       return response.data
     } catch (error) {
       console.error('Get search history error:', error)
@@ -82,9 +83,10 @@ export const searchAPI = {
   },
 
   // Get specific search result
-  getSearchResult: async (searchId) => {
+  getSearchResult: async (searchId, params = {}) => {
     try {
-      const response = await api.get(`/search-history/${searchId}`)
+      // params: { after, limit, tier } - candidates come back one keyset page at a time
+      const response = await api.get(`/search-history/${searchId}`, { params })
       return response.data
     } catch (error) {
       console.error('Get search result error:', error)
@@ -103,6 +105,20 @@ export const searchAPI = {
     }
   },
 
+  // Delete several search results at once (or the whole history with deleteAll)
+  deleteSearchResults: async (searchIds, deleteAll = false) => {
+    try {
+      const response = await api.post('/search-history/bulk-delete', {
+        search_ids: searchIds,
+        delete_all: deleteAll
+      })
+      return response.data
+    } catch (error) {
+      console.error('Delete search results error:', error)
+      throw error
+    }
+  },
+
   // Get search statistics
   getSearchStatistics: async () => {
     try {
@@ -112,6 +128,29 @@ export const searchAPI = {
       console.error('Get search statistics error:', error)
       throw error
     }
+  },
+
+  // Full-text search across all saved candidates
+  searchCandidates: async (q, params = {}) => {
+    try {
+      // params: { after, limit } - pass page.next_cursor as `after` for more matches
+      const response = await api.get('/candidates/search', { params: { q, ...params } })
+      return response.data
+    } catch (error) {
+      console.error('Search candidates error:', error)
+      throw error
+    }
+  },
+
+  // Has this founder been saved in one of the user's searches before?
+  lookupCandidate: async (linkedinUrl) => {
+    try {
+      const response = await api.get('/candidates/lookup', { params: { linkedin_url: linkedinUrl } })
+      return response.data
+    } catch (error) {
+      console.error('Lookup candidate error:', error)
+      throw error
+    }
   }
 }
 